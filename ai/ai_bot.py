@@ -1,21 +1,38 @@
 import random
-from utils.constants import Team, CellType, PieceRank
+from utils.config import AI_PONDER, SEARCH_THINK_TIME
+from utils.constants import Team, PieceRank, MoveResult
+from engine.combat import expected_outcomes
+from ai.belief import BeliefTracker
+from ai.search import PonderingSearch
 
 
 class AIBot:
     """
     Artificial Intelligence for Stratego.
-    Supports 3 levels of difficulty:
+    Supports 4 levels of difficulty:
     1: Random Legal Moves
     2: Greedy (Always attacks if possible)
     3: Smart/Sherlock (Uses heuristics to guess bombs and prioritize forward movement)
+    4: Search (Tree search over sampled enemy layouts, pondering on the opponent's time)
     """
 
-    def __init__(self, team: Team, logic, level: int = 2):
+    def __init__(self, team: Team, logic, level: int = 2, think_time: float = SEARCH_THINK_TIME,
+                 seed=None, search_iterations: int = None):
+        """
+        :param think_time: Seconds the search level spends per move (pondering included).
+        :param seed: Seed of the search level's random choices (see PonderingSearch).
+        :param search_iterations: Fixed search iterations per move instead of think_time, for reproducible games.
+        """
         self.team = team
         self.logic = logic
         self.board = logic.board
         self.level = level
+        self.think_time = think_time
+        self.seed = seed
+        self.search_iterations = search_iterations
+        # Created on first use, once the armies are on the board
+        self.belief = None
+        self.search = None
 
     def get_move(self):
         """Returns the best move (start_pos, end_pos) based on the AI level."""
@@ -30,6 +47,33 @@ class AIBot:
             return self._level_2_greedy(valid_moves)
         elif self.level == 3:
             return self._level_3_smart(valid_moves)
+        elif self.level == 4:
+            return self._level_4_search(valid_moves)
+
+    def get_belief(self):
+        """Returns this bot's BeliefTracker about enemy ranks, synced with the latest moves."""
+        if self.belief is None:
+            self.belief = BeliefTracker(self.team, self.logic)
+        self.belief.update()
+        return self.belief
+
+    def ponder(self):
+        """
+        Lets the search level keep thinking while the opponent is on the move.
+        Safe to call every frame; does nothing for the other levels.
+        """
+        if self.level == 4 and AI_PONDER:
+            self._get_search().ponder()
+
+    def stop_pondering(self):
+        """Stops background thinking (e.g. when the game ends or the window closes)."""
+        if self.search:
+            self.search.stop()
+
+    def _get_search(self) -> PonderingSearch:
+        if self.search is None:
+            self.search = PonderingSearch(self.team, self.logic, seed=self.seed, iterations=self.search_iterations)
+        return self.search
 
     # ==========================================
     # AI STRATEGIES (LEVELS)
@@ -62,6 +106,7 @@ class AIBot:
         scored_moves = []
         forward_dir = -1 if self.team == Team.BLUE else 1
         enemy_back_row = 0 if self.team == Team.BLUE else (self.board.size - 1)
+        attack_odds = self._attack_odds(valid_moves)
 
         for start_pos, end_pos in valid_moves:
             score = 0
@@ -75,6 +120,10 @@ class AIBot:
                         score += 100  # Miners are perfect for back row!
                     else:
                         score -= 50  # Keep other units away from back-row bombs!
+                elif end_pos in attack_odds.get(start_pos, {}):
+                    # Expected result against what the piece can still be: +100 sure win, -20 sure loss
+                    win, lose, tie = attack_odds[start_pos][end_pos]
+                    score += round(40 + 60 * (win - lose))
                 else:
                     score += 40  # Normal attack
             else:
@@ -91,6 +140,36 @@ class AIBot:
         scored_moves.sort(key=lambda x: x[0], reverse=True)
         return (scored_moves[0][1], scored_moves[0][2])
 
+    def _level_4_search(self, valid_moves):
+        """Level 4: Determinized tree search, reusing the subtree of the moves actually played."""
+        search = self._get_search()
+        search.think_time = self.think_time
+        move = search.best_move()
+        # The search replays the rules on its own grid; never hand back a move the engine would refuse
+        return move if move in valid_moves else random.choice(valid_moves)
+
+    def _attack_odds(self, valid_moves) -> dict:
+        """
+        Scores every attack of the position in one bulk call to the combat table.
+
+        :return: {start_pos: {end_pos: (win, lose, tie)}} for attacks on tracked enemy pieces.
+        """
+        belief = self.get_belief()
+        attacks = []
+        for start_pos, end_pos in valid_moves:
+            row = belief.row_at.get(end_pos)
+            if row is not None and self.board.get_piece_at(*end_pos):
+                attacks.append((start_pos, end_pos, row))
+        if not attacks:
+            return {}
+
+        attackers = [self.board.get_piece_at(*start_pos).rank for start_pos, _, _ in attacks]
+        odds = expected_outcomes(attackers, [belief.belief[row] for _, _, row in attacks])
+        table = {}
+        for (start_pos, end_pos, _), chances in zip(attacks, odds):
+            table.setdefault(start_pos, {})[end_pos] = chances
+        return table
+
     # ==========================================
     # LEGAL MOVE GENERATOR (SILENT ENGINE)
     # ==========================================
@@ -98,44 +177,38 @@ class AIBot:
     def _get_all_legal_moves(self):
         """Scans the board and returns all possible legal moves for the AI's team."""
         moves = []
+        check_repetition = self.logic.check_repetition
         for y in range(self.board.size):
             for x in range(self.board.size):
                 piece = self.board.get_piece_at(x, y)
                 if piece and piece.team == self.team and piece.can_move:
                     piece_moves = self._get_moves_for_piece(piece, x, y)
                     for mx, my in piece_moves:
-                        moves.append(((x, y), (mx, my)))
+                        # Moves the repetition rules would refuse are never offered
+                        if check_repetition((x, y), (mx, my)) == MoveResult.OK:
+                            moves.append(((x, y), (mx, my)))
         return moves
 
     def _get_moves_for_piece(self, piece, x, y):
-        """Calculates valid destinations for a specific piece."""
+        """Calculates valid destinations for a specific piece using the board's move tables."""
         moves = []
+        grid = self.board.grid
 
-        # Scout logic: Can move in straight lines
+        # Scout logic: Can move in straight lines (rays already stop at lakes and edges)
         if piece.rank == PieceRank.SCOUT:
-            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-            for dx, dy in directions:
-                step = 1
-                while True:
-                    nx, ny = x + (dx * step), y + (dy * step)
-                    if not self.board.is_within_bounds(nx, ny): break
-                    if self.board.cell_metadata[ny][nx] == CellType.LAKE: break
-
-                    target = self.board.get_piece_at(nx, ny)
+            for ray in self.board.rays[y][x]:
+                for nx, ny in ray:
+                    target = grid[ny][nx]
                     if target:
                         if target.team != self.team:
                             moves.append((nx, ny))  # Attack possible
                         break  # Blocked by any piece
 
                     moves.append((nx, ny))
-                    step += 1
         # All other movable pieces
         else:
-            adjacent_cells = [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]
-            for nx, ny in adjacent_cells:
-                if self.board.is_within_bounds(nx, ny):
-                    if self.board.cell_metadata[ny][nx] != CellType.LAKE:
-                        target = self.board.get_piece_at(nx, ny)
-                        if not target or target.team != self.team:
-                            moves.append((nx, ny))
-        return moves
\ No newline at end of file
+            for nx, ny in self.board.neighbors[y][x]:
+                target = grid[ny][nx]
+                if not target or target.team != self.team:
+                    moves.append((nx, ny))
+        return moves
@@ -19,10 +19,19 @@ class AutoSetup:
         self.logic.game_state = GameState.IN_PROGRESS
         print("✅ Smart Auto-setup complete! Armies are deployed strategically by AI.")
 
+    def deploy_team(self, team: Team):
+        """Deploys a single army (e.g. when the other player brought their own layout)."""
+        self._smart_setup_team(team)
+
+    @staticmethod
+    def territory(team: Team) -> list:
+        """Rows a team deploys its army in."""
+        return [6, 7, 8, 9] if team == Team.RED else [0, 1, 2, 3]
+
     def _smart_setup_team(self, team: Team):
         """Deploys a single team strategically."""
         # 1. Define territory boundaries based on the team
-        rows = [6, 7, 8, 9] if team == Team.RED else [0, 1, 2, 3]
+        rows = self.territory(team)
         back_row = 9 if team == Team.RED else 0
         forward_dir = -1 if team == Team.RED else 1
 
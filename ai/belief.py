@@ -0,0 +1,205 @@
+from utils.config import ARMY_COMPOSITION
+from utils.constants import Team, PieceRank
+from engine.combat import RANKS, RANK_INDEX, OUTCOME_TABLE, OUTCOME_NAMES
+
+
+# Rank columns of the belief matrix are the combat table's ranks (ARMY_COMPOSITION order)
+
+ALL_RANKS_MASK = (1 << len(RANKS)) - 1
+MOVABLE_MASK = ALL_RANKS_MASK & ~(1 << RANK_INDEX[PieceRank.BOMB]) & ~(1 << RANK_INDEX[PieceRank.FLAG])
+SCOUT_MASK = 1 << RANK_INDEX[PieceRank.SCOUT]
+MOVABLE_RANKS = [rank for i, rank in enumerate(RANKS) if MOVABLE_MASK >> i & 1]
+
+
+def _outcome_masks(our_rank_attacks: bool) -> dict:
+    """
+    Reads the combat table once into rank masks of the hidden piece:
+    {(our rank index, outcome name): mask of enemy ranks that produce that outcome}.
+    """
+    masks = {}
+    for own in range(len(RANKS)):
+        for k in range(len(RANKS)):
+            code = OUTCOME_TABLE[own][k] if our_rank_attacks else OUTCOME_TABLE[k][own]
+            if not our_rank_attacks and not MOVABLE_MASK >> k & 1:
+                continue  # Bombs and Flags never attack
+            key = (own, OUTCOME_NAMES[code])
+            masks[key] = masks.get(key, 0) | 1 << k
+    return masks
+
+
+# Enemy ranks consistent with a battle outcome, when we attacked / when we were attacked
+DEFENDER_MASKS = _outcome_masks(our_rank_attacks=True)
+ATTACKER_MASKS = _outcome_masks(our_rank_attacks=False)
+
+# Sinkhorn normalization settings
+NORMALIZE_ITERATIONS = 50
+NORMALIZE_TOLERANCE = 1e-4
+
+
+class BeliefTracker:
+    """
+    Tracks what one team knows about the hidden ranks of the enemy army.
+
+    Keeps a (enemy piece x rank) probability matrix. Rows cover every enemy piece
+    seen at creation, including ones captured later, so the column totals always
+    match ARMY_COMPOSITION. Each row also carries a bitmask of the ranks that are
+    still possible, which only ever shrinks as observations arrive.
+    """
+
+    def __init__(self, team: Team, logic):
+        """
+        :param team: The team doing the observing.
+        :param logic: The GameLogic whose move_history feeds the tracker.
+        """
+        self.team = team
+        self.enemy = Team.BLUE if team == Team.RED else Team.RED
+        self.logic = logic
+        self.board = logic.board
+
+        # Row bookkeeping: current square of each row (None once captured) and the reverse map
+        self.square_of = []
+        self.row_at = {}
+        for y in range(self.board.size):
+            for x in range(self.board.size):
+                piece = self.board.grid[y][x]
+                if piece and piece.team == self.enemy:
+                    self.row_at[(x, y)] = len(self.square_of)
+                    self.square_of.append((x, y))
+
+        self.allowed = [ALL_RANKS_MASK] * len(self.square_of)
+
+        # Column targets scaled to the number of rows, in case the army is not complete
+        army_size = sum(ARMY_COMPOSITION.values())
+        scale = len(self.square_of) / army_size if army_size else 0
+        self.totals = [ARMY_COMPOSITION[rank.name] * scale for rank in RANKS]
+
+        # Uniform prior: every row starts as the army's rank distribution
+        prior = [count / army_size for count in ARMY_COMPOSITION.values()]
+        self.belief = [list(prior) for _ in self.square_of]
+
+        self._seen = len(logic.move_history)
+
+    # ==========================================
+    # QUERIES
+    # ==========================================
+
+    def probabilities(self, square: tuple) -> dict:
+        """Returns {PieceRank: probability} for the enemy piece on square (empty if none is tracked)."""
+        self.update()
+        row = self.row_at.get(square)
+        if row is None:
+            return {}
+        return {rank: p for rank, p in zip(RANKS, self.belief[row]) if p > 0}
+
+    def probability(self, square: tuple, rank: PieceRank) -> float:
+        """Returns the probability that the enemy piece on square has the given rank."""
+        self.update()
+        row = self.row_at.get(square)
+        if row is None:
+            return 0.0
+        return self.belief[row][RANK_INDEX[rank]]
+
+    def possible_ranks(self, square: tuple) -> list:
+        """Returns the ranks the enemy piece on square can still have."""
+        row = self.row_at.get(square)
+        if row is None:
+            return []
+        return [rank for i, rank in enumerate(RANKS) if self.allowed[row] >> i & 1]
+
+    # ==========================================
+    # UPDATES
+    # ==========================================
+
+    def update(self) -> bool:
+        """
+        Consumes new reports from the game's move history.
+
+        :return: True if the belief matrix changed.
+        """
+        history = self.logic.move_history
+        if self._seen >= len(history):
+            return False
+
+        for report in history[self._seen:]:
+            self._observe(report)
+        self._seen = len(history)
+        self._normalize()
+        return True
+
+    def _observe(self, report):
+        """Applies a single move report to the row masks."""
+        start, end = report["start"], report["end"]
+        enemy_moved = report["attacker_team"] == self.enemy.name
+
+        if enemy_moved:
+            row = self.row_at.pop(start, None)
+            if row is None:
+                return
+            # A piece that moves cannot be a Bomb or Flag; a long move means a Scout
+            distance = abs(end[0] - start[0]) + abs(end[1] - start[1])
+            self._restrict(row, SCOUT_MASK if distance > 1 else MOVABLE_MASK)
+        else:
+            row = self.row_at.get(end)
+
+        if not report["battle"]:
+            if enemy_moved:
+                self._relocate(row, end)
+            return
+
+        outcome = report["outcome"]
+        if enemy_moved:
+            # The enemy attacked one of our pieces, whose rank we know
+            own_rank = PieceRank[report["defender_rank"]]
+            self._restrict(row, ATTACKER_MASKS.get((RANK_INDEX[own_rank], outcome), 0))
+            self._relocate(row, end if outcome == "ATTACKER" else None)
+        elif row is not None:
+            # We attacked a hidden enemy piece
+            own_rank = PieceRank[report["attacker_rank"]]
+            self._restrict(row, DEFENDER_MASKS.get((RANK_INDEX[own_rank], outcome), 0))
+            if outcome != "DEFENDER":
+                self._relocate(row, None)
+
+    def _relocate(self, row, square):
+        """Moves a row to a new square, or marks it captured when square is None."""
+        if self.square_of[row] is not None and self.row_at.get(self.square_of[row]) == row:
+            del self.row_at[self.square_of[row]]
+        self.square_of[row] = square
+        if square is not None:
+            self.row_at[square] = row
+
+    def _restrict(self, row, mask):
+        """Intersects a row's allowed ranks with mask and zeroes the excluded columns."""
+        new_mask = self.allowed[row] & mask
+        if not new_mask:
+            return  # Contradiction (e.g. tracker created mid-game); keep what we had
+        self.allowed[row] = new_mask
+        self.belief[row] = [p if new_mask >> i & 1 else 0.0 for i, p in enumerate(self.belief[row])]
+
+    def _normalize(self):
+        """
+        Sinkhorn balancing: alternately scales rows to sum to 1 and columns to the
+        army totals, so the matrix respects both the masks and ARMY_COMPOSITION.
+        Excluded cells stay at zero because scaling never revives them.
+        """
+        belief = self.belief
+        # Rows whose mask changed may have lost all mass; restart them uniformly over the mask
+        for row, values in enumerate(belief):
+            if not any(values):
+                mask = self.allowed[row]
+                belief[row] = [1.0 if mask >> i & 1 else 0.0 for i in range(len(RANKS))]
+
+        for _ in range(NORMALIZE_ITERATIONS):
+            col_sums = [sum(column) for column in zip(*belief)]
+            factors = [target / total if total else 0.0 for target, total in zip(self.totals, col_sums)]
+            belief = [[p * f for p, f in zip(values, factors)] for values in belief]
+
+            drift = 0.0
+            for row, values in enumerate(belief):
+                total = sum(values)
+                if total:
+                    drift = max(drift, abs(total - 1.0))
+                    belief[row] = [p / total for p in values]
+            if drift < NORMALIZE_TOLERANCE:
+                break
+
+        self.belief = belief
@@ -0,0 +1,234 @@
+import random
+from utils.config import ARMY_COMPOSITION
+from ai.belief import RANKS
+
+
+# Smallest weight given to a rank that is still allowed, so the chain never gets stuck on a zero
+MIN_WEIGHT = 1e-6
+
+
+class Determinizer:
+    """
+    Samples complete enemy layouts that agree with everything a team has observed.
+
+    Constraints come from a BeliefTracker: each enemy piece (captured ones included)
+    has a bitmask of possible ranks, and the whole army must match ARMY_COMPOSITION.
+    One feasible assignment is built by weighted augmenting-path matching; further
+    samples come from a Markov chain of rank swaps between two pieces, which keeps
+    the army totals intact by construction. Samples are generated in batches and
+    cached; when new moves tighten the masks, cached samples are repaired in place
+    instead of being thrown away.
+    """
+
+    def __init__(self, tracker, batch_size: int = 256, swaps_per_sample: int = 8, seed=None):
+        """
+        :param tracker: The BeliefTracker providing rank masks and weights.
+        :param batch_size: Number of samples generated per refill.
+        :param swaps_per_sample: Swap proposals between two consecutive samples.
+        :param seed: Optional seed for reproducible sampling.
+        """
+        self.tracker = tracker
+        self.batch_size = batch_size
+        self.swaps_per_sample = swaps_per_sample
+        self.rng = random.Random(seed)
+
+        self.capacity = self._rank_capacity(len(tracker.allowed))
+        self.masks = []
+        self.free_rows = []
+        self.weights = []
+        self._source_masks = None
+
+        self.state = None
+        self.batch = []
+
+    # ==========================================
+    # PUBLIC API
+    # ==========================================
+
+    def sample(self) -> dict:
+        """Returns one layout as {square: PieceRank} for the enemy pieces still on the board."""
+        ranks = self.sample_ranks()
+        square_of = self.tracker.square_of
+        return {square_of[row]: RANKS[k] for row, k in enumerate(ranks) if square_of[row] is not None}
+
+    def sample_ranks(self) -> tuple:
+        """Returns one layout as a tuple of rank indices, one per tracker row."""
+        self.sync()
+        if not self.batch:
+            self._refill()
+        return self.batch.pop()
+
+    def sync(self):
+        """Pulls new observations from the tracker and repairs cached samples if the constraints changed."""
+        self.tracker.update()
+        allowed = self.tracker.allowed
+        if self._source_masks == allowed:
+            return
+
+        old_masks = self.masks
+        self._source_masks = list(allowed)
+        self.masks = self._propagate(self._source_masks)
+        self.free_rows = [row for row, mask in enumerate(self.masks) if mask & (mask - 1)]
+        self.weights = [
+            [max(p, MIN_WEIGHT) if mask >> k & 1 else 0.0 for k, p in enumerate(values)]
+            for values, mask in zip(self.tracker.belief, self.masks)
+        ]
+
+        if self.state is None or len(old_masks) != len(self.masks):
+            self.state = self._initial_assignment()
+            self.batch = []
+            return
+
+        # Only rows whose mask changed can have become invalid
+        changed = [row for row, (old, new) in enumerate(zip(old_masks, self.masks)) if old != new]
+        self.state = self._repair(list(self.state), changed)
+        self.batch = [tuple(self._repair(list(sample), changed)) for sample in self.batch]
+
+    # ==========================================
+    # CONSTRAINTS
+    # ==========================================
+
+    def _rank_capacity(self, rows) -> list:
+        """Integer count per rank; scaled with largest remainders if the army is incomplete."""
+        counts = [ARMY_COMPOSITION[rank.name] for rank in RANKS]
+        army_size = sum(counts)
+        if rows == army_size or not army_size:
+            return counts
+
+        exact = [count * rows / army_size for count in counts]
+        capacity = [int(value) for value in exact]
+        by_remainder = sorted(range(len(counts)), key=lambda k: exact[k] - capacity[k], reverse=True)
+        for k in by_remainder[:rows - sum(capacity)]:
+            capacity[k] += 1
+        return capacity
+
+    def _propagate(self, masks) -> list:
+        """
+        Tightens masks until nothing changes:
+        - a rank whose slots are all taken by pieces fixed to it is removed from every other piece
+        - a rank that exactly as many pieces can still have as it has slots is forced on those pieces
+        """
+        masks = list(masks)
+        changed = True
+        while changed:
+            changed = False
+            for k in range(len(RANKS)):
+                bit = 1 << k
+                fixed = [row for row, mask in enumerate(masks) if mask == bit]
+                candidates = [row for row, mask in enumerate(masks) if mask & bit]
+
+                if len(fixed) >= self.capacity[k] and len(candidates) > len(fixed):
+                    for row in candidates:
+                        if masks[row] != bit and masks[row] & ~bit:
+                            masks[row] &= ~bit
+                            changed = True
+                elif len(candidates) == self.capacity[k] and len(fixed) < len(candidates):
+                    for row in candidates:
+                        masks[row] = bit
+                    changed = True
+        return masks
+
+    # ==========================================
+    # MATCHING
+    # ==========================================
+
+    def _initial_assignment(self) -> list:
+        """Builds one feasible assignment, visiting ranks in a weighted random order per piece."""
+        assignment = [None] * len(self.masks)
+        holders = [[] for _ in RANKS]
+
+        # Most constrained pieces first keeps augmenting paths short
+        order = sorted(range(len(self.masks)), key=lambda row: bin(self.masks[row]).count("1"))
+        for row in order:
+            if not self._augment(row, assignment, holders, set()):
+                # Observations contradict the army (e.g. tracker built mid-game): ignore this piece's mask
+                self._place(row, self._least_used(holders), assignment, holders)
+        return assignment
+
+    def _augment(self, row, assignment, holders, visited) -> bool:
+        """Finds a rank for row, bumping other pieces along an augmenting path if needed."""
+        for k in self._weighted_ranks(row):
+            if k in visited:
+                continue
+            visited.add(k)
+            if len(holders[k]) < self.capacity[k]:
+                self._place(row, k, assignment, holders)
+                return True
+            for other in list(holders[k]):
+                holders[k].remove(other)
+                assignment[other] = None
+                if self._augment(other, assignment, holders, visited):
+                    self._place(row, k, assignment, holders)
+                    return True
+                self._place(other, k, assignment, holders)
+        return False
+
+    def _weighted_ranks(self, row) -> list:
+        """Allowed ranks of row in random order, biased towards higher belief (Efraimidis-Spirakis keys)."""
+        rng = self.rng
+        weights = self.weights[row]
+        keyed = [(rng.random() ** (1.0 / w), k) for k, w in enumerate(weights) if w > 0]
+        keyed.sort(reverse=True)
+        return [k for _, k in keyed]
+
+    @staticmethod
+    def _place(row, k, assignment, holders):
+        assignment[row] = k
+        holders[k].append(row)
+
+    def _least_used(self, holders) -> int:
+        return max(range(len(RANKS)), key=lambda k: self.capacity[k] - len(holders[k]))
+
+    def _repair(self, assignment, changed) -> list:
+        """Fixes pieces whose current rank became illegal, preferring a single swap."""
+        masks = self.masks
+        for row in changed:
+            k = assignment[row]
+            if masks[row] >> k & 1:
+                continue
+
+            partners = [other for other in range(len(assignment))
+                        if masks[row] >> assignment[other] & 1 and masks[other] >> k & 1]
+            if partners:
+                other = self.rng.choice(partners)
+                assignment[row], assignment[other] = assignment[other], k
+                continue
+
+            # No single swap works; rebuild holders and augment this piece from scratch
+            holders = [[] for _ in RANKS]
+            for other, rank in enumerate(assignment):
+                if other != row:
+                    holders[rank].append(other)
+            assignment[row] = None
+            if not self._augment(row, assignment, holders, set()):
+                return self._initial_assignment()
+        return assignment
+
+    # ==========================================
+    # SAMPLING
+    # ==========================================
+
+    def _refill(self):
+        """Runs the swap chain forward and stores batch_size samples."""
+        rng = self.rng
+        state = self.state
+        masks = self.masks
+        weights = self.weights
+        free_rows = self.free_rows
+        batch = []
+
+        for _ in range(self.batch_size):
+            if len(free_rows) > 1:
+                for _ in range(self.swaps_per_sample):
+                    i, j = rng.sample(free_rows, 2)
+                    ki, kj = state[i], state[j]
+                    if ki == kj or not (masks[i] >> kj & 1 and masks[j] >> ki & 1):
+                        continue
+                    # Metropolis acceptance keeps the chain proportional to the belief weights
+                    current = weights[i][ki] * weights[j][kj]
+                    proposed = weights[i][kj] * weights[j][ki]
+                    if proposed >= current or rng.random() * current < proposed:
+                        state[i], state[j] = kj, ki
+            batch.append(tuple(state))
+
+        self.batch = batch
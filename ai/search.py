@@ -0,0 +1,346 @@
+import math
+import random
+import threading
+import time
+
+from engine.combat import OUTCOMES, ATTACKER_WINS, BOTH_DIE, FLAG_CAPTURED
+from ai.belief import BeliefTracker
+from ai.determinizer import Determinizer
+from utils.config import SEARCH_THINK_TIME, SEARCH_ROLLOUT_DEPTH, SEARCH_EXPLORATION, SEARCH_DETERMINIZATIONS
+from utils.constants import GameState, MoveResult, PieceRank, Team
+
+
+"""Material value of each rank, used to score positions where a rollout stops."""
+PIECE_VALUES = {
+    PieceRank.MARSHAL: 400,
+    PieceRank.GENERAL: 200,
+    PieceRank.COLONEL: 100,
+    PieceRank.MAJOR: 75,
+    PieceRank.CAPTAIN: 50,
+    PieceRank.LIEUTENANT: 25,
+    PieceRank.SERGEANT: 15,
+    PieceRank.MINER: 25,
+    PieceRank.SCOUT: 10,
+    PieceRank.SPY: 100,
+    PieceRank.BOMB: 20,
+    PieceRank.FLAG: 0,
+}
+"""Material lead (in PIECE_VALUES points) that counts as a 73% winning chance."""
+MATERIAL_SCALE = 200
+
+STATIC_RANKS = (PieceRank.BOMB, PieceRank.FLAG)
+
+
+class Node:
+    """One move in the search tree, with the statistics of the team that played it."""
+
+    __slots__ = ("move", "team", "children", "visits", "reward", "available")
+
+    def __init__(self, move=None, team: Team = None):
+        self.move = move
+        self.team = team
+        self.children = {}   # move -> Node
+        self.visits = 0
+        self.reward = 0.0    # Summed results from `team`'s point of view
+        self.available = 0   # Iterations in which this move was legal (ISMCTS selection)
+
+
+class PonderingSearch:
+    """
+    Determinized Monte Carlo tree search that keeps thinking on the opponent's time.
+
+    Enemy ranks are hidden, so every iteration plays out one layout drawn from the
+    Determinizer (single-observer ISMCTS): the tree is keyed by moves only and a child
+    counts as available in the iterations where it is legal.
+
+    ponder() runs the search in a background thread on a private snapshot of the current
+    position. Once moves have been played, the root follows them down the tree, so the
+    subtree of the move that actually happened is kept (with everything pondered under
+    it) and its siblings are dropped. best_move() stops the thread and tops the search up
+    to the think time on the calling thread.
+    """
+
+    def __init__(self, team: Team, logic, think_time: float = SEARCH_THINK_TIME, rollout_depth: int = SEARCH_ROLLOUT_DEPTH,
+                 exploration: float = SEARCH_EXPLORATION, determinizations: int = SEARCH_DETERMINIZATIONS, seed=None,
+                 iterations: int = None):
+        """
+        :param team: The team the search plays for.
+        :param logic: The live GameLogic; only read, and only from the caller's thread.
+        :param think_time: Seconds best_move() searches the current position, pondering included.
+        :param rollout_depth: Random plies played below a new leaf before scoring material.
+        :param exploration: UCB exploration constant.
+        :param determinizations: Enemy layouts sampled per position and cycled through.
+        :param seed: Optional seed for the search's random choices.
+        :param iterations: Search exactly this many iterations per move instead of think_time seconds.
+                           A time limit makes the result depend on the machine and its load; a seeded
+                           search with an iteration budget and no pondering always picks the same move.
+        """
+        self.team = team
+        self.enemy = Team.BLUE if team == Team.RED else Team.RED
+        self.logic = logic
+        self.board = logic.board
+        self.think_time = think_time
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.determinizations = determinizations
+        self.iterations = iterations
+        self.rng = random.Random(seed)
+
+        # Created on first use, once the armies are on the board
+        self.determinizer = None
+
+        self.root = Node()
+        self.root_ply = None        # len(move_history) the root stands for
+        self.to_move = None
+        self.positions = []         # One determinized grid of (team, rank) cells per sampled layout
+        self.searched = 0.0         # Seconds spent on the current root, pondering included
+
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {}
+
+    # ==========================================
+    # PUBLIC API
+    # ==========================================
+
+    @property
+    def pondering(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def ponder(self):
+        """
+        Keeps searching the current position in the background, whoever is to move.
+        Cheap to call every frame: it only restarts the thread once new moves were played.
+        """
+        if self.logic.game_state != GameState.IN_PROGRESS:
+            self.stop()
+            return
+        if self.pondering and self.root_ply == len(self.logic.move_history):
+            return
+
+        self.stop()
+        self._sync()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._ponder, name=f"ponder-{self.team.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops pondering; returns once the background iteration in flight has finished."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def best_move(self):
+        """
+        Searches until the current position has had think_time seconds in total.
+
+        :return: (start_pos, end_pos) of the most visited move the repetition rules allow, or None.
+        """
+        self.stop()
+        self._sync()
+        if not self._legal_moves(self.positions[0], self.team):
+            return None
+
+        pondered = self.root.visits
+        started = time.perf_counter()
+        if self.iterations:
+            for _ in range(self.iterations):
+                self._iterate()
+        else:
+            deadline = started + max(0.0, self.think_time - self.searched)
+            # Always expand the root at least once, however long the pondering took
+            while time.perf_counter() < deadline or not self.root.children:
+                self._iterate()
+        self.searched += time.perf_counter() - started
+
+        # The search grids know nothing of the repetition rules, so refused moves are skipped here
+        allowed = [child for child in self.root.children.values()
+                   if self.logic.check_repetition(*child.move) == MoveResult.OK]
+        self.stats = {"visits": self.root.visits, "pondered": pondered, "reused": self.stats.get("reused", 0)}
+        if not allowed:
+            return None
+        return max(allowed, key=lambda child: child.visits).move
+
+    # ==========================================
+    # TREE AND POSITION SYNC
+    # ==========================================
+
+    def _sync(self):
+        """Moves the root down the tree along the moves played since, then re-snapshots the position."""
+        history = self.logic.move_history
+        if self.root_ply == len(history):
+            return
+
+        if self.root_ply is not None and self.root_ply < len(history):
+            for report in history[self.root_ply:]:
+                child = self.root.children.get((tuple(report["start"]), tuple(report["end"])))
+                if child is None:
+                    self.root = Node()  # A move the search never tried: start over
+                    break
+                self.root = child
+        else:
+            self.root = Node()
+        self.root_ply = len(history)
+        self.to_move = self.logic.current_turn
+        self.searched = 0.0
+        self.stats = {"reused": self.root.visits}
+
+        if self.determinizer is None:
+            self.determinizer = Determinizer(BeliefTracker(self.team, self.logic), seed=self.rng.random())
+        self.positions = [self._determinize(self.determinizer.sample()) for _ in range(self.determinizations)]
+
+    def _determinize(self, layout: dict) -> list:
+        """Grid of (team, rank) cells with our own ranks and the enemy ranks taken from layout."""
+        grid = []
+        for y, row in enumerate(self.board.grid):
+            cells = []
+            for x, piece in enumerate(row):
+                if piece is None:
+                    cells.append(None)
+                elif piece.team == self.team:
+                    cells.append((piece.team, piece.rank))
+                else:
+                    # A piece the tracker lost track of (e.g. created mid-game) plays as an average soldier
+                    cells.append((piece.team, layout.get((x, y), PieceRank.SERGEANT)))
+            grid.append(cells)
+        return grid
+
+    # ==========================================
+    # SEARCH
+    # ==========================================
+
+    def _ponder(self):
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            self._iterate()
+        self.searched += time.perf_counter() - started
+
+    def _iterate(self):
+        """One ISMCTS iteration: determinize, select, expand, roll out and back up."""
+        rng = self.rng
+        position = self.positions[self.root.visits % len(self.positions)]
+        grid = [row[:] for row in position]
+        team = self.to_move
+        node = self.root
+        path = []
+        winner = None
+
+        # 1. Selection: descend through fully expanded nodes by UCB over the moves legal here
+        while True:
+            moves = self._legal_moves(grid, team)
+            if not moves:
+                winner = self._other(team)
+                break
+
+            untried = [move for move in moves if move not in node.children]
+            for move in moves:
+                child = node.children.get(move)
+                if child:
+                    child.available += 1
+
+            # 2. Expansion: add one untried move and leave the tree
+            if untried:
+                move = rng.choice(untried)
+                child = node.children[move] = Node(move, team)
+                child.available = 1
+                path.append(child)
+                winner = self._play(grid, move)
+                team = self._other(team)
+                break
+
+            node = max((node.children[move] for move in moves), key=self._ucb)
+            path.append(node)
+            winner = self._play(grid, node.move)
+            team = self._other(team)
+            if winner:
+                break
+
+        # 3. Rollout: random plies, then score the material
+        if winner is None:
+            for _ in range(self.rollout_depth):
+                moves = self._legal_moves(grid, team)
+                if not moves:
+                    winner = self._other(team)
+                    break
+                winner = self._play(grid, rng.choice(moves))
+                if winner:
+                    break
+                team = self._other(team)
+
+        if winner is None:
+            result = self._evaluate(grid)
+        else:
+            result = 1.0 if winner == self.team else 0.0
+
+        # 4. Backpropagation, each node scored for the team that made its move
+        self.root.visits += 1
+        for child in path:
+            child.visits += 1
+            child.reward += result if child.team == self.team else 1.0 - result
+
+    def _ucb(self, child: Node) -> float:
+        return child.reward / child.visits + self.exploration * math.sqrt(math.log(child.available) / child.visits)
+
+    def _other(self, team: Team) -> Team:
+        return self.enemy if team == self.team else self.team
+
+    def _legal_moves(self, grid: list, team: Team) -> list:
+        """Same rules as AIBot's move generator, on a grid of (team, rank) cells."""
+        neighbors = self.board.neighbors
+        rays = self.board.rays
+        moves = []
+        for y, row in enumerate(grid):
+            for x, cell in enumerate(row):
+                if cell is None or cell[0] != team or cell[1] in STATIC_RANKS:
+                    continue
+                if cell[1] == PieceRank.SCOUT:
+                    for ray in rays[y][x]:
+                        for nx, ny in ray:
+                            target = grid[ny][nx]
+                            if target:
+                                if target[0] != team:
+                                    moves.append(((x, y), (nx, ny)))
+                                break
+                            moves.append(((x, y), (nx, ny)))
+                else:
+                    for nx, ny in neighbors[y][x]:
+                        target = grid[ny][nx]
+                        if not target or target[0] != team:
+                            moves.append(((x, y), (nx, ny)))
+        return moves
+
+    @staticmethod
+    def _play(grid: list, move: tuple):
+        """
+        Plays a move on a search grid.
+
+        :return: The winning team if it captured the Flag, otherwise None.
+        """
+        (sx, sy), (ex, ey) = move
+        attacker = grid[sy][sx]
+        defender = grid[ey][ex]
+        grid[sy][sx] = None
+
+        if defender is None:
+            grid[ey][ex] = attacker
+            return None
+
+        outcome = OUTCOMES[(attacker[1], defender[1])]
+        if outcome == ATTACKER_WINS:
+            grid[ey][ex] = attacker
+        elif outcome == BOTH_DIE:
+            grid[ey][ex] = None
+        elif outcome == FLAG_CAPTURED:
+            grid[ey][ex] = attacker
+            return attacker[0]
+        return None
+
+    def _evaluate(self, grid: list) -> float:
+        """Winning chance estimated from the material balance, from our team's point of view."""
+        balance = 0
+        for row in grid:
+            for cell in row:
+                if cell:
+                    balance += PIECE_VALUES[cell[1]] if cell[0] == self.team else -PIECE_VALUES[cell[1]]
+        return 1.0 / (1.0 + math.exp(-balance / MATERIAL_SCALE))
@@ -0,0 +1,318 @@
+import argparse
+import heapq
+import itertools
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+
+from engine.board import Board
+from engine.game_logic import GameLogic
+from engine.piece import Piece
+from ai.ai_bot import AIBot
+from ai.auto_setup import AutoSetup
+from utils.config import AI_SERVICE_WORKERS, AI_BATCH_SIZE, AI_BATCH_WINDOW, AI_MOVE_DEADLINE
+from utils.constants import GameState, PieceRank, Team
+
+
+class DeadlineExceeded(Exception):
+    """The AI service could not answer a move request in time."""
+
+
+"""Rank and team order of the packed snapshot codes."""
+RANKS = tuple(PieceRank)
+TEAMS = (Team.RED, Team.BLUE)
+_RANK_CODE = {rank: index for index, rank in enumerate(RANKS)}
+_TEAM_CODE = {team: index for index, team in enumerate(TEAMS)}
+
+
+def snapshot(logic, team: Team) -> tuple:
+    """
+    Picklable copy of what `team`'s bot may know: every piece with enemy ranks hidden
+    unless revealed in battle.
+
+    :return: Tuple of packed ints, square << 8 | rank code << 1 | team code, with
+             square = y * size + x. Ints pickle far smaller and faster than names.
+    """
+    size = logic.board.size
+    unknown = _RANK_CODE[PieceRank.UNKNOWN]
+    pieces = []
+    for y, row in enumerate(logic.board.grid):
+        for x, piece in enumerate(row):
+            if piece:
+                rank = unknown if piece.team != team and not piece.is_revealed else _RANK_CODE[piece.rank]
+                pieces.append((y * size + x) << 8 | rank << 1 | _TEAM_CODE[piece.team])
+    return tuple(pieces)
+
+
+# ==========================================
+# WORKER SIDE
+# ==========================================
+
+_scratch = None
+_flyweights = {}   # rank code << 1 | team code -> Piece shared by every square holding one
+
+
+def _piece(code: int) -> Piece:
+    # The bot only reads rank, team and can_move, so one Piece per kind is enough
+    piece = _flyweights.get(code)
+    if piece is None:
+        piece = _flyweights[code] = Piece(RANKS[code >> 1], TEAMS[code & 1])
+    return piece
+
+
+def think_batch(requests: list) -> list:
+    """
+    Runs in a pool worker: answers a batch of move requests of the same AI level.
+
+    One scratch Board/GameLogic per worker process is refilled for every request with
+    shared read-only pieces, so a batch costs one round trip and no allocations beyond
+    the grid. Requests whose deadline has already passed are skipped.
+
+    :param requests: [(request id, snapshot, team name, level, deadline)]
+    :return: [(request id, move or None, think seconds, expired)]
+    """
+    global _scratch
+    if _scratch is None:
+        board = Board()
+        _scratch = (board, GameLogic(board))
+    board, logic = _scratch
+
+    results = []
+    for request_id, pieces, team_name, level, deadline in requests:
+        if time.time() > deadline:
+            results.append((request_id, None, 0.0, True))
+            continue
+
+        started = time.perf_counter()
+        size = board.size
+        grid = [[None] * size for _ in range(size)]
+        for code in pieces:
+            square = code >> 8
+            grid[square // size][square % size] = _piece(code & 0xFF)
+        board.load_grid(grid)
+        team = Team[team_name]
+        logic.current_turn = team
+        move = AIBot(team, logic, level=level).get_move()
+        results.append((request_id, move, time.perf_counter() - started, False))
+    return results
+
+
+# ==========================================
+# SERVICE
+# ==========================================
+
+class AIService:
+    """
+    Shared AI for every game in the process: a request queue in front of a process pool.
+
+    submit() returns a Future at once. A dispatcher thread gathers requests for up to
+    `batch_window` seconds (or `batch_size` of them), groups them by AI level and hands
+    each group to a worker as one task, which amortises the inter-process round trip over
+    many games. Every request carries a deadline: it fails with DeadlineExceeded when the
+    deadline passes first, and workers skip requests that expired while queued. Bot
+    capacity is sized with `workers`, independently of how many games the server hosts.
+    """
+
+    def __init__(self, workers: int = None, batch_size: int = AI_BATCH_SIZE,
+                 batch_window: float = AI_BATCH_WINDOW, observer=None):
+        """
+        :param workers: Worker processes (default: one per core).
+        :param observer: Optional observer(level, seconds) called for every answered request
+                         (e.g. to feed a think-time histogram).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.observer = observer
+
+        self.requests = queue.Queue()
+        # Spawned, not forked: the service runs next to the dispatcher thread and often an event loop
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        # Keep every worker busy with one batch and have the next one ready
+        self._slots = threading.Semaphore(2 * self.workers)
+        self._ids = itertools.count()
+        self._futures = {}      # request id -> (Future, level)
+        self._deadlines = []    # heap of (deadline, request id)
+        self._lock = threading.Lock()
+        self._running = True
+
+        self.answered = 0
+        self.expired = 0
+        self.batches = 0
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="ai-service", daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def pending(self) -> int:
+        """Requests submitted but not answered yet."""
+        return len(self._futures)
+
+    def submit(self, logic, team: Team, level: int = 2, deadline: float = AI_MOVE_DEADLINE) -> Future:
+        """
+        Asks for `team`'s next move in the current position of `logic`.
+
+        :param deadline: Seconds the service has to answer.
+        :return: Future resolving to (start_pos, end_pos), None when there is no legal
+                 move, or raising DeadlineExceeded.
+        """
+        future = Future()
+        request_id = next(self._ids)
+        expires_at = time.time() + deadline
+        with self._lock:
+            self._futures[request_id] = (future, level)
+            heapq.heappush(self._deadlines, (expires_at, request_id))
+        self.requests.put((request_id, snapshot(logic, team), team.name, level, expires_at))
+        return future
+
+    def close(self):
+        self._running = False
+        self.requests.put(None)
+        self._dispatcher.join()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    # ==========================================
+    # DISPATCHER
+    # ==========================================
+
+    def _dispatch(self):
+        while self._running:
+            batch = self._collect()
+            self._expire()
+            if not batch:
+                continue
+
+            by_level = {}
+            for request in batch:
+                by_level.setdefault(request[3], []).append(request)
+            for requests in by_level.values():
+                # Deadlines keep firing while every worker slot is busy
+                while not self._slots.acquire(timeout=self.batch_window):
+                    self._expire()
+                self.batches += 1
+                task = self.pool.submit(think_batch, requests)
+                task.add_done_callback(self._on_batch_done)
+
+    def _collect(self) -> list:
+        """Waits for the first request, then gathers companions for up to batch_window seconds."""
+        try:
+            first = self.requests.get(timeout=self.batch_window)
+        except queue.Empty:
+            return []
+        if first is None:
+            return []
+
+        batch = [first]
+        closes_at = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = closes_at - time.monotonic()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                break
+            batch.append(request)
+        return batch
+
+    def _expire(self):
+        """Fails every request whose deadline has passed."""
+        now = time.time()
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, request_id = heapq.heappop(self._deadlines)
+                entry = self._futures.pop(request_id, None)
+                if entry:
+                    self.expired += 1
+                    self._resolve(entry[0], exception=DeadlineExceeded(f"AI request {request_id} missed its deadline"))
+
+    def _on_batch_done(self, task):
+        self._slots.release()
+        try:
+            results = task.result()
+        except Exception as error:
+            results = []
+            print(f"❌ AI worker failed: {error}")
+        for request_id, move, seconds, expired in results:
+            with self._lock:
+                entry = self._futures.pop(request_id, None)
+            if entry is None:
+                continue  # Already failed by its deadline
+            future, level = entry
+            if expired:
+                self.expired += 1
+                self._resolve(future, exception=DeadlineExceeded(f"AI request {request_id} missed its deadline"))
+                continue
+            self.answered += 1
+            if self.observer:
+                self.observer(level, seconds)
+            self._resolve(future, result=move)
+
+    @staticmethod
+    def _resolve(future: Future, result=None, exception=None):
+        try:
+            if exception:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass  # Cancelled by the caller
+
+
+def benchmark(requests: int = 2000, level: int = 2, workers: int = None, seed: int = 0) -> dict:
+    """
+    Compares answering `requests` positions inline (one AIBot per request) with the service.
+
+    :return: Dict with requests/sec for both and the number of batches used.
+    """
+    random.seed(seed)
+    positions = []
+    for _ in range(20):
+        board = Board()
+        logic = GameLogic(board)
+        AutoSetup(logic).deploy_team(Team.RED)
+        AutoSetup(logic).deploy_team(Team.BLUE)
+        logic.game_state = GameState.IN_PROGRESS
+        positions.append(logic)
+
+    started = time.perf_counter()
+    for index in range(requests):
+        AIBot(Team.RED, positions[index % len(positions)], level=level).get_move()
+    inline = time.perf_counter() - started
+
+    service = AIService(workers)
+    # Let the workers spawn and import the engine before timing
+    service.submit(positions[0], Team.RED, level, deadline=60).result()
+    started = time.perf_counter()
+    futures = [service.submit(positions[index % len(positions)], Team.RED, level, deadline=60)
+               for index in range(requests)]
+    for future in futures:
+        future.result()
+    pooled = time.perf_counter() - started
+    service.close()
+
+    return {
+        "requests": requests,
+        "level": level,
+        "workers": service.workers,
+        "inline_per_sec": round(requests / inline),
+        "service_per_sec": round(requests / pooled),
+        "batches": service.batches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared AI service.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--level", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=AI_SERVICE_WORKERS or None)
+    args = parser.parse_args()
+    print(benchmark(args.requests, args.level, args.workers))
+
+
+if __name__ == "__main__":
+    main()
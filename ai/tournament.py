@@ -0,0 +1,276 @@
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from engine.board import Board
+from engine.game_logic import GameLogic
+from ai.auto_setup import AutoSetup
+from ai.ai_bot import AIBot
+from utils.constants import Team, GameState
+
+
+# Games longer than this are scored as a draw (bots can shuffle forever)
+DEFAULT_MAX_PLIES = 1000
+# Search iterations per move of level-4 bots (about SEARCH_THINK_TIME on one core). A think
+# time would make every game depend on machine load, so replaying a seed would not repeat it
+DEFAULT_SEARCH_ITERATIONS = 1000
+
+
+class BotConfig:
+    """A named bot setup that can take part in a tournament."""
+
+    def __init__(self, name: str, level: int, search_iterations: int = DEFAULT_SEARCH_ITERATIONS):
+        """
+        :param search_iterations: Fixed budget per move of the search level (level 4).
+        """
+        self.name = name
+        self.level = level
+        self.search_iterations = search_iterations
+
+    def create(self, team: Team, logic, seed=None) -> AIBot:
+        """
+        :param seed: Seed of the bot's search; the global random module drives the other levels.
+        """
+        return AIBot(team, logic, level=self.level, seed=seed, search_iterations=self.search_iterations)
+
+    def __repr__(self):
+        return self.name
+
+
+def play_game(red: BotConfig, blue: BotConfig, seed: int, max_plies: int = DEFAULT_MAX_PLIES) -> float:
+    """
+    Plays one silent bot-vs-bot game.
+
+    :param seed: Seeds both the AutoSetup layouts and every random choice during the game,
+                 the searches of level-4 bots included. Their fixed iteration budgets (see
+                 BotConfig) make the same seed replay the same game.
+    :return: Score from RED's point of view (1 win, 0.5 draw, 0 loss).
+    """
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        board = Board()
+        logic = GameLogic(board)
+        AutoSetup(logic).deploy_all()
+        # String seeds hash the same in every process, unlike hash() of a tuple
+        bots = {team: config.create(team, logic, seed=f"{seed}:{team.name}")
+                for team, config in ((Team.RED, red), (Team.BLUE, blue))}
+
+        for _ in range(max_plies):
+            move = bots[logic.current_turn].get_move()
+            if not move:
+                # No legal moves left loses the game
+                return 0.0 if logic.current_turn == Team.RED else 1.0
+            logic.execute_move(*move)
+            if logic.game_state == GameState.FINISHED:
+                if logic.winner is None:
+                    return 0.5  # Draw by move limit
+                return 1.0 if logic.winner == Team.RED else 0.0
+    return 0.5
+
+
+def play_pair(first: BotConfig, second: BotConfig, seed: int, max_plies: int = DEFAULT_MAX_PLIES) -> float:
+    """
+    Plays the same seed twice with colours swapped, which cancels most of the layout and
+    first-move luck.
+
+    :return: Total score of `first` over both games (0 to 2).
+    """
+    return play_game(first, second, seed, max_plies) + (1.0 - play_game(second, first, seed, max_plies))
+
+
+def score_to_elo(score: float) -> float:
+    """Elo difference that corresponds to an expected score."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def elo_to_score(elo: float) -> float:
+    """Expected score for an Elo difference."""
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+class MatchupStats:
+    """
+    Running statistics of one bot against another, built from paired game scores.
+    Includes a GSPRT on the normalized pair score (normal approximation).
+    """
+
+    def __init__(self, first: BotConfig, second: BotConfig, elo0: float, elo1: float,
+                 alpha: float, beta: float):
+        self.first = first
+        self.second = second
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+
+        self.pairs = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, pair_score: float):
+        """Records one pair result (0 to 2 points for `first`)."""
+        value = pair_score / 2.0
+        self.pairs += 1
+        self.total += value
+        self.total_sq += value * value
+
+    def mean(self) -> float:
+        return self.total / self.pairs if self.pairs else 0.5
+
+    def variance(self) -> float:
+        """
+        Variance of a single pair score. Two virtual pairs (one lost, one won) are mixed in,
+        so a short run of identical results (e.g. all draws) does not look like certainty.
+        """
+        count = self.pairs + 2
+        mean = (self.total + 1.0) / count
+        return (self.total_sq + 1.0) / count - mean * mean
+
+    def elo(self) -> float:
+        return score_to_elo(self.mean())
+
+    def confidence_interval(self, z: float = 1.96) -> tuple:
+        """95% Elo interval by default."""
+        margin = z * math.sqrt(self.variance() / max(self.pairs, 1))
+        return score_to_elo(self.mean() - margin), score_to_elo(self.mean() + margin)
+
+    def llr(self) -> float:
+        """Log-likelihood ratio of H1 (elo1) against H0 (elo0)."""
+        if self.pairs < 2:
+            return 0.0
+        s0, s1 = elo_to_score(self.elo0), elo_to_score(self.elo1)
+        return self.pairs * (s1 - s0) * (2 * self.mean() - s0 - s1) / (2 * self.variance())
+
+    def sprt_result(self):
+        """Returns 'H1' or 'H0' once the test is decided, None while still running."""
+        llr = self.llr()
+        if llr >= self.upper_bound:
+            return "H1"
+        if llr <= self.lower_bound:
+            return "H0"
+        return None
+
+    def summary(self) -> str:
+        low, high = self.confidence_interval()
+        return (f"{self.first} vs {self.second}: {self.pairs * 2} games, "
+                f"Elo {self.elo():+.1f} [{low:+.1f}, {high:+.1f}], "
+                f"LLR {self.llr():.2f} ({self.lower_bound:.2f}, {self.upper_bound:.2f})")
+
+
+class Tournament:
+    """
+    Runs paired bot-vs-bot matches across a process pool.
+    Each matchup stops as soon as its SPRT is decided or max_pairs is reached.
+    """
+
+    def __init__(self, matchups, max_pairs: int = 500, workers: int = None, seed: int = 0,
+                 elo0: float = 0.0, elo1: float = 20.0, alpha: float = 0.05, beta: float = 0.05,
+                 max_plies: int = DEFAULT_MAX_PLIES):
+        """
+        :param matchups: List of (first, second) BotConfig pairs; see round_robin and gauntlet.
+        :param max_pairs: Upper limit of colour-swapped game pairs per matchup.
+        :param workers: Pool size (defaults to the number of CPUs).
+        :param seed: Base seed; pair i of every matchup uses seed + i, so layouts repeat across matchups.
+        """
+        self.stats = [MatchupStats(a, b, elo0, elo1, alpha, beta) for a, b in matchups]
+        self.max_pairs = max_pairs
+        self.workers = workers
+        self.seed = seed
+        self.max_plies = max_plies
+
+    @staticmethod
+    def round_robin(configs):
+        """Every config against every other config once."""
+        return [(a, b) for i, a in enumerate(configs) for b in configs[i + 1:]]
+
+    @staticmethod
+    def gauntlet(candidate, opponents):
+        """One candidate against each opponent."""
+        return [(candidate, opponent) for opponent in opponents]
+
+    def _is_running(self, stats) -> bool:
+        return stats.pairs < self.max_pairs and stats.sprt_result() is None
+
+    def run(self, report=print):
+        """
+        Plays until every matchup is decided, streaming a summary line after each pair.
+
+        :param report: Callable that receives progress lines (print by default).
+        :return: The list of MatchupStats.
+        """
+        scheduled = [0] * len(self.stats)
+
+        def next_task():
+            # Hand out work to the running matchup with the fewest scheduled pairs
+            running = [i for i, stats in enumerate(self.stats)
+                       if self._is_running(stats) and scheduled[i] < self.max_pairs]
+            if not running:
+                return None
+            i = min(running, key=lambda index: scheduled[index])
+            scheduled[i] += 1
+            return i, self.seed + scheduled[i] - 1
+
+        workers = self.workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            window = 2 * workers
+
+            while True:
+                while len(in_flight) < window:
+                    task = next_task()
+                    if task is None:
+                        break
+                    index, seed = task
+                    stats = self.stats[index]
+                    future = pool.submit(play_pair, stats.first, stats.second, seed, self.max_plies)
+                    in_flight[future] = index
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats = self.stats[in_flight.pop(future)]
+                    # Results of already decided matchups are dropped, not counted
+                    if self._is_running(stats):
+                        stats.add(future.result())
+                        report(stats.summary())
+
+        for stats in self.stats:
+            verdict = stats.sprt_result() or "inconclusive"
+            report(f"🏁 {stats.summary()} -> {verdict}")
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot-vs-bot tournament with Elo estimates and SPRT.")
+    parser.add_argument("--levels", default="1,2,3", help="Comma separated AIBot levels to enter.")
+    parser.add_argument("--mode", choices=["round-robin", "gauntlet"], default="round-robin",
+                        help="Gauntlet plays the first level against all others.")
+    parser.add_argument("--max-pairs", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=20.0)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--search-iterations", type=int, default=DEFAULT_SEARCH_ITERATIONS,
+                        help="Search iterations per move of level-4 bots.")
+    args = parser.parse_args()
+
+    configs = [BotConfig(f"L{level}", int(level), args.search_iterations) for level in args.levels.split(",")]
+    if args.mode == "gauntlet":
+        matchups = Tournament.gauntlet(configs[0], configs[1:])
+    else:
+        matchups = Tournament.round_robin(configs)
+
+    Tournament(matchups, max_pairs=args.max_pairs, workers=args.workers, seed=args.seed,
+               elo0=args.elo0, elo1=args.elo1, max_plies=args.max_plies).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,46 @@
 from utils.config import BOARD_SIZE
-from utils.constants import CellType, Team, PieceRank
+from utils.constants import CellType
 from engine.piece import Piece
+from engine.visibility import Visibility
+from engine.repetition import piece_key
+
+# Direction order shared by every neighbour/ray table: down, right, up, left.
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# Move tables keyed by board geometry (size + lake squares), shared by all boards.
+_MOVE_TABLE_CACHE = {}
+
+class BoardSnapshot:
+    """
+    Frozen view of a Board at one version, safe to hand to other threads.
+
+    Rows are shared with the board until it next writes to them (the board copies a
+    row before changing it), so taking a snapshot costs two tuples of row references.
+    Rows must be treated as read-only. Pieces are the board's own objects.
+    """
+
+    __slots__ = ("version", "size", "grid", "cell_metadata")
+
+    def __init__(self, version: int, grid: tuple, cell_metadata: tuple):
+        self.version = version
+        self.size = len(grid)
+        self.grid = grid
+        self.cell_metadata = cell_metadata
+
+    def is_within_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def get_piece_at(self, x: int, y: int) -> Piece | None:
+        if self.is_within_bounds(x, y):
+            return self.grid[y][x]
+        return None
 
 
 class Board:
     """
     Manages the game grid, obstacle placement, and piece locations.
+    The grid must only be written through the board's methods, which keep the
+    version number, snapshots, position hash and fog of war up to date.
     """
 
     def __init__(self):
@@ -16,22 +51,31 @@ class Board:
         # Metadata for cell types (LAKE, CLOUD, etc.)
         self.cell_metadata = [[CellType.EMPTY for _ in range(self.size)] for _ in range(self.size)]
 
+        # Precomputed movement tables (filled in by _build_move_tables)
+        self.neighbors = None
+        self.rays = None
+        # Line-of-sight fog of war, kept up to date by place_piece/remove_piece/set_cell_type
+        self.visibility = None
+        # Bumped by every write; snapshots share rows until the board writes to them
+        self.version = 0
+        self._snapshot = None
+        self._shared_rows = set()
+        self._shared_types = set()
+        # Zobrist hash of the pieces on the board (see engine.repetition), updated on every write
+        self._position_hash = 0
+        self._hash_grid = self.grid
+
         # Initialize obstacles
         self._setup_lakes()
+        self._build_move_tables()
+        self.visibility = Visibility(self)
 
     def _has_cloud_vision(self, team) -> bool:
         """
         Checks if the given team has a Scout inside a Cloud cell.
         This grants them 'Cloud Vision' to see enemy positions inside the fog.
         """
-        for y in range(self.size):
-            for x in range(self.size):
-                if self.cell_metadata[y][x] == CellType.CLOUD:
-                    piece = self.grid[y][x]
-                    # If there is a piece, it belongs to the viewing team, and it's a Scout
-                    if piece and piece.team == team and piece.rank == PieceRank.SCOUT:
-                        return True
-        return False
+        return self.visibility.has_cloud_vision(team)
 
     def _setup_lakes(self):
         """
@@ -52,6 +96,59 @@ class Board:
                     if self.is_within_bounds(c, r):
                         self.set_cell_type(c, r, CellType.LAKE)
 
+    def _build_move_tables(self):
+        """
+        Builds (or fetches from cache) the movement tables for this board geometry.
+        neighbors[y][x] lists the non-lake squares one step away.
+        rays[y][x] holds one tuple per direction with every square a Scout could
+        pass through, stopping before the board edge or the first lake.
+        """
+        lakes = frozenset(
+            (x, y) for y in range(self.size) for x in range(self.size)
+            if self.cell_metadata[y][x] == CellType.LAKE
+        )
+        key = (self.size, lakes)
+        tables = _MOVE_TABLE_CACHE.get(key)
+
+        if tables is None:
+            neighbors = [[() for _ in range(self.size)] for _ in range(self.size)]
+            rays = [[() for _ in range(self.size)] for _ in range(self.size)]
+            for y in range(self.size):
+                for x in range(self.size):
+                    cell_rays = []
+                    for dx, dy in DIRECTIONS:
+                        ray = []
+                        nx, ny = x + dx, y + dy
+                        while self.is_within_bounds(nx, ny) and (nx, ny) not in lakes:
+                            ray.append((nx, ny))
+                            nx += dx
+                            ny += dy
+                        cell_rays.append(tuple(ray))
+                    rays[y][x] = tuple(cell_rays)
+                    neighbors[y][x] = tuple(ray[0] for ray in cell_rays if ray)
+            tables = (neighbors, rays)
+            _MOVE_TABLE_CACHE[key] = tables
+
+        self.neighbors, self.rays = tables
+
+    def get_ray_to(self, start_pos: tuple, end_pos: tuple) -> tuple | None:
+        """
+        Returns the ray from start_pos that contains end_pos, or None if end_pos
+        is not reachable in a straight line without crossing a lake.
+        """
+        sx, sy = start_pos
+        ex, ey = end_pos
+        if (sx != ex) == (sy != ey):
+            return None  # Diagonal move or no move at all
+
+        step = (0 if sx == ex else (1 if ex > sx else -1),
+                0 if sy == ey else (1 if ey > sy else -1))
+        ray = self.rays[sy][sx][DIRECTIONS.index(step)]
+        distance = abs(ex - sx) + abs(ey - sy)
+        if distance > len(ray):
+            return None  # Edge or lake comes first
+        return ray
+
     def is_within_bounds(self, x: int, y: int) -> bool:
         """Checks if the given coordinates are inside the board."""
         return 0 <= x < self.size and 0 <= y < self.size
@@ -59,7 +156,17 @@ class Board:
     def set_cell_type(self, x: int, y: int, cell_type: CellType):
         """Defines a cell as a Lake, Cloud, or Empty."""
         if self.is_within_bounds(x, y):
+            old_type = self.cell_metadata[y][x]
+            if y in self._shared_types:
+                self.cell_metadata[y] = list(self.cell_metadata[y])
+                self._shared_types.discard(y)
             self.cell_metadata[y][x] = cell_type
+            self.version += 1
+            # Lakes change the movement geometry, so the tables must follow
+            if self.rays is not None and CellType.LAKE in (old_type, cell_type) and old_type != cell_type:
+                self._build_move_tables()
+            if self.visibility is not None and old_type != cell_type:
+                self.visibility.cell_changed(x, y)
 
     def get_piece_at(self, x: int, y: int) -> Piece | None:
         """Returns the piece object at the specified location."""
@@ -70,29 +177,108 @@ class Board:
     def place_piece(self, piece, x: int, y: int):
         """Places a piece on the board at (x, y)."""
         if self.is_within_bounds(x, y):
+            self._own_row(y)
+            old = self.grid[y][x]
             self.grid[y][x] = piece
             if piece:
                 piece.position = (x, y)
+            self._update_hash(x, y, old, piece)
+            self.visibility.touch(x, y)
+
+    def remove_piece(self, x: int, y: int):
+        """Empties the square at (x, y)."""
+        if self.is_within_bounds(x, y):
+            self._own_row(y)
+            old = self.grid[y][x]
+            self.grid[y][x] = None
+            self._update_hash(x, y, old, None)
+            self.visibility.touch(x, y)
+
+    def load_grid(self, grid: list):
+        """
+        Replaces the whole grid at once (restoring a packed game, refilling a scratch board).
+        The position hash and fog of war are recomputed on their next use.
+        """
+        self.grid = grid
+        self._shared_rows.clear()
+        self.version += 1
+
+    def snapshot(self) -> BoardSnapshot:
+        """
+        Returns a stable copy of the current position in O(size): rows are shared with
+        the board until it writes to them, and an unchanged board returns the same snapshot.
+        """
+        snap = self._snapshot
+        if snap is None or snap.version != self.version:
+            snap = self._snapshot = BoardSnapshot(self.version, tuple(self.grid), tuple(self.cell_metadata))
+            self._shared_rows.update(range(self.size))
+            self._shared_types.update(range(self.size))
+        return snap
+
+    def _own_row(self, y: int):
+        # Copy-on-write: a row still held by a snapshot is copied before its first change
+        if y in self._shared_rows:
+            self.grid[y] = list(self.grid[y])
+            self._shared_rows.discard(y)
+        self.version += 1
+
+    @property
+    def position_hash(self) -> int:
+        """Zobrist hash of the pieces and their squares (the side to move is not included)."""
+        if self.grid is not self._hash_grid:
+            self._rehash()
+        return self._position_hash
+
+    def _update_hash(self, x: int, y: int, old, new):
+        if self.grid is not self._hash_grid:
+            self._rehash()  # Grid replaced wholesale: the new square is already in it
+            return
+        if old is not None:
+            self._position_hash ^= piece_key(x, y, old)
+        if new is not None:
+            self._position_hash ^= piece_key(x, y, new)
+
+    def _rehash(self):
+        self._hash_grid = self.grid
+        self._position_hash = 0
+        for y, row in enumerate(self.grid):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    self._position_hash ^= piece_key(x, y, piece)
+
+    def get_view(self, viewer_team) -> list:
+        """
+        Returns the board as seen by viewer_team, one string per cell:
+        "" empty, "~" lake, "#" fog (a cloud, or out of the team's line of sight),
+        otherwise the piece's display code ("R7", "B?").
+        Team.NONE gives the neutral view where every rank is hidden and nothing is out of sight.
+        Kept up to date incrementally; the rows are shared between calls and must not be modified.
+        """
+        return self.visibility.view(viewer_team)
 
     def display_terminal(self, viewer_team):
         """
         Prints a structured, grid-like table of the board in the terminal.
         Includes Cloud Vision logic: enemies in clouds are completely hidden
-        unless the viewing team has a Scout inside the cloud.
+        unless the viewing team has a Scout inside the cloud, and squares out of
+        the team's line of sight are fogged.
         """
         cell_width = 10  # Width of each cell
 
+        # Lines are collected and printed in one write (see ui/cli.py for the incremental renderer)
+        lines = []
+
         # Header
         header_row = "    "
         for x in range(self.size):
             header_row += f"{x:^{cell_width}}"
-        print("\n" + header_row)
+        lines.append("\n" + header_row)
 
         horizontal_line = "    " + ("-" * (self.size * cell_width))
-        print(horizontal_line)
+        lines.append(horizontal_line)
 
-        # Check if the current viewer has a Scout in the cloud
-        has_cloud_vision = self._has_cloud_vision(viewer_team)
+        # The fog-filtered view already applies cloud vision and line of sight
+        view = self.get_view(viewer_team)
 
         # Main Board Loop
         for y in range(self.size):
@@ -100,30 +286,21 @@ class Board:
             spacer_line = "   |"
 
             for x in range(self.size):
-                cell_text = "."
-                cell_type = self.cell_metadata[y][x]
-                piece = self.grid[y][x]
-
-                if cell_type == CellType.CLOUD:
-                    if piece:
-                        if piece.team == viewer_team or has_cloud_vision:
-                            cell_text = f"[{piece.get_display(viewer_team)}]"
-                        else:
-                            cell_text = "##FOG##"
-                    else:
-                        cell_text = "##FOG##"
-
-                elif piece:
-                    cell_text = f"[{piece.get_display(viewer_team)}]"
-                elif cell_type == CellType.LAKE:
+                cell = view[y][x]
+                if cell == "#":
+                    cell_text = "##FOG##"
+                elif cell == "~":
                     cell_text = "~LAKE~"
+                elif cell:
+                    cell_text = f"[{cell}]"
+                else:
+                    cell_text = "."
 
                 row_content += f"{cell_text:^{cell_width}}"
                 spacer_line += f"{'':^{cell_width}}"
 
-            print(spacer_line)
-            print(row_content)
-            print(spacer_line)
-            print(horizontal_line)
+            lines.extend((spacer_line, row_content, spacer_line, horizontal_line))
+
+        print("\n".join(lines))
 
         print("\n")
\ No newline at end of file
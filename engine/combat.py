@@ -0,0 +1,103 @@
+from operator import mul
+
+from utils.config import ARMY_COMPOSITION
+from utils.constants import PieceRank
+
+
+"""Outcome codes stored in the combat table."""
+ATTACKER_WINS = 0
+DEFENDER_WINS = 1
+BOTH_DIE = 2
+FLAG_CAPTURED = 3
+
+"""Names used in move reports and by battle_outcome (a captured Flag is an attacker win)."""
+OUTCOME_NAMES = ("ATTACKER", "DEFENDER", "TIE", "ATTACKER")
+
+"""Rank order of the table rows/columns and of probability vectors (same as ARMY_COMPOSITION)."""
+RANKS = tuple(PieceRank[name] for name in ARMY_COMPOSITION)
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+
+
+def _strength(rank: PieceRank) -> int:
+    # Spy counts as rank 1 everywhere except when it attacks the Marshal
+    if rank == PieceRank.SPY:
+        return 1
+    # Bombs and Flags never attack; their rows only keep the table square
+    if rank in (PieceRank.BOMB, PieceRank.FLAG):
+        return 0
+    return rank.value
+
+
+def _rule(attacker: PieceRank, defender: PieceRank) -> tuple:
+    """
+    The battle rules, evaluated once per rank pair when the table is built.
+
+    :return: (outcome code, message shown to the players)
+    """
+    # 1. Capture Flag
+    if defender == PieceRank.FLAG:
+        return FLAG_CAPTURED, "🚩 FLAG CAPTURED!"
+
+    # 2. Hitting a Bomb
+    if defender == PieceRank.BOMB:
+        if attacker == PieceRank.MINER:
+            return ATTACKER_WINS, "Miner defused the Bomb!"
+        return DEFENDER_WINS, "BOOM! Attacker blew up."
+
+    # 3. Spy vs Marshal
+    if attacker == PieceRank.SPY and defender == PieceRank.MARSHAL:
+        return ATTACKER_WINS, "Spy assassinated the Marshal!"
+
+    # 4. Standard Rank Comparison
+    att_val = _strength(attacker)
+    def_val = _strength(defender)
+    if att_val > def_val:
+        return ATTACKER_WINS, f"Attacker ({att_val}) beats Defender ({def_val})"
+    elif att_val < def_val:
+        return DEFENDER_WINS, f"Defender ({def_val}) beats Attacker ({att_val})"
+    return BOTH_DIE, f"Tie! Both ({att_val}) are eliminated."
+
+
+"""OUTCOME_TABLE[attacker index][defender index] -> outcome code, indexed like RANKS."""
+OUTCOME_TABLE = tuple(tuple(_rule(attacker, defender)[0] for defender in RANKS) for attacker in RANKS)
+"""(attacker rank, defender rank) -> outcome code, for lookups by PieceRank."""
+OUTCOMES = {(attacker, defender): OUTCOME_TABLE[a][d] for a, attacker in enumerate(RANKS) for d, defender in enumerate(RANKS)}
+"""(attacker rank, defender rank) -> battle message."""
+MESSAGES = {(attacker, defender): _rule(attacker, defender)[1] for attacker in RANKS for defender in RANKS}
+
+# Per attacker: 0/1 vectors over the defender ranks, so expected outcomes are plain dot products
+_WIN_VECTORS = tuple(tuple(1.0 if code in (ATTACKER_WINS, FLAG_CAPTURED) else 0.0 for code in row) for row in OUTCOME_TABLE)
+_LOSS_VECTORS = tuple(tuple(1.0 if code == DEFENDER_WINS else 0.0 for code in row) for row in OUTCOME_TABLE)
+_TIE_VECTORS = tuple(tuple(1.0 if code == BOTH_DIE else 0.0 for code in row) for row in OUTCOME_TABLE)
+
+
+def resolve(attacker: PieceRank, defender: PieceRank) -> int:
+    """Outcome code of attacker hitting defender (a single table lookup)."""
+    return OUTCOMES[(attacker, defender)]
+
+
+def expected_outcome(attacker: PieceRank, probabilities) -> tuple:
+    """
+    Chances of an attack on a piece whose rank is only known as a distribution.
+
+    :param probabilities: One probability per rank in RANKS order (e.g. a BeliefTracker row),
+                          or a {PieceRank: probability} dict.
+    :return: (win, lose, tie) probabilities; capturing the Flag counts as a win.
+    """
+    if isinstance(probabilities, dict):
+        probabilities = [probabilities.get(rank, 0.0) for rank in RANKS]
+    a = RANK_INDEX[attacker]
+    return (sum(map(mul, probabilities, _WIN_VECTORS[a])),
+            sum(map(mul, probabilities, _LOSS_VECTORS[a])),
+            sum(map(mul, probabilities, _TIE_VECTORS[a])))
+
+
+def expected_outcomes(attackers, rows) -> list:
+    """
+    Bulk version of expected_outcome, for scoring every attack of a position at once.
+
+    :param attackers: Attacker rank of each attack.
+    :param rows: Matching probability vectors (RANKS order) over the defenders' ranks.
+    :return: One (win, lose, tie) tuple per attack.
+    """
+    return [expected_outcome(attacker, row) for attacker, row in zip(attackers, rows)]
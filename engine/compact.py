@@ -0,0 +1,191 @@
+import struct
+
+from engine.board import Board
+from engine.game_logic import GameLogic
+from engine.piece import Piece
+from engine.combat import OUTCOMES, MESSAGES, OUTCOME_NAMES, ATTACKER_WINS, BOTH_DIE, FLAG_CAPTURED
+from engine.repetition import piece_key
+from utils.constants import CellType, GameState, PieceRank, Team
+
+
+"""
+Layout of a packed game (all integers big-endian):
+
+    header   version, size, turn, state, winner, finish reason, cloud turns left,
+             turn counter, draw move limit, number of plies
+    layout   one byte per square of the position before the first move
+             (0 empty, otherwise 1 + (rank code << 1 | team code))
+    lakes, clouds, revealed
+             one bitmask per set of squares, (size * size + 7) // 8 bytes each
+    moves    two bytes per ply: start square, end square (square = y * size + x)
+
+Everything else in a move report (ranks, battle outcome, message) follows from
+replaying the moves on the layout, so a 10x10 game takes about 150 bytes plus two per ply.
+"""
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(">BBBBBBBHHH")
+
+"""Code orders used by the packed format."""
+RANKS = tuple(PieceRank)
+TEAMS = (Team.RED, Team.BLUE)
+STATES = tuple(GameState)
+WINNERS = (None, Team.RED, Team.BLUE)
+FINISH_REASONS = (None, "FLAG_CAPTURED", "MOVE_LIMIT", "TIMEOUT", "FORFEIT")
+_RANK_CODE = {rank: index for index, rank in enumerate(RANKS)}
+_TEAM_CODE = {team: index for index, team in enumerate(TEAMS)}
+
+
+def pack_game(logic) -> bytes:
+    """
+    Packs a whole game (position, history, clouds, reveals, repetition state) into an immutable bytes value.
+
+    :param logic: The GameLogic to pack; its board is read, nothing is modified.
+    :return: The packed game, to be restored with unpack_game.
+    """
+    board = logic.board
+    size = board.size
+    if size > 16:
+        raise ValueError("Packed games store squares in one byte; boards above 16x16 are not supported.")
+
+    # 1. Walk the history backwards from the current position to the layout before the first move
+    cells = {}
+    for y, row in enumerate(board.grid):
+        for x, piece in enumerate(row):
+            if piece:
+                cells[y * size + x] = (piece.team, piece.rank)
+    moves = bytearray()
+    for report in reversed(logic.move_history):
+        (sx, sy), (ex, ey) = report["start"], report["end"]
+        start, end = sy * size + sx, ey * size + ex
+        cells[start] = (Team[report["attacker_team"]], PieceRank[report["attacker_rank"]])
+        if report["battle"]:
+            cells[end] = (Team[report["defender_team"]], PieceRank[report["defender_rank"]])
+        else:
+            cells.pop(end, None)
+        moves += bytes((end, start))
+    moves.reverse()
+
+    layout = bytearray(size * size)
+    for square, (team, rank) in cells.items():
+        layout[square] = 1 + (_RANK_CODE[rank] << 1 | _TEAM_CODE[team])
+
+    # 2. Square sets as bitmasks
+    lakes = clouds = revealed = 0
+    for y in range(size):
+        for x in range(size):
+            bit = 1 << (y * size + x)
+            cell_type = board.cell_metadata[y][x]
+            if cell_type == CellType.LAKE:
+                lakes |= bit
+            elif cell_type == CellType.CLOUD:
+                clouds |= bit
+            piece = board.grid[y][x]
+            if piece and piece.is_revealed:
+                revealed |= bit
+    mask_bytes = (size * size + 7) // 8
+
+    header = _HEADER.pack(FORMAT_VERSION, size, _TEAM_CODE[logic.current_turn], STATES.index(logic.game_state),
+                          WINNERS.index(logic.winner), FINISH_REASONS.index(logic.finish_reason),
+                          logic.cloud_remaining_turns, logic.turn_counter, logic.draw_move_limit,
+                          len(logic.move_history))
+    return b"".join((header, layout, lakes.to_bytes(mask_bytes, "big"), clouds.to_bytes(mask_bytes, "big"),
+                     revealed.to_bytes(mask_bytes, "big"), moves))
+
+
+def unpack_game(data: bytes) -> GameLogic:
+    """
+    Rebuilds a live game from pack_game's output: a fresh Board and GameLogic with the
+    same position, move reports and repetition state, ready to take the next move.
+
+    :return: The restored GameLogic (its board is logic.board).
+    """
+    (version, size, turn, state, winner, reason, cloud_turns, turn_counter, draw_move_limit,
+     plies) = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unknown packed game version {version}.")
+
+    board = Board()
+    if board.size != size:
+        raise ValueError(f"Packed game is {size}x{size}, this build plays on {board.size}x{board.size}.")
+    logic = GameLogic(board, draw_move_limit=draw_move_limit)
+
+    count = size * size
+    mask_bytes = (count + 7) // 8
+    offset = _HEADER.size
+    layout = data[offset:offset + count]
+    offset += count
+    lakes, clouds, revealed = (int.from_bytes(data[offset + i * mask_bytes:offset + (i + 1) * mask_bytes], "big")
+                               for i in range(3))
+    offset += 3 * mask_bytes
+    moves = data[offset:offset + 2 * plies]
+
+    # 1. Cell types (lakes differ only on custom boards, so the move tables are rarely rebuilt)
+    for y in range(size):
+        for x in range(size):
+            bit = lakes >> (y * size + x) & 1
+            if bit != (board.cell_metadata[y][x] == CellType.LAKE):
+                board.set_cell_type(x, y, CellType.LAKE if bit else CellType.EMPTY)
+            if clouds >> (y * size + x) & 1:
+                board.set_cell_type(x, y, CellType.CLOUD)
+
+    # 2. Replay the moves on a private grid, rebuilding the reports and the repetition state
+    grid = [[None] * size for _ in range(size)]
+    position_hash = 0
+    for square, code in enumerate(layout):
+        if code:
+            y, x = divmod(square, size)
+            piece = grid[y][x] = Piece(RANKS[(code - 1) >> 1], TEAMS[(code - 1) & 1], (x, y))
+            position_hash ^= piece_key(x, y, piece)
+
+    for i in range(0, len(moves), 2):
+        (sy, sx), (ey, ex) = divmod(moves[i], size), divmod(moves[i + 1], size)
+        attacker, defender = grid[sy][sx], grid[ey][ex]
+        hash_before = position_hash
+        report = {
+            "battle": False,
+            "start": (sx, sy),
+            "end": (ex, ey),
+            "attacker_team": attacker.team.name,
+            "attacker_rank": attacker.rank.name
+        }
+        grid[sy][sx] = None
+        position_hash ^= piece_key(sx, sy, attacker)
+        survivor = attacker
+        if defender:
+            outcome = OUTCOMES[(attacker.rank, defender.rank)]
+            message = MESSAGES[(attacker.rank, defender.rank)]
+            if outcome == FLAG_CAPTURED:
+                message = f"{message} {attacker.team.name} WINS!"
+            report["battle"] = True
+            report["defender_team"] = defender.team.name
+            report["defender_rank"] = defender.rank.name
+            report["message"] = message
+            report["outcome"] = OUTCOME_NAMES[outcome]
+            if outcome in (ATTACKER_WINS, FLAG_CAPTURED, BOTH_DIE):
+                position_hash ^= piece_key(ex, ey, defender)
+                grid[ey][ex] = None
+            survivor = attacker if outcome in (ATTACKER_WINS, FLAG_CAPTURED) else None
+        if survivor:
+            grid[ey][ex] = survivor
+            survivor.position = (ex, ey)
+            position_hash ^= piece_key(ex, ey, survivor)
+        else:
+            attacker.position = None
+        logic.move_history.append(report)
+        next_turn = Team.BLUE if attacker.team == Team.RED else Team.RED
+        logic.repetition.record(attacker, (sx, sy), (ex, ey), hash_before, position_hash, next_turn)
+
+    for y, row in enumerate(grid):
+        for x, piece in enumerate(row):
+            if piece and revealed >> (y * size + x) & 1:
+                piece.reveal()
+    board.load_grid(grid)
+
+    # 3. Turn and game state
+    logic.current_turn = TEAMS[turn]
+    logic.game_state = STATES[state]
+    logic.winner = WINNERS[winner]
+    logic.finish_reason = FINISH_REASONS[reason]
+    logic.cloud_remaining_turns = cloud_turns
+    logic.turn_counter = turn_counter
+    return logic
@@ -0,0 +1,65 @@
+from utils.constants import GameEvent
+
+
+class Event:
+    """
+    One change announced by GameLogic.
+
+    squares lists every (x, y) whose contents or cell type changed, so a subscriber can
+    redraw or resend exactly those. data holds the details of each type:
+
+    - PIECE_MOVED: piece, start, end (the piece now stands on end)
+    - PIECE_REMOVED: piece, square (the piece was beaten or blew up there)
+    - BATTLE_RESOLVED: attacker, defender, start, end, outcome ("ATTACKER"/"DEFENDER"/"TIE"), message
+    - CLOUD_SPAWNED / CLOUD_CLEARED: no data, the cloud squares are in squares
+    - TURN_SWITCHED: team (now to move), turn (turn counter)
+    - GAME_OVER: winner (None for a draw), reason
+    """
+
+    __slots__ = ("type", "squares", "data")
+
+    def __init__(self, event_type: GameEvent, squares: tuple, data: dict):
+        self.type = event_type
+        self.squares = squares
+        self.data = data
+
+    def __repr__(self):
+        return f"Event({self.type.name}, {self.squares}, {self.data})"
+
+
+class EventBus:
+    """
+    Synchronous publish/subscribe of Events.
+
+    Handlers run on the emitting thread in the order they subscribed, right after the
+    engine made the change, and must not modify the game from inside the call. Emitting a
+    type nobody listens to costs one dict lookup, so the engine can announce everything.
+    """
+
+    def __init__(self):
+        self.handlers = {event_type: [] for event_type in GameEvent}
+
+    def subscribe(self, handler, *event_types: GameEvent):
+        """
+        :param handler: Called as handler(event).
+        :param event_types: Types to receive; none means every type.
+        :return: The handler, for unsubscribe.
+        """
+        for event_type in event_types or tuple(GameEvent):
+            self.handlers[event_type].append(handler)
+        return handler
+
+    def unsubscribe(self, handler):
+        for handlers in self.handlers.values():
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def listening(self, event_type: GameEvent) -> bool:
+        return bool(self.handlers[event_type])
+
+    def emit(self, event_type: GameEvent, squares: tuple = (), **data):
+        handlers = self.handlers[event_type]
+        if handlers:
+            event = Event(event_type, tuple(squares), data)
+            for handler in tuple(handlers):
+                handler(event)
@@ -1,19 +1,37 @@
-from utils.constants import Team, PieceRank, CellType, GameState
-from utils.config import BOARD_SIZE, CLOUD_TRIGGER_INTERVAL, CLOUD_DURATION, CLOUD_SIZE
+from utils.constants import Team, PieceRank, CellType, GameState, MoveResult, GameEvent
+from utils.config import BOARD_SIZE, CLOUD_TRIGGER_INTERVAL, CLOUD_DURATION, CLOUD_SIZE, DRAW_MOVE_LIMIT
+from engine.combat import OUTCOMES, MESSAGES, OUTCOME_NAMES, ATTACKER_WINS, DEFENDER_WINS, FLAG_CAPTURED
+from engine.repetition import RepetitionTracker
+from engine.events import EventBus
 
 
 import random
 
 
+# Fixed explanations for rejected moves (turn and immovable messages are built per piece)
+REJECTION_MESSAGES = {
+    MoveResult.OUT_OF_BOUNDS: "Error: Move out of bounds.",
+    MoveResult.NO_PIECE: "Error: No piece at starting position.",
+    MoveResult.INTO_LAKE: "Error: Cannot move into a Lake.",
+    MoveResult.OWN_PIECE: "Error: Cannot move onto a square occupied by your own piece.",
+    MoveResult.NOT_STRAIGHT: "Error: Scout can only move in straight lines (horizontally or vertically).",
+    MoveResult.PATH_BLOCKED: "Error: Path is blocked. Scouts cannot jump over pieces or lakes.",
+    MoveResult.NOT_ADJACENT: "Error: This piece can only move 1 step adjacent.",
+    MoveResult.TWO_SQUARES: "Error: Two-square rule. This piece cannot keep moving back and forth between the same squares.",
+    MoveResult.REPEATED_POSITION: "Error: This move would repeat the same position too many times.",
+}
+
+
 class GameLogic:
     """
     The referee of the game. Handles turn management, move validation,
     and game state updates.
     """
 
-    def __init__(self, board):
+    def __init__(self, board, draw_move_limit: int = DRAW_MOVE_LIMIT):
         """
         :param board: The game board object (from engine.board).
+        :param draw_move_limit: Plies after which the game is drawn (0 = no limit).
         """
         self.board = board
         self.current_turn = Team.RED  # Red always starts first
@@ -21,6 +39,15 @@ class GameLogic:
         self.cloud_remaining_turns = 0
         self.game_state = GameState.SETUP_PHASE
         self.winner = None
+        # Why the game ended: "FLAG_CAPTURED", "MOVE_LIMIT", "TIMEOUT" or "FORFEIT" (None while it goes on)
+        self.finish_reason = None
+        self.draw_move_limit = draw_move_limit
+        # Two-square and repeated-position rules
+        self.repetition = RepetitionTracker()
+        # Reports of every executed move, oldest first (read by AI trackers and replays)
+        self.move_history = []
+        # Typed change events for renderers, the network layer and metrics (see engine.events)
+        self.events = EventBus()
 
     def switch_turn(self):
         """Switches the active player."""
@@ -34,6 +61,19 @@ class GameLogic:
         self._manage_cloud_event()
 
         print(f"Turn switched! Now it's {self.current_turn.name}'s turn.")
+        self.events.emit(GameEvent.TURN_SWITCHED, team=self.current_turn, turn=self.turn_counter)
+
+    def finish_game(self, winner, reason: str):
+        """
+        Ends the game and announces it.
+
+        :param winner: Winning Team, or None for a draw.
+        :param reason: "FLAG_CAPTURED", "MOVE_LIMIT", "TIMEOUT" or "FORFEIT".
+        """
+        self.game_state = GameState.FINISHED
+        self.winner = winner
+        self.finish_reason = reason
+        self.events.emit(GameEvent.GAME_OVER, winner=winner, reason=reason)
 
     def _manage_cloud_event(self):
         """Internal logic to trigger or remove the storm cloud."""
@@ -57,18 +97,24 @@ class GameLogic:
         start_x = random.randint(0, max_pos)
         start_y = random.randint(0, max_pos)
 
+        squares = []
         for y in range(start_y, start_y + CLOUD_SIZE):
             for x in range(start_x, start_x + CLOUD_SIZE):
                 # Don't overwrite Lakes, only Empty cells
                 if self.board.cell_metadata[y][x] == CellType.EMPTY:
                     self.board.set_cell_type(x, y, CellType.CLOUD)
+                    squares.append((x, y))
+        self.events.emit(GameEvent.CLOUD_SPAWNED, squares)
 
     def _clear_all_clouds(self):
         """Removes all cloud tiles from the board."""
+        squares = []
         for y in range(self.board.size):
             for x in range(self.board.size):
                 if self.board.cell_metadata[y][x] == CellType.CLOUD:
                     self.board.set_cell_type(x, y, CellType.EMPTY)
+                    squares.append((x, y))
+        self.events.emit(GameEvent.CLOUD_CLEARED, squares)
 
 
     def validate_move(self, start_pos: tuple, end_pos: tuple) -> bool:
@@ -77,87 +123,133 @@ class GameLogic:
 
         :return: True if valid, False otherwise (with a print message explaining why).
         """
+        result = self.check_move(start_pos, end_pos)
+        if result != MoveResult.OK:
+            print(self.describe_rejection(result, start_pos))
+            return False
+        return True
+
+    def validate_moves(self, batch) -> bytes:
+        """
+        Checks many candidate moves against the current position in one call.
+        Scout reach along each ray is computed once per start square and shared by the batch.
+
+        :param batch: Iterable of (start_pos, end_pos) pairs.
+        :return: One MoveResult value per move, packed as bytes (0 means legal).
+        """
+        scout_reach = {}
+        return bytes(self.check_move(start_pos, end_pos, scout_reach).value for start_pos, end_pos in batch)
+
+    def check_move(self, start_pos: tuple, end_pos: tuple, scout_reach: dict = None) -> MoveResult:
+        """
+        Silent version of validate_move.
+
+        :param scout_reach: Optional cache of Scout destinations per start square,
+                            only valid while the position does not change.
+        :return: MoveResult.OK if legal, otherwise the reason for rejection.
+        """
         sx, sy = start_pos
         ex, ey = end_pos
 
         # 1. Check board boundaries
         if not (self.board.is_within_bounds(sx, sy) and self.board.is_within_bounds(ex, ey)):
-            print("Error: Move out of bounds.")
-            return False
+            return MoveResult.OUT_OF_BOUNDS
 
         # 2. Check if there is a piece at the start position
-        piece = self.board.get_piece_at(sx, sy)
+        piece = self.board.grid[sy][sx]
         if not piece:
-            print("Error: No piece at starting position.")
-            return False
+            return MoveResult.NO_PIECE
 
         # 3. Check turn ownership
         if piece.team != self.current_turn:
-            print(f"Error: It is {self.current_turn.name}'s turn. You cannot move {piece.team.name} pieces.")
-            return False
+            return MoveResult.WRONG_TURN
 
         # 4. Check if the piece is movable (Bombs and Flags are static)
         if not piece.can_move:
-            print(f"Error: {piece.rank.name} cannot move.")
-            return False
+            return MoveResult.IMMOVABLE
 
         # 5. Check destination cell type (Cannot move into Lakes)
         if self.board.cell_metadata[ey][ex] == CellType.LAKE:
-            print("Error: Cannot move into a Lake.")
-            return False
+            return MoveResult.INTO_LAKE
 
         # 6. Check destination occupancy (Cannot move onto own piece)
-        dest_piece = self.board.get_piece_at(ex, ey)
+        dest_piece = self.board.grid[ey][ex]
         if dest_piece and dest_piece.team == piece.team:
-            print("Error: Cannot move onto a square occupied by your own piece.")
-            return False
-
-        # 7. Movement Rules based on Rank
-        dx = abs(ex - sx)
-        dy = abs(ey - sy)
+            return MoveResult.OWN_PIECE
 
+        # 7. Movement Rules based on Rank (walks the board's precomputed move tables)
         # Rule for Scout (Rank 2): Can move any distance in a straight line, but not jump
         if piece.rank == PieceRank.SCOUT:
-            if dx > 0 and dy > 0:
-                print("Error: Scout can only move in straight lines (horizontally or vertically).")
-                return False
-            if not self._is_path_clear(start_pos, end_pos):
-                print("Error: Path is blocked. Scouts cannot jump over pieces or lakes.")
-                return False
+            if sx != ex and sy != ey:
+                return MoveResult.NOT_STRAIGHT
+            if scout_reach is None:
+                if not self._is_path_clear(start_pos, end_pos):
+                    return MoveResult.PATH_BLOCKED
+            else:
+                reach = scout_reach.get(start_pos)
+                if reach is None:
+                    reach = scout_reach[start_pos] = self._scout_reach(sx, sy)
+                if end_pos not in reach:
+                    return MoveResult.PATH_BLOCKED
 
         # Rule for all other pieces: Can move only 1 step
         else:
-            if dx + dy != 1:
-                print("Error: This piece can only move 1 step adjacent.")
-                return False
+            if end_pos not in self.board.neighbors[sy][sx]:
+                return MoveResult.NOT_ADJACENT
 
-        return True
+        # 8. Repetition rules (two-square rule, repeated positions)
+        return self.repetition.check(self.board, piece, start_pos, end_pos)
+
+    def check_repetition(self, start_pos: tuple, end_pos: tuple) -> MoveResult:
+        """
+        Checks only the repetition rules, for move generators that already follow the movement rules.
+
+        :return: MoveResult.OK, TWO_SQUARES or REPEATED_POSITION.
+        """
+        piece = self.board.grid[start_pos[1]][start_pos[0]]
+        if not piece:
+            return MoveResult.NO_PIECE
+        return self.repetition.check(self.board, piece, start_pos, end_pos)
+
+    def describe_rejection(self, result: MoveResult, start_pos: tuple) -> str:
+        """Returns the human-readable reason for a rejected move."""
+        if result == MoveResult.WRONG_TURN:
+            piece = self.board.get_piece_at(*start_pos)
+            return f"Error: It is {self.current_turn.name}'s turn. You cannot move {piece.team.name} pieces."
+        if result == MoveResult.IMMOVABLE:
+            piece = self.board.get_piece_at(*start_pos)
+            return f"Error: {piece.rank.name} cannot move."
+        return REJECTION_MESSAGES.get(result, "Error: Illegal move.")
+
+    def _scout_reach(self, x, y) -> set:
+        """All squares a Scout at (x, y) can reach: each ray up to and including the first piece."""
+        grid = self.board.grid
+        reach = set()
+        for ray in self.board.rays[y][x]:
+            for nx, ny in ray:
+                reach.add((nx, ny))
+                if grid[ny][nx]:
+                    break
+        return reach
 
     def _is_path_clear(self, start_pos, end_pos) -> bool:
         """
         Helper method for Scout movement. Checks if the path is free of obstacles.
+        Lakes are already cut out of the board's rays, so only pieces need checking.
         """
-        sx, sy = start_pos
-        ex, ey = end_pos
+        if start_pos == end_pos:
+            return True
 
-        # Determine direction
-        step_x = 0 if sx == ex else (1 if ex > sx else -1)
-        step_y = 0 if sy == ey else (1 if ey > sy else -1)
-
-        curr_x, curr_y = sx + step_x, sy + step_y
+        ray = self.board.get_ray_to(start_pos, end_pos)
+        if ray is None:
+            return False
 
-        # Loop until we reach the cell BEFORE the destination
-        while (curr_x, curr_y) != (ex, ey):
-            # Check for piece
-            if self.board.get_piece_at(curr_x, curr_y):
-                return False
-            # Check for Lake
-            if self.board.cell_metadata[curr_y][curr_x] == CellType.LAKE:
+        grid = self.board.grid
+        distance = abs(end_pos[0] - start_pos[0]) + abs(end_pos[1] - start_pos[1])
+        # Walk the ray until we reach the cell BEFORE the destination
+        for x, y in ray[:distance - 1]:
+            if grid[y][x]:
                 return False
-
-            curr_x += step_x
-            curr_y += step_y
-
         return True
 
     def execute_move(self, start_pos: tuple, end_pos: tuple):
@@ -169,6 +261,7 @@ class GameLogic:
 
         attacker = self.board.get_piece_at(sx, sy)
         defender = self.board.get_piece_at(ex, ey)
+        hash_before = self.board.position_hash
 
         # --- Create a Battle Report Dictionary ---
         report = {
@@ -180,7 +273,7 @@ class GameLogic:
         }
 
         # Remove attacker from old position regardless of outcome
-        self.board.grid[sy][sx] = None
+        self.board.remove_piece(sx, sy)
         attacker.position = None  # Temporarily in limbo
 
         if defender:
@@ -196,60 +289,66 @@ class GameLogic:
             report["message"] = message
             print(f"Result: {message}")
 
+            # Outcome only, so observers can reason about hidden ranks
+            report["outcome"] = "ATTACKER" if winner == attacker else ("DEFENDER" if winner == defender else "TIE")
+            self.events.emit(GameEvent.BATTLE_RESOLVED, (start_pos, end_pos), attacker=attacker, defender=defender,
+                             start=start_pos, end=end_pos, outcome=report["outcome"], message=message)
+
             if winner == attacker:
                 # Attacker takes the spot
                 self.board.place_piece(attacker, ex, ey)
-                # Defender is removed (already overwritten or handled)
+                self.events.emit(GameEvent.PIECE_REMOVED, (end_pos,), piece=defender, square=end_pos)
+                self.events.emit(GameEvent.PIECE_MOVED, (start_pos, end_pos), piece=attacker, start=start_pos, end=end_pos)
             elif winner == defender:
                 # Attacker dies, Defender stays
-                # We need to put the defender back (it wasn't moved, but just to be safe)
-                pass
+                self.events.emit(GameEvent.PIECE_REMOVED, (start_pos,), piece=attacker, square=start_pos)
             else:
                 # It's a Tie (Both die)
-                self.board.grid[ey][ex] = None
+                self.board.remove_piece(ex, ey)
+                self.events.emit(GameEvent.PIECE_REMOVED, (start_pos,), piece=attacker, square=start_pos)
+                self.events.emit(GameEvent.PIECE_REMOVED, (end_pos,), piece=defender, square=end_pos)
         else:
             # Simple move (No combat)
             self.board.place_piece(attacker, ex, ey)
             print(f"Moved {attacker} to ({ex}, {ey}).")
+            self.events.emit(GameEvent.PIECE_MOVED, (start_pos, end_pos), piece=attacker, start=start_pos, end=end_pos)
 
+        self.move_history.append(report)
         self.switch_turn()
+        self.repetition.record(attacker, start_pos, end_pos, hash_before, self.board.position_hash, self.current_turn)
+
+        if defender and defender.rank == PieceRank.FLAG:
+            self.finish_game(attacker.team, "FLAG_CAPTURED")
+        # Draw by move limit
+        elif self.game_state != GameState.FINISHED and self.draw_move_limit and len(self.move_history) >= self.draw_move_limit:
+            print(f"🤝 DRAW! No flag was captured within {self.draw_move_limit} moves.")
+            self.finish_game(None, "MOVE_LIMIT")
         return report
 
     def _resolve_battle(self, attacker, defender):
         """
-        Determines the winner of a battle.
+        Determines the winner of a battle with a lookup in the combat table.
         Returns: (Winning_Piece_Object, "Reason Message")
         If tie, returns (None, "Tie Message")
         """
-        # 1. Capture Flag
-        if defender.rank == PieceRank.FLAG:
-            self.game_state = GameState.FINISHED
-            self.winner = attacker.team
-            return attacker, f"🚩 FLAG CAPTURED! {attacker.team.name} WINS!"
+        outcome = OUTCOMES[(attacker.rank, defender.rank)]
+        message = MESSAGES[(attacker.rank, defender.rank)]
 
-        # 2. Hitting a Bomb
-        if defender.rank == PieceRank.BOMB:
-            if attacker.rank == PieceRank.MINER:
-                return attacker, "Miner defused the Bomb!"
-            else:
-                return defender, "BOOM! Attacker blew up."
-
-        # 3. Spy vs Marshal
-        if attacker.rank == PieceRank.SPY and defender.rank == PieceRank.MARSHAL:
-            return attacker, "Spy assassinated the Marshal!"
+        if outcome == FLAG_CAPTURED:
+            # execute_move ends the game once the board is updated
+            return attacker, f"{message} {attacker.team.name} WINS!"
+        if outcome == ATTACKER_WINS:
+            return attacker, message
+        if outcome == DEFENDER_WINS:
+            return defender, message
+        return None, message
 
-        # 4. Standard Rank Comparison
-        # We need to handle 'S' (Spy) carefully since it's a string, not int for comparison
-        att_val = attacker.rank.value
-        def_val = defender.rank.value
 
-        # Spy is effectively rank 1 when attacked or attacking anything other than Marshal
-        if attacker.rank == PieceRank.SPY: att_val = 1
-        if defender.rank == PieceRank.SPY: def_val = 1
+def battle_outcome(attacker_rank: PieceRank, defender_rank: PieceRank) -> str:
+    """
+    Side-effect free version of the battle rules, for code that reasons about
+    hypothetical ranks (AI belief tracking).
 
-        if att_val > def_val:
-            return attacker, f"Attacker ({att_val}) beats Defender ({def_val})"
-        elif att_val < def_val:
-            return defender, f"Defender ({def_val}) beats Attacker ({att_val})"
-        else:
-            return None, f"Tie! Both ({att_val}) are eliminated."
\ No newline at end of file
+    :return: "ATTACKER", "DEFENDER" or "TIE" depending on who survives.
+    """
+    return OUTCOME_NAMES[OUTCOMES[(attacker_rank, defender_rank)]]
@@ -0,0 +1,74 @@
+import random
+from collections import Counter
+
+from utils.config import TWO_SQUARE_LIMIT, POSITION_REPEAT_LIMIT
+from utils.constants import MoveResult, Team
+
+
+# Zobrist keys, drawn from a fixed seed so hashes agree between processes
+_rng = random.Random(0x5742A7E60)
+_PIECE_KEYS = {}
+SIDE_KEYS = {Team.RED: _rng.getrandbits(64), Team.BLUE: _rng.getrandbits(64)}
+
+
+def piece_key(x: int, y: int, piece) -> int:
+    """Zobrist key of piece standing on (x, y); a position hash is the XOR of its pieces' keys."""
+    key = (x, y, piece.team, piece.rank)
+    value = _PIECE_KEYS.get(key)
+    if value is None:
+        value = _PIECE_KEYS[key] = _rng.getrandbits(64)
+    return value
+
+
+class RepetitionTracker:
+    """
+    Enforces the repetition rules for one game, in O(1) per move.
+
+    - Two-square rule: a piece may not move back and forth between the same two squares
+      more than `two_square_limit` times in a row (the team's other moves break the streak).
+    - More-squares rule, by position hashes: a move may not bring about a position (with
+      the same side to move) that has already occurred `position_limit` times, which ends
+      chases around several squares as well.
+
+    Only the last streak per team and a counter of position hashes are kept. Captures can
+    never repeat a position, so they are exempt from the second check.
+    """
+
+    def __init__(self, two_square_limit: int = TWO_SQUARE_LIMIT, position_limit: int = POSITION_REPEAT_LIMIT):
+        self.two_square_limit = two_square_limit
+        self.position_limit = position_limit
+        self.streaks = {}           # Team -> (piece, {square, square}, square it stands on, moves in a row)
+        self.positions = Counter()  # position hash (side to move included) -> times reached
+
+    def check(self, board, piece, start_pos: tuple, end_pos: tuple) -> MoveResult:
+        """
+        :param board: Board before the move (its position_hash is used).
+        :param piece: The piece moving from start_pos.
+        :return: MoveResult.OK, TWO_SQUARES or REPEATED_POSITION.
+        """
+        streak = self.streaks.get(piece.team)
+        if streak and streak[0] is piece and streak[2] == start_pos and end_pos in streak[1] \
+                and streak[3] >= self.two_square_limit:
+            return MoveResult.TWO_SQUARES
+
+        if self.positions and board.grid[end_pos[1]][end_pos[0]] is None:
+            other = Team.BLUE if piece.team == Team.RED else Team.RED
+            after = board.position_hash ^ piece_key(*start_pos, piece) ^ piece_key(*end_pos, piece) ^ SIDE_KEYS[other]
+            if self.positions[after] >= self.position_limit:
+                return MoveResult.REPEATED_POSITION
+        return MoveResult.OK
+
+    def record(self, piece, start_pos: tuple, end_pos: tuple, hash_before: int, hash_after: int, next_turn: Team):
+        """Updates the streak of the team that moved and counts the position reached."""
+        if not self.positions:
+            self.positions[hash_before ^ SIDE_KEYS[piece.team]] = 1
+
+        streak = self.streaks.get(piece.team)
+        if streak and streak[0] is piece and streak[2] == start_pos and end_pos in streak[1]:
+            count = streak[3] + 1
+        else:
+            count = 1
+        self.streaks[piece.team] = (piece, {start_pos, end_pos}, end_pos, count)
+
+        if next_turn in SIDE_KEYS:
+            self.positions[hash_after ^ SIDE_KEYS[next_turn]] += 1
@@ -0,0 +1,217 @@
+from utils.constants import CellType, PieceRank, Team
+
+
+# Sight tables keyed by board geometry (size + lake squares), shared by all boards.
+_SIGHT_CACHE = {}
+
+
+def _line_is_clear(a: tuple, b: tuple, lakes: frozenset) -> bool:
+    """True if the straight line between the centres of squares a and b crosses no lake."""
+    (x0, y0), (x1, y1) = a, b
+    dx, dy = x1 - x0, y1 - y0
+    steps = 2 * max(abs(dx), abs(dy))
+    for k in range(1, steps):
+        cell = (int(x0 + dx * k / steps + 0.5), int(y0 + dy * k / steps + 0.5))
+        if cell != a and cell != b and cell in lakes:
+            return False
+    return True
+
+
+def sight_table(size: int, lakes: frozenset) -> tuple:
+    """
+    Builds (or fetches from cache) which squares each square can see past the lakes.
+    Squares are numbered y * size + x; a square always sees itself.
+
+    :return: (masks, lists) where masks[i] is a bitmask and lists[i] a tuple of the squares visible from i.
+    """
+    key = (size, lakes)
+    table = _SIGHT_CACHE.get(key)
+    if table is None:
+        count = size * size
+        masks = [1 << i for i in range(count)]
+        # Checking each pair once keeps the table symmetric: a sees b exactly when b sees a
+        for i in range(count):
+            a = (i % size, i // size)
+            for j in range(i + 1, count):
+                if _line_is_clear(a, (j % size, j // size), lakes):
+                    masks[i] |= 1 << j
+                    masks[j] |= 1 << i
+        lists = tuple(tuple(j for j in range(count) if mask >> j & 1) for mask in masks)
+        table = _SIGHT_CACHE[key] = (tuple(masks), lists)
+    return table
+
+
+class Visibility:
+    """
+    Line-of-sight fog of war for one Board.
+
+    A piece is seen by the enemy only while at least one enemy piece has a clear line to
+    it (lakes block sight; pieces do not). For each team the number of its pieces that see
+    every square is kept, together with a bitmask of the squares it sees. Board.place_piece
+    and Board.remove_piece report each changed square, so a move only updates the
+    squares seen from its start and end square, and the cached view of each viewer is
+    patched on the cells that changed instead of being rebuilt.
+
+    Views are lists of row lists. Unchanged rows are shared between calls, so callers must
+    treat them as read-only.
+    """
+
+    def __init__(self, board):
+        """
+        :param board: The Board to track; its grid must only be written through its methods.
+        """
+        self.board = board
+        self.rebuild()
+
+    def rebuild(self):
+        """Recomputes everything from the board (new lakes, or a grid replaced wholesale)."""
+        board = self.board
+        self.size = board.size
+        self.lakes = frozenset(
+            (x, y) for y in range(self.size) for x in range(self.size)
+            if board.cell_metadata[y][x] == CellType.LAKE
+        )
+        self.sight_masks, self.sight_lists = sight_table(self.size, self.lakes)
+
+        count = self.size * self.size
+        self._grid = board.grid
+        self.occupants = [None] * count
+        self.watchers = {Team.RED: [0] * count, Team.BLUE: [0] * count}
+        self.visible = {Team.RED: 0, Team.BLUE: 0}
+        self.clouds = {y * self.size + x for y in range(self.size) for x in range(self.size)
+                       if board.cell_metadata[y][x] == CellType.CLOUD}
+
+        # Cached views per viewer, with the squares to redraw and the cloud vision they were drawn with
+        self._rows = {}
+        self._dirty = {}
+        self._cloud_vision = {}
+
+        for y, row in enumerate(board.grid):
+            for x, piece in enumerate(row):
+                if piece:
+                    self.occupants[y * self.size + x] = piece
+                    self._add_watcher(piece.team, y * self.size + x)
+
+    # ==========================================
+    # UPDATES (called by Board)
+    # ==========================================
+
+    def touch(self, x: int, y: int):
+        """The piece on (x, y) changed: moves that square's sight from the old occupant to the new one."""
+        if self.board.grid is not self._grid:
+            self.rebuild()
+            return
+        i = y * self.size + x
+        old = self.occupants[i]
+        new = self.board.grid[y][x]
+        if old is new:
+            return
+        if old is not None and old.team in self.watchers:
+            self._remove_watcher(old.team, i)
+        if new is not None and new.team in self.watchers:
+            self._add_watcher(new.team, i)
+        self.occupants[i] = new
+        self._mark(i)
+
+    def cell_changed(self, x: int, y: int):
+        """The cell type of (x, y) changed (cloud coming or going, or a new lake)."""
+        i = y * self.size + x
+        cell_type = self.board.cell_metadata[y][x]
+        if (cell_type == CellType.LAKE) != ((x, y) in self.lakes):
+            self.rebuild()
+            return
+        if cell_type == CellType.CLOUD:
+            self.clouds.add(i)
+        else:
+            self.clouds.discard(i)
+        self._mark(i)
+
+    def _add_watcher(self, team: Team, square: int):
+        counts = self.watchers[team]
+        for j in self.sight_lists[square]:
+            if not counts[j]:
+                self.visible[team] |= 1 << j
+                self._mark_for(team, j)
+            counts[j] += 1
+
+    def _remove_watcher(self, team: Team, square: int):
+        counts = self.watchers[team]
+        for j in self.sight_lists[square]:
+            counts[j] -= 1
+            if not counts[j]:
+                self.visible[team] &= ~(1 << j)
+                self._mark_for(team, j)
+
+    def _mark(self, i: int):
+        for dirty in self._dirty.values():
+            dirty.add(i)
+
+    def _mark_for(self, team: Team, i: int):
+        dirty = self._dirty.get(team)
+        if dirty is not None:
+            dirty.add(i)
+
+    # ==========================================
+    # QUERIES
+    # ==========================================
+
+    def can_see(self, team: Team, x: int, y: int) -> bool:
+        """True if a piece of team has a clear line of sight to (x, y)."""
+        return bool(self.visible.get(team, 0) >> (y * self.size + x) & 1)
+
+    def has_cloud_vision(self, team: Team) -> bool:
+        """True if team has a Scout inside a cloud (it then sees enemies in the fog)."""
+        for i in self.clouds:
+            piece = self.occupants[i]
+            if piece and piece.team == team and piece.rank == PieceRank.SCOUT:
+                return True
+        return False
+
+    def view(self, viewer: Team) -> list:
+        """The board as seen by viewer (see Board.get_view), patched from the previous call."""
+        if self.board.grid is not self._grid:
+            self.rebuild()
+
+        vision = self.has_cloud_vision(viewer)
+        rows = self._rows.get(viewer)
+        if rows is None:
+            rows = self._rows[viewer] = [[self._cell(viewer, x, y, vision) for x in range(self.size)]
+                                         for y in range(self.size)]
+            self._dirty[viewer] = set()
+            self._cloud_vision[viewer] = vision
+            return list(rows)
+
+        dirty = self._dirty[viewer]
+        if vision != self._cloud_vision[viewer]:
+            dirty |= self.clouds
+            self._cloud_vision[viewer] = vision
+        if dirty:
+            # Changed rows are replaced by copies, so views handed out earlier never change
+            copies = {}
+            for i in dirty:
+                y, x = divmod(i, self.size)
+                row = copies.get(y)
+                if row is None:
+                    row = copies[y] = list(rows[y])
+                row[x] = self._cell(viewer, x, y, vision)
+            for y, row in copies.items():
+                rows[y] = row
+            dirty.clear()
+        return list(rows)
+
+    def _cell(self, viewer: Team, x: int, y: int, cloud_vision: bool) -> str:
+        cell_type = self.board.cell_metadata[y][x]
+        piece = self.board.grid[y][x]
+        own = piece is not None and piece.team == viewer
+
+        if cell_type == CellType.CLOUD and not (piece and (own or cloud_vision)):
+            return "#"
+        # Squares out of sight look alike whether empty or not; the neutral view has no sight rules
+        if viewer in self.visible and not own and cell_type != CellType.LAKE \
+                and not self.visible[viewer] >> (y * self.size + x) & 1:
+            return "#"
+        if piece:
+            return piece.get_display(viewer)
+        if cell_type == CellType.LAKE:
+            return "~"
+        return ""
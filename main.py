@@ -1,8 +1,27 @@
+import contextlib
+import io
+import time
+
 from engine.board import Board
 from ai.auto_setup import AutoSetup
 from engine.game_logic import GameLogic
 from utils.constants import PieceRank, Team, GameState
 from ai.ai_bot import AIBot
+from ui.cli import TerminalRenderer, status_line
+
+
+def captured(action, *args):
+    """
+    Runs an engine call with its prints captured, so they can be shown in the frame
+    instead of being scrolled away or overwritten by it.
+
+    :return: (the call's result, the non-empty lines it printed)
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = action(*args)
+    return result, [line for line in output.getvalue().splitlines() if line.strip()]
+
 
 def main():
     # 1. Initialize the board and the referee
@@ -13,33 +32,46 @@ def main():
     setup_manager = AutoSetup(logic)
     setup_manager.deploy_all()
 
-    # 3. Initialize the AI Opponent (Playing as BLUE, Level 2)
-    ai_opponent = AIBot(Team.BLUE, logic, level=2)
+    # 3. Initialize the AI Opponent (Playing as BLUE, Level 4: searches while you think)
+    ai_opponent = AIBot(Team.BLUE, logic, level=4)
 
     print("=== Super Stratego Elite: Phase 1 (CLI Version) ===")
     print("Instructions: Enter move as 'start_x start_y end_x end_y' (e.g., 0 3 0 4)")
 
-    # 4. Game Loop
+    # 4. Renderer: redraws only the changed cells on a terminal, full frames when piped.
+    # Everything the game reports goes into its message lines, which hold the player's
+    # last move and the AI's reply until the player enters the next move.
+    renderer = TerminalRenderer()
+    messages = []
+
+    # 5. Game Loop
     while True:
-        game_board.display_terminal(logic.current_turn)
-        print(f"Current Turn: {logic.current_turn.name}")
+        # The player (RED) only ever sees their own fog-filtered view
+        renderer.render(game_board.get_view(Team.RED), status_line(logic, Team.RED), messages)
 
         # === AI TURN (BLUE) ===
         if logic.current_turn == Team.BLUE:
-            import time
-            print("🤖 AI is thinking...")
+            renderer.render(game_board.get_view(Team.RED), status_line(logic, Team.RED),
+                            messages + ["🤖 AI is thinking..."])
+            # Keep searching through the pause instead of idling
+            ai_opponent.ponder()
             time.sleep(1)
 
             ai_move = ai_opponent.get_move()
             if ai_move:
                 start_pos, end_pos = ai_move
-                logic.execute_move(start_pos, end_pos)
+                _, lines = captured(logic.execute_move, start_pos, end_pos)
+                messages += lines
             else:
-                print("🏆 AI has no legal moves left! RED WINS!")
+                renderer.render(game_board.get_view(Team.RED), status_line(logic, Team.RED),
+                                messages + ["🏆 AI has no legal moves left! RED WINS!"])
                 break
 
         # === PLAYER TURN (RED) ===
         else:
+            # The AI ponders its replies while the player types
+            ai_opponent.ponder()
+
             # Get input (format: x1 y1 x2 y2)
             try:
                 user_input = input("Enter move (start_x start_y end_x end_y) or 'q' to quit: ")
@@ -48,25 +80,31 @@ def main():
 
                 coords = list(map(int, user_input.split()))
                 if len(coords) != 4:
-                    print("Invalid input! Please enter 4 numbers.")
+                    messages = ["Invalid input! Please enter 4 numbers."]
                     continue
 
                 start_pos = (coords[0], coords[1])
                 end_pos = (coords[2], coords[3])
 
-                # Validate and Execute
-                if logic.validate_move(start_pos, end_pos):
-                    logic.execute_move(start_pos, end_pos)
+                # Validate and Execute; a new move replaces the reports of the previous turn
+                valid, messages = captured(logic.validate_move, start_pos, end_pos)
+                if valid:
+                    _, messages = captured(logic.execute_move, start_pos, end_pos)
 
             except ValueError:
-                print("Invalid input! Please enter numbers only.")
+                messages = ["Invalid input! Please enter numbers only."]
 
         # Check for Win Condition after ANY turn
         if logic.game_state == GameState.FINISHED:
-            game_board.display_terminal(logic.winner)
-            print(f"🏆 CONGRATULATIONS! Team {logic.winner.name} has won the match!")
+            if logic.winner:
+                messages.append(f"🏆 CONGRATULATIONS! Team {logic.winner.name} has won the match!")
+            else:
+                messages.append("🤝 The match ended in a draw.")
+            renderer.render(game_board.get_view(Team.RED), status_line(logic, Team.RED), messages)
             break
 
+    ai_opponent.stop_pondering()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+from utils.constants import Team
+
+
+"""Write-buffer size (bytes) above which a spectator counts as lagging and stops receiving deltas."""
+HIGH_WATER = 64 * 1024
+"""A lagging spectator gets the next keyframe once its buffer drains below this."""
+LOW_WATER = 16 * 1024
+"""Spectators whose buffer grows past this are disconnected."""
+HARD_LIMIT = 1024 * 1024
+
+
+class Spectator:
+    """One subscriber socket and its backpressure state."""
+
+    __slots__ = ("writer", "visibility", "lagging")
+
+    def __init__(self, writer, visibility: Team):
+        self.writer = writer
+        self.visibility = visibility
+        self.lagging = False
+
+    def buffered(self) -> int:
+        return self.writer.transport.get_write_buffer_size()
+
+
+class SpectatorChannel:
+    """
+    Fans one game's frames out to its spectators.
+
+    Spectators are grouped by visibility class: Team.NONE (neutral, every rank hidden),
+    Team.RED or Team.BLUE (that team's view). Each frame is encoded once by the caller and
+    the same bytes object is written to every subscriber of the class, so the per-spectator
+    cost is a buffer-size check and a socket write.
+
+    Frames are either deltas (battle results, timeouts, game over) or keyframes (full
+    board views). A spectator whose socket buffer passes HIGH_WATER stops getting deltas;
+    once it drains below LOW_WATER it resumes with the latest keyframe, so a slow reader
+    skips ahead instead of making the server buffer without limit. Final frames (the last
+    position and the game over) reach every spectator, lagging or not.
+    """
+
+    def __init__(self, game_id, high_water: int = HIGH_WATER, low_water: int = LOW_WATER,
+                 hard_limit: int = HARD_LIMIT):
+        self.game_id = game_id
+        self.high_water = high_water
+        self.low_water = low_water
+        self.hard_limit = hard_limit
+        self.subscribers = {Team.NONE: set(), Team.RED: set(), Team.BLUE: set()}
+        self.keyframes = {}        # visibility -> latest keyframe bytes
+        self.keyframe_key = None   # Position the stored keyframes belong to (set by the publisher)
+        self.dropped = 0           # Frames skipped for lagging spectators
+
+    def __len__(self):
+        return sum(len(group) for group in self.subscribers.values())
+
+    def classes(self) -> list:
+        """Visibility classes that currently have at least one spectator."""
+        return [visibility for visibility, group in self.subscribers.items() if group]
+
+    def subscribe(self, writer, visibility: Team = Team.NONE) -> Spectator:
+        spectator = Spectator(writer, visibility)
+        self.subscribers[visibility].add(spectator)
+        keyframe = self.keyframes.get(visibility)
+        if keyframe:
+            writer.write(keyframe)
+        return spectator
+
+    def unsubscribe(self, spectator: Spectator):
+        self.subscribers[spectator.visibility].discard(spectator)
+
+    def publish_delta(self, frame: bytes, final: bool = False):
+        """
+        Sends a frame that every visibility class shares; lagging spectators skip it.
+
+        :param final: The frame ends the game; nothing follows it, so no spectator skips it.
+        """
+        for group in self.subscribers.values():
+            self._fan_out(group, frame, keyframe=False, final=final)
+
+    def publish_keyframe(self, visibility: Team, frame: bytes, final: bool = False):
+        """
+        Sends a full view to one visibility class and remembers it for late joiners.
+
+        :param final: The view is the last position of the game; no spectator skips it.
+        """
+        self.keyframes[visibility] = frame
+        self._fan_out(self.subscribers[visibility], frame, keyframe=True, final=final)
+
+    def close(self):
+        """Disconnects every spectator (the game is over)."""
+        for group in self.subscribers.values():
+            for spectator in group:
+                spectator.writer.close()
+            group.clear()
+
+    def _fan_out(self, group, frame: bytes, keyframe: bool, final: bool = False):
+        slow = []
+        for spectator in group:
+            if spectator.writer.is_closing():
+                slow.append(spectator)
+                continue
+
+            buffered = spectator.buffered()
+            if final:
+                spectator.lagging = False
+            elif spectator.lagging:
+                # Resume only on a keyframe, and only once the backlog has drained
+                if not keyframe or buffered > self.low_water:
+                    self.dropped += 1
+                    continue
+                spectator.lagging = False
+            elif buffered > self.high_water:
+                spectator.lagging = True
+                self.dropped += 1
+                if buffered > self.hard_limit:
+                    slow.append(spectator)
+                continue
+
+            spectator.writer.write(frame)
+
+        for spectator in slow:
+            group.discard(spectator)
+            spectator.writer.close()
@@ -0,0 +1,61 @@
+import asyncio
+
+from network.protocol import encode_message, decode_message
+from utils.config import SERVER_HOST, SERVER_PORT, DEFAULT_RATING
+from utils.constants import Command
+
+
+class GameClient:
+    """Minimal asyncio client for the game server (used by bots, tools and simulated players)."""
+
+    def __init__(self, player_id=None, rating: int = DEFAULT_RATING):
+        self.player_id = player_id
+        self.rating = rating
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host: str = SERVER_HOST, port: int = SERVER_PORT):
+        """Opens the connection and joins the matchmaking queue."""
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        await self.send(Command.CONNECT, player_id=self.player_id, rating=self.rating)
+        command, payload = await self.receive()
+        if command != Command.CONNECT:
+            raise ConnectionError(f"Unexpected handshake reply: {command.name} {payload}")
+        self.player_id = payload["player_id"]
+        return payload
+
+    async def resync(self, last_ply=None) -> dict:
+        """
+        Asks the server for everything missed since `last_ply` after rejoining a game.
+
+        :return: RESYNC payload; apply it with network.resync.apply_resync.
+        """
+        await self.send(Command.RESYNC, ply=last_ply)
+        _, payload = await self.wait_for(Command.RESYNC)
+        return payload
+
+    async def send(self, command: Command, **payload):
+        self.writer.write(encode_message(command, **payload))
+        await self.writer.drain()
+
+    async def receive(self) -> tuple:
+        """Waits for the next message; returns (Command, payload)."""
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        return decode_message(line)
+
+    async def wait_for(self, *commands) -> tuple:
+        """Skips messages until one of the given commands arrives."""
+        while True:
+            command, payload = await self.receive()
+            if command in commands:
+                return command, payload
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
@@ -0,0 +1,292 @@
+import contextlib
+import io
+from collections import Counter
+
+from engine.board import Board
+from engine.game_logic import GameLogic
+from engine.piece import Piece
+from ai.auto_setup import AutoSetup
+from ai.ai_bot import AIBot
+from network.metrics import TRACER, MOVES, MOVES_PER_SECOND, MOVE_REJECTIONS, AI_THINK_TIME, BATTLES, GAMES_FINISHED
+from network.protocol import encode_message
+from network.resync import GameJournal, compress_view
+from utils.config import TURN_TIMEOUT_PENALTY, ARMY_COMPOSITION
+from utils.constants import CellType, Command, GameEvent, GameState, MoveResult, PieceRank, Team
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallows the engine's console output, which a server hosting many games cannot afford."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class GameRoom:
+    """
+    One hosted match. Knows nothing about sockets: every handler returns a list of
+    (Team, message bytes) pairs for the server to deliver. Messages addressed to
+    Team.NONE are shared by everyone watching the game (both players and spectators).
+    """
+
+    def __init__(self, game_id, red_player, blue_player, store=None, record_id=None):
+        """
+        :param red_player: Id of the player controlling RED.
+        :param blue_player: Id of the player controlling BLUE.
+        :param store: Optional GameStore the setups, moves and result are recorded to.
+        :param record_id: Store record of this game when it was already opened elsewhere.
+        """
+        self.game_id = game_id
+        self.players = {Team.RED: red_player, Team.BLUE: blue_player}
+        self.board = Board()
+        self.logic = GameLogic(self.board)
+        # Both players must confirm their setup before the game starts
+        self.logic.game_state = GameState.WAITING_FOR_PLAYERS
+        # Battle and result metrics follow the engine's events
+        self.logic.events.subscribe(self._on_battle, GameEvent.BATTLE_RESOLVED)
+        self.logic.events.subscribe(self._on_game_over, GameEvent.GAME_OVER)
+        self.ready = set()
+        self.layouts = {}   # Team -> [(x, y, PieceRank)] for players who deployed their own army
+        # Views and encoded UPDATE_BOARD frames of the current position, one per visibility class
+        self._views = {}
+        self._frames = {}
+        self._frames_key = None
+        # Per-ply deltas for players who reconnect
+        self.journal = GameJournal()
+        self.store = store
+        if store and record_id is None:
+            record_id = store.open_game(red_player, blue_player)
+        self.record_id = record_id
+
+    @property
+    def ply(self) -> int:
+        """Number of moves played so far (the version of the game state)."""
+        return len(self.logic.move_history)
+
+    @property
+    def state(self) -> GameState:
+        return self.logic.game_state
+
+    @property
+    def turn(self) -> Team:
+        return self.logic.current_turn
+
+    def team_of(self, player_id):
+        for team, player in self.players.items():
+            if player == player_id:
+                return team
+        return None
+
+    # ==========================================
+    # HANDLERS
+    # ==========================================
+
+    def start(self) -> list:
+        """Announces the match to both players."""
+        return [
+            (team, encode_message(Command.START_GAME, game_id=self.game_id, team=team.name,
+                                  opponent=self.players[self._other(team)]))
+            for team in self.players
+        ]
+
+    def handle_setup_done(self, team: Team, layout=None) -> list:
+        """
+        Marks a player ready; once both are, deploys the armies and sends the opening board.
+
+        :param layout: Optional own deployment as [(x, y, rank name)]; AutoSetup deploys
+                       the army of players who send none.
+        """
+        if self.logic.game_state != GameState.WAITING_FOR_PLAYERS:
+            return [(team, encode_message(Command.ERROR, reason="SETUP_CLOSED"))]
+        if layout is not None:
+            pieces = self._parse_layout(team, layout)
+            if pieces is None:
+                return [(team, encode_message(Command.ERROR, reason="BAD_LAYOUT"))]
+            self.layouts[team] = pieces
+
+        self.ready.add(team)
+        if len(self.ready) < len(self.players):
+            return []
+
+        with quiet():
+            setup = AutoSetup(self.logic)
+            for each in self.players:
+                if each in self.layouts:
+                    for x, y, rank in self.layouts[each]:
+                        self.board.place_piece(Piece(rank, each), x, y)
+                else:
+                    setup.deploy_team(each)
+        self.logic.game_state = GameState.IN_PROGRESS
+        if self.store:
+            for team in self.players:
+                self.store.record_setup(self.record_id, team, self.board)
+        return self._board_updates()
+
+    def handle_move(self, team: Team, start_pos: tuple, end_pos: tuple) -> list:
+        """Validates and executes a move sent by `team`."""
+        if self.logic.game_state != GameState.IN_PROGRESS:
+            return [(team, encode_message(Command.ERROR, reason="NOT_IN_PROGRESS"))]
+        if team != self.logic.current_turn:
+            MOVE_REJECTIONS.inc(MoveResult.WRONG_TURN.name)
+            return [(team, encode_message(Command.ERROR, reason=MoveResult.WRONG_TURN.name))]
+
+        with TRACER.span("validate"):
+            result = self.logic.check_move(start_pos, end_pos)
+        if result != MoveResult.OK:
+            MOVE_REJECTIONS.inc(result.name)
+            return [(team, encode_message(Command.ERROR, reason=result.name))]
+
+        return self._apply_move(start_pos, end_pos)
+
+    def handle_timeout(self, team: Team, penalty: str = TURN_TIMEOUT_PENALTY, move: tuple = None) -> list:
+        """
+        The player to move ran out of time.
+
+        :param penalty: "FORFEIT" ends the game; "AUTO_MOVE" plays a random legal move for them.
+        :param move: Auto-move already chosen elsewhere (e.g. by the AI service); checked before use.
+        """
+        if self.logic.game_state != GameState.IN_PROGRESS or team != self.logic.current_turn:
+            return []
+
+        messages = [(Team.NONE, encode_message(Command.TURN_TIMEOUT, team=team.name, penalty=penalty))]
+
+        if penalty != "AUTO_MOVE":
+            move = None
+        elif move is None or self.logic.check_move(*move) != MoveResult.OK:
+            with AI_THINK_TIME.time("1"):
+                move = AIBot(team, self.logic, level=1).get_move()
+        if move is None:
+            self.logic.finish_game(self._other(team), "TIMEOUT")
+            return messages + self._game_over(self.logic.winner, "TIMEOUT")
+        return messages + self._apply_move(*move)
+
+    def handle_resync(self, team: Team, last_ply) -> list:
+        """
+        Brings a reconnected player back up to date.
+
+        :param last_ply: Last ply the client applied (None if it never received a board).
+        :return: One RESYNC message: the squares that changed since `last_ply` (mode DELTA),
+                 or the whole view compressed (mode SNAPSHOT) when the journal no longer
+                 reaches back that far.
+        """
+        if self.logic.game_state == GameState.WAITING_FOR_PLAYERS:
+            return [(team, encode_message(Command.RESYNC, mode="WAITING", ply=None, ready=team in self.ready))]
+
+        ply = len(self.logic.move_history)
+        view = self.view(team)
+        changed = self.journal.changes_since(last_ply, team) if last_ply is not None else None
+        if changed is None:
+            message = encode_message(Command.RESYNC, mode="SNAPSHOT", ply=ply, turn=self.logic.current_turn.name,
+                                     state=self.logic.game_state.name, data=compress_view(view))
+        else:
+            cells = [(x, y, view[y][x]) for x, y in sorted(changed)]
+            message = encode_message(Command.RESYNC, mode="DELTA", ply=ply, turn=self.logic.current_turn.name,
+                                     state=self.logic.game_state.name, cells=cells)
+        return [(team, message)]
+
+    def handle_disconnect(self, team: Team) -> list:
+        """A player leaving an unfinished game forfeits it."""
+        if self.logic.game_state == GameState.FINISHED:
+            return []
+        self.logic.finish_game(self._other(team), "FORFEIT")
+        return self._game_over(self.logic.winner, "FORFEIT")
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    @staticmethod
+    def _on_battle(event):
+        BATTLES.inc(event.data["outcome"])
+
+    @staticmethod
+    def _on_game_over(event):
+        GAMES_FINISHED.inc(event.data["reason"])
+
+    @staticmethod
+    def _other(team: Team) -> Team:
+        return Team.BLUE if team == Team.RED else Team.RED
+
+    def _parse_layout(self, team: Team, layout) -> list:
+        """
+        Checks a player's own deployment: a full army, inside their territory, off the lakes.
+
+        :return: [(x, y, PieceRank)], or None if the layout is not acceptable.
+        """
+        rows = AutoSetup.territory(team)
+        try:
+            pieces = [(int(x), int(y), PieceRank[rank]) for x, y, rank in layout]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        squares = {(x, y) for x, y, _ in pieces}
+        if len(squares) != len(pieces):
+            return None
+        for x, y, _ in pieces:
+            if not 0 <= x < self.board.size or y not in rows or self.board.cell_metadata[y][x] == CellType.LAKE:
+                return None
+        if Counter(rank.name for _, _, rank in pieces) != Counter(ARMY_COMPOSITION):
+            return None
+        return pieces
+
+    def _apply_move(self, start_pos: tuple, end_pos: tuple) -> list:
+        """Executes an already validated move and builds the resulting messages."""
+        with quiet(), TRACER.span("execute"):
+            report = self.logic.execute_move(start_pos, end_pos)
+        MOVES.inc()
+        MOVES_PER_SECOND.mark()
+        if self.store:
+            self.store.record_move(self.record_id, len(self.logic.move_history) - 1, report)
+
+        messages = []
+        if report["battle"]:
+            # Blind combat: both sides learn where the battle was and who survived, never the ranks
+            messages.append((Team.NONE, encode_message(Command.BATTLE_RESULT, start=start_pos, end=end_pos,
+                                                       attacker=report["attacker_team"],
+                                                       outcome=report["outcome"])))
+        with TRACER.span("encode"):
+            messages += self._board_updates()
+        if self.logic.game_state == GameState.FINISHED:
+            messages += self._game_over(self.logic.winner, self.logic.finish_reason or "FLAG_CAPTURED")
+        return messages
+
+    def board_frame(self, visibility: Team) -> bytes:
+        """
+        UPDATE_BOARD message of the current position as seen by `visibility`
+        (Team.NONE for neutral spectators). Encoded once per position and class.
+        """
+        frame = self._frames.get(visibility) if self._frames_current() else None
+        if frame is None:
+            frame = self._frames[visibility] = encode_message(
+                Command.UPDATE_BOARD, ply=self._frames_key[0], turn=self.logic.current_turn.name,
+                view=self.view(visibility))
+        return frame
+
+    def view(self, visibility: Team) -> list:
+        """Board.get_view of the current position, computed once per position and class."""
+        view = self._views.get(visibility) if self._frames_current() else None
+        if view is None:
+            view = self._views[visibility] = self.board.get_view(visibility)
+        return view
+
+    def _frames_current(self) -> bool:
+        """Drops the cached views and frames once the position has changed."""
+        key = (len(self.logic.move_history), self.logic.game_state)
+        if key == self._frames_key:
+            return True
+        self._views = {}
+        self._frames = {}
+        self._frames_key = key
+        return False
+
+    def _board_updates(self) -> list:
+        """Sends each player their own fog-filtered view and journals what changed."""
+        ply = len(self.logic.move_history)
+        if self.journal.ply != ply:
+            self.journal.record(ply, {team: self.view(team) for team in self.players})
+        return [(team, self.board_frame(team)) for team in self.players]
+
+    def _game_over(self, winner: Team, reason: str) -> list:
+        if self.store:
+            self.store.finish_game(self.record_id, winner, reason, len(self.logic.move_history))
+        message = encode_message(Command.GAME_OVER, winner=winner.name if winner else None, reason=reason)
+        return [(Team.NONE, message)]
@@ -0,0 +1,402 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import sys
+import time
+
+from engine.board import Board
+from engine.game_logic import GameLogic
+from engine.piece import Piece
+from ai.ai_bot import AIBot
+from ai.auto_setup import AutoSetup
+from network.client import GameClient
+from network.game_room import quiet
+from network.persistence import setup_layout
+from utils.config import SERVER_HOST
+from utils.constants import Command, PieceRank, Team
+
+
+"""Seconds between samples of the server's memory use."""
+MEMORY_SAMPLE_INTERVAL = 0.5
+"""Longest time (seconds) the started server may take to begin listening."""
+SERVER_START_TIMEOUT = 60
+"""Longest time (seconds) to wait for the idle server's memory to settle before taking the baseline."""
+SETTLE_TIMEOUT = 15
+
+
+def milliseconds(seconds):
+    """Seconds to rounded milliseconds, passing None through."""
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def percentile(sorted_values: list, fraction: float):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def rss_bytes(pid: int):
+    """Resident memory of a process, read from /proc (None where that is unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def child_pids(pid: int) -> list:
+    """Direct children of a process, from /proc (its children files, or every process' parent where those are missing)."""
+    try:
+        children = []
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as listing:
+                children += [int(child) for child in listing.read().split()]
+        return children
+    except OSError:
+        pass
+
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name can hold spaces and parentheses; the parent pid follows its last ")"
+                if int(stat.read().rsplit(")", 1)[1].split()[1]) == pid:
+                    children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def tree_rss_bytes(pid: int):
+    """Resident memory of a process and all its descendants (e.g. a sharded server's shards)."""
+    total = rss_bytes(pid)
+    if total is None:
+        return None
+    pending = child_pids(pid)
+    while pending:
+        child = pending.pop()
+        total += rss_bytes(child) or 0
+        pending += child_pids(child)
+    return total
+
+
+def raise_file_limit():
+    """Thousands of sockets need more descriptors than the usual soft limit of 1024."""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+# ==========================================
+# SIMULATED PLAYER
+# ==========================================
+
+class SimulatedPlayer:
+    """
+    One scripted client: deploys an AutoSetup layout, then plays an AIBot policy from
+    its own fog-filtered view until `max_plies` or the end of the game, timing every
+    move from MOVE sent to the resulting UPDATE_BOARD received.
+    """
+
+    def __init__(self, player_id, level: int, max_plies: int):
+        self.player_id = player_id
+        self.level = level
+        self.max_plies = max_plies
+        self.latencies = []   # Seconds per acknowledged move
+        self.rejected = 0
+        self.finished = False
+        # Scratch engine the bot reasons on, refilled from each view
+        self.board = Board()
+        self.logic = GameLogic(self.board)
+
+    async def play(self, host: str, port: int):
+        client = GameClient(self.player_id)
+        await client.connect(host, port)
+        try:
+            _, start = await client.wait_for(Command.START_GAME)
+            team = Team[start["team"]]
+            await client.send(Command.SETUP_DONE, layout=self._layout(team))
+
+            view = None
+            sent_at = None
+            while True:
+                command, payload = await client.wait_for(Command.UPDATE_BOARD, Command.GAME_OVER, Command.ERROR)
+                if command == Command.GAME_OVER:
+                    self.finished = True
+                    break
+                if command == Command.ERROR:
+                    self.rejected += 1
+                    if view is None:
+                        break  # Setup refused
+                    # Our view can be fogged; fall back to a random move
+                    move = self._choose(team, view, level=1)
+                    if move is None:
+                        break
+                    sent_at = time.perf_counter()
+                    await client.send(Command.MOVE, **move)
+                    continue
+
+                if sent_at is not None:
+                    self.latencies.append(time.perf_counter() - sent_at)
+                    sent_at = None
+                view = payload["view"]
+                if payload["ply"] >= self.max_plies:
+                    break
+                if payload["turn"] == team.name:
+                    move = self._choose(team, view, self.level)
+                    if move is None:
+                        break
+                    sent_at = time.perf_counter()
+                    await client.send(Command.MOVE, **move)
+        finally:
+            await client.close()
+
+    def _layout(self, team: Team) -> list:
+        with quiet():
+            AutoSetup(self.logic).deploy_team(team)
+        layout = setup_layout(self.board, team)
+        self.board.load_grid([[None] * self.board.size for _ in range(self.board.size)])
+        return layout
+
+    def _choose(self, team: Team, view, level: int):
+        """Rebuilds a board from the view (enemy ranks UNKNOWN) and asks the bot for a move."""
+        grid = [[None] * self.board.size for _ in range(self.board.size)]
+        for y, row in enumerate(view):
+            for x, cell in enumerate(row):
+                if cell not in ("", "~", "#"):
+                    code = cell[1:]
+                    rank = PieceRank(int(code)) if code.isdigit() else PieceRank(code)
+                    grid[y][x] = Piece(rank, Team.RED if cell[0] == "R" else Team.BLUE, (x, y))
+        self.board.load_grid(grid)
+        self.logic.current_turn = team
+        move = AIBot(team, self.logic, level=level).get_move()
+        return {"start": move[0], "end": move[1]} if move else None
+
+
+async def _run_players(players, host: str, port: int, ramp: float):
+    async def start(player, delay):
+        await asyncio.sleep(delay)
+        try:
+            await player.play(host, port)
+        except (ConnectionError, OSError):
+            return False
+        return True
+
+    spacing = ramp / max(1, len(players))
+    results = await asyncio.gather(*(start(player, index * spacing) for index, player in enumerate(players)))
+    return results.count(False)
+
+
+def _client_worker(args) -> dict:
+    """Runs one process' share of the clients; returns their raw measurements."""
+    names, levels, max_plies, host, port, ramp, seed = args
+    raise_file_limit()
+    random.seed(seed)
+    players = [SimulatedPlayer(name, levels[index % len(levels)], max_plies) for index, name in enumerate(names)]
+    errors = asyncio.run(_run_players(players, host, port, ramp))
+    return {
+        "latencies": [latency for player in players for latency in player.latencies],
+        "rejected": sum(player.rejected for player in players),
+        "finished": sum(player.finished for player in players),
+        "errors": errors,
+    }
+
+
+# ==========================================
+# SERVER UNDER TEST
+# ==========================================
+
+def _serve(host: str, port: int, shards: int, ready):
+    raise_file_limit()
+    with quiet():
+        if shards:
+            from network.sharding import ShardedGameServer
+            server = ShardedGameServer(host, port, shards=shards)
+        else:
+            from network.server import GameServer
+            server = GameServer(host, port)
+
+        async def run():
+            await server.start()
+            ready.put(server.port)
+            # Serve until terminated, then stop cleanly so a sharded server joins its shards
+            stopping = asyncio.Event()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+            await stopping.wait()
+            await server.stop()
+
+        asyncio.run(run())
+
+
+class LoadTest:
+    """
+    Capacity benchmark: many simulated clients play full games against one server over
+    localhost. Clients are spread over `client_procs` processes so the bots' thinking does
+    not compete with the server's event loop. The result is a flat dict (see run) meant to
+    be stored as JSON and compared across releases.
+    """
+
+    def __init__(self, clients: int = 1000, levels=(1, 2), max_plies: int = 200, client_procs: int = None,
+                 host: str = SERVER_HOST, port: int = None, shards: int = 0, ramp: float = 5.0, seed: int = None):
+        """
+        :param clients: Number of simulated players (two per game).
+        :param levels: AIBot levels, assigned to clients round-robin.
+        :param max_plies: Players leave once a game reaches this many moves.
+        :param port: Port of an already running server; None starts one (in its own process).
+        :param shards: Shard processes for the started server (0 = single-process GameServer).
+        :param ramp: Seconds over which the clients connect.
+        """
+        self.clients = clients
+        self.levels = list(levels)
+        self.max_plies = max_plies
+        self.client_procs = client_procs or max(1, (os.cpu_count() or 2) - 1)
+        self.host = host
+        self.port = port
+        self.shards = shards
+        self.ramp = ramp
+        self.seed = seed if seed is not None else random.randrange(1 << 30)
+
+    def run(self) -> dict:
+        context = multiprocessing.get_context("spawn")
+        server_process = None
+        port = self.port
+        try:
+            if port is None:
+                ready = context.Queue()
+                # Not a daemon: a sharded server has to start shard processes of its own
+                server_process = context.Process(target=_serve, args=(self.host, 0, self.shards, ready))
+                server_process.start()
+                port = self._wait_for_server(server_process, ready)
+
+            server_pid = server_process.pid if server_process else None
+            # Games of a sharded server live in its shard processes, so the whole process tree is measured
+            baseline = self._settled_rss(server_pid) if server_pid else None
+            peak = baseline
+
+            names = [f"load-{index}" for index in range(self.clients)]
+            shares = [names[index::self.client_procs] for index in range(self.client_procs)]
+            jobs = [(share, self.levels, self.max_plies, self.host, port, self.ramp, self.seed + index)
+                    for index, share in enumerate(shares) if share]
+
+            started = time.perf_counter()
+            with context.Pool(len(jobs)) as pool:
+                pending = pool.map_async(_client_worker, jobs)
+                while not pending.ready():
+                    pending.wait(MEMORY_SAMPLE_INTERVAL)
+                    if server_pid:
+                        rss = tree_rss_bytes(server_pid)
+                        if rss and (peak is None or rss > peak):
+                            peak = rss
+                results = pending.get()
+            duration = time.perf_counter() - started
+        finally:
+            if server_process:
+                server_process.terminate()
+                server_process.join()
+        return self._report(results, duration, baseline, peak)
+
+    @staticmethod
+    def _wait_for_server(server_process, ready) -> int:
+        """
+        Waits for the started server to report its port.
+
+        :raises RuntimeError: If the server process dies or does not start in time.
+        """
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                return ready.get(timeout=MEMORY_SAMPLE_INTERVAL)
+            except queue.Empty:
+                if not server_process.is_alive():
+                    raise RuntimeError(f"Server process exited during startup (exit code {server_process.exitcode}).")
+        raise RuntimeError(f"Server did not start listening within {SERVER_START_TIMEOUT} seconds.")
+
+    @staticmethod
+    def _settled_rss(pid: int):
+        """
+        Memory of the idle server, once it stops growing: shards still start up and import
+        the engine after the front already listens.
+        """
+        deadline = time.monotonic() + SETTLE_TIMEOUT
+        rss = tree_rss_bytes(pid)
+        while rss and time.monotonic() < deadline:
+            time.sleep(MEMORY_SAMPLE_INTERVAL)
+            previous, rss = rss, tree_rss_bytes(pid)
+            if rss is None or abs(rss - previous) < previous / 100:
+                break
+        return rss
+
+    def _report(self, results: list, duration: float, baseline, peak) -> dict:
+        latencies = sorted(latency for result in results for latency in result["latencies"])
+        games = self.clients // 2
+
+        return {
+            "clients": self.clients,
+            "games": games,
+            "levels": self.levels,
+            "max_plies": self.max_plies,
+            "shards": self.shards,
+            "client_procs": self.client_procs,
+            "duration_s": round(duration, 3),
+            "moves": len(latencies),
+            "moves_per_sec": round(len(latencies) / duration, 1) if duration else None,
+            "rejected_moves": sum(result["rejected"] for result in results),
+            "games_finished": sum(result["finished"] for result in results) // 2,
+            "client_errors": sum(result["errors"] for result in results),
+            "latency_ms": {
+                "p50": milliseconds(percentile(latencies, 0.50)),
+                "p95": milliseconds(percentile(latencies, 0.95)),
+                "p99": milliseconds(percentile(latencies, 0.99)),
+                "max": milliseconds(latencies[-1] if latencies else None),
+                "mean": milliseconds(sum(latencies) / len(latencies) if latencies else None),
+            },
+            "server_rss_mb": {
+                "baseline": round(baseline / 2**20, 1) if baseline else None,
+                "peak": round(peak / 2**20, 1) if peak else None,
+            },
+            # Every game is live at the peak, so the growth over the idle server is what the games cost
+            "memory_per_game_kb": round((peak - baseline) / games / 1024, 1) if baseline and peak and games else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the game server with simulated clients.")
+    parser.add_argument("--clients", type=int, default=1000, help="Simulated players (two per game)")
+    parser.add_argument("--levels", default="1,2", help="Comma-separated AIBot levels for the clients")
+    parser.add_argument("--max-plies", type=int, default=200, help="Players leave once a game is this long")
+    parser.add_argument("--client-procs", type=int, default=None, help="Processes running the clients")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=None, help="Target a running server instead of starting one")
+    parser.add_argument("--shards", type=int, default=0, help="Shard processes for the started server")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which clients connect")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    test = LoadTest(args.clients, [int(level) for level in args.levels.split(",")], args.max_plies,
+                    args.client_procs, args.host, args.port, args.shards, args.ramp, args.seed)
+    report = json.dumps(test.run(), indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    print(report, file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
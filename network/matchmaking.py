@@ -0,0 +1,188 @@
+import bisect
+import itertools
+import time
+from collections import OrderedDict
+
+from utils.config import (DEFAULT_RATING, MATCHMAKING_BUCKET_WIDTH, MATCHMAKING_INITIAL_WINDOW,
+                          MATCHMAKING_WIDEN_RATE, MATCHMAKING_MAX_WINDOW)
+
+
+class Ticket:
+    """A player waiting in the matchmaking queue."""
+
+    def __init__(self, player_id, rating: int, joined_at: float):
+        self.player_id = player_id
+        self.rating = rating
+        self.joined_at = joined_at
+
+
+class Match:
+    """Two tickets the matchmaker decided to pair, plus the id of the game they will play."""
+
+    def __init__(self, game_id: int, red: Ticket, blue: Ticket, created_at: float):
+        self.game_id = game_id
+        self.red = red
+        self.blue = blue
+        self.created_at = created_at
+
+    def __repr__(self):
+        return f"Match({self.game_id}: {self.red.player_id} vs {self.blue.player_id})"
+
+
+class MatchmakingService:
+    """
+    In-process matchmaking queue for the game server.
+
+    Waiting players sit in rating buckets (FIFO inside each bucket). A sorted list of
+    non-empty bucket indices lets the nearest opponent be found with a binary search.
+    The rating difference a player accepts starts small and widens the longer they wait.
+    New players are paired immediately when possible; tick() retries everyone else,
+    oldest first, with their widened windows.
+    """
+
+    def __init__(self, bucket_width: int = MATCHMAKING_BUCKET_WIDTH,
+                 initial_window: int = MATCHMAKING_INITIAL_WINDOW,
+                 widen_rate: float = MATCHMAKING_WIDEN_RATE,
+                 max_window: int = MATCHMAKING_MAX_WINDOW,
+                 clock=time.monotonic):
+        """
+        :param clock: Function returning the current time in seconds (replaceable in tests).
+        """
+        self.bucket_width = bucket_width
+        self.initial_window = initial_window
+        self.widen_rate = widen_rate
+        self.max_window = max_window
+        self.clock = clock
+
+        self.buckets = {}            # bucket index -> OrderedDict(player_id -> Ticket)
+        self.active_buckets = []     # sorted indices of non-empty buckets
+        self.tickets = OrderedDict() # player_id -> Ticket, oldest first
+        self._game_ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.tickets)
+
+    # ==========================================
+    # QUEUE MANAGEMENT
+    # ==========================================
+
+    def enqueue(self, player_id, rating: int = DEFAULT_RATING):
+        """
+        Adds a player to the queue, pairing them straight away if someone suitable is waiting.
+
+        :return: A Match if the player was paired, otherwise None.
+        """
+        if player_id in self.tickets:
+            self.cancel(player_id)
+
+        ticket = Ticket(player_id, rating, self.clock())
+        opponent = self._find_opponent(ticket, self.initial_window)
+        if opponent:
+            self._remove(opponent)
+            return self._create_match(opponent, ticket)
+
+        self._insert(ticket)
+        return None
+
+    def cancel(self, player_id) -> bool:
+        """Removes a waiting player (e.g. on disconnect). Returns False if they were not queued."""
+        ticket = self.tickets.get(player_id)
+        if ticket is None:
+            return False
+        self._remove(ticket)
+        return True
+
+    def tick(self) -> list:
+        """
+        Retries every waiting player with their current (widened) window, oldest first.
+
+        :return: List of new Match objects.
+        """
+        matches = []
+        now = self.clock()
+        for ticket in list(self.tickets.values()):
+            if ticket.player_id not in self.tickets:
+                continue  # Already paired earlier in this tick
+            opponent = self._find_opponent(ticket, self.window_for(ticket, now))
+            if opponent:
+                self._remove(ticket)
+                self._remove(opponent)
+                matches.append(self._create_match(ticket, opponent))
+        return matches
+
+    def window_for(self, ticket: Ticket, now: float = None) -> float:
+        """Rating difference this ticket currently accepts."""
+        waited = (self.clock() if now is None else now) - ticket.joined_at
+        return min(self.initial_window + waited * self.widen_rate, self.max_window)
+
+    # ==========================================
+    # INTERNALS
+    # ==========================================
+
+    def _bucket_of(self, rating) -> int:
+        return int(rating // self.bucket_width)
+
+    def _insert(self, ticket: Ticket):
+        index = self._bucket_of(ticket.rating)
+        bucket = self.buckets.get(index)
+        if bucket is None:
+            bucket = self.buckets[index] = OrderedDict()
+            bisect.insort(self.active_buckets, index)
+        bucket[ticket.player_id] = ticket
+        self.tickets[ticket.player_id] = ticket
+
+    def _remove(self, ticket: Ticket):
+        index = self._bucket_of(ticket.rating)
+        bucket = self.buckets[index]
+        del bucket[ticket.player_id]
+        del self.tickets[ticket.player_id]
+        if not bucket:
+            del self.buckets[index]
+            del self.active_buckets[bisect.bisect_left(self.active_buckets, index)]
+
+    def _find_opponent(self, ticket: Ticket, window: float):
+        """
+        Returns the closest-rated waiting ticket within window (the oldest one wins ties),
+        or None. Only buckets that overlap the window, nearest first, are visited.
+        """
+        low = self._bucket_of(ticket.rating - window)
+        high = self._bucket_of(ticket.rating + window)
+        center = self._bucket_of(ticket.rating)
+
+        # Walk outwards from the player's own bucket, always visiting the side that could be closer
+        active = self.active_buckets
+        right = bisect.bisect_left(active, center)
+        left = right - 1
+        best = None
+        best_diff = window
+
+        while True:
+            # Smallest rating difference any ticket in the next bucket on each side could have
+            right_gap = active[right] * self.bucket_width - ticket.rating \
+                if right < len(active) and active[right] <= high else None
+            left_gap = ticket.rating - (active[left] + 1) * self.bucket_width \
+                if left >= 0 and active[left] >= low else None
+            if right_gap is None and left_gap is None:
+                break
+
+            if left_gap is None or (right_gap is not None and right_gap <= left_gap):
+                index, gap = active[right], right_gap
+                right += 1
+            else:
+                index, gap = active[left], left_gap
+                left -= 1
+            if best is not None and gap >= best_diff:
+                break
+
+            for other in self.buckets[index].values():
+                if other.player_id == ticket.player_id:
+                    continue
+                diff = abs(other.rating - ticket.rating)
+                if diff <= best_diff and (best is None or diff < best_diff):
+                    best, best_diff = other, diff
+        return best
+
+    def _create_match(self, first: Ticket, second: Ticket) -> Match:
+        # The player who waited longer moves first (RED always starts)
+        red, blue = (first, second) if first.joined_at <= second.joined_at else (second, first)
+        return Match(next(self._game_ids), red, blue, self.clock())
@@ -0,0 +1,328 @@
+import abc
+import bisect
+import contextlib
+import contextvars
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from utils.config import METRICS_HOST, TRACE_BUFFER_SIZE
+
+
+"""Default histogram buckets (seconds), from sub-millisecond moves to slow AI turns."""
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# ==========================================
+# METRIC TYPES
+# ==========================================
+
+class Metric(abc.ABC):
+    """Base of every metric: a name, a help text and optional label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abc.abstractmethod
+    def _samples(self) -> list:
+        """Sample lines of the metric in the Prometheus text format."""
+
+
+class Counter(Metric):
+    """Monotonic count, optionally split by labels: inc() or inc("PATH_BLOCKED")."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        super().__init__(name, help_text, labels)
+        self.values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self.values.get(label_values, 0)
+
+    def _samples(self) -> list:
+        if not self.label_names and not self.values:
+            return [f"{self.name} 0"]
+        return [f"{self.name}{_labels(self.label_names, key)} {value}" for key, value in list(self.values.items())]
+
+
+class Gauge(Metric):
+    """Current value, either set directly or read from a function at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, function=None):
+        super().__init__(name, help_text)
+        self.current = 0
+        self.function = function
+
+    def set(self, value: float):
+        self.current = value
+
+    def set_function(self, function):
+        """:param function: Called on every scrape; returns the value (e.g. a queue length)."""
+        self.function = function
+
+    def value(self) -> float:
+        return self.function() if self.function else self.current
+
+    def _samples(self) -> list:
+        return [f"{self.name} {self.value()}"]
+
+
+class Rate(Gauge):
+    """Events per second over a sliding window of one-second slots (e.g. moves/sec)."""
+
+    def __init__(self, name: str, help_text: str, window: int = 10, clock=time.monotonic):
+        super().__init__(name, help_text)
+        self.window = window
+        self.clock = clock
+        self.slots = deque()   # [second, count], oldest first
+
+    def mark(self, count: int = 1):
+        second = int(self.clock())
+        if self.slots and self.slots[-1][0] == second:
+            self.slots[-1][1] += count
+        else:
+            self.slots.append([second, count])
+            while self.slots[0][0] <= second - self.window:
+                self.slots.popleft()
+
+    def value(self) -> float:
+        # Only full seconds count, so a fresh slot does not drag the rate down
+        now = int(self.clock())
+        total = sum(count for second, count in list(self.slots) if now - self.window <= second < now)
+        return round(total / self.window, 3)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.bounds = tuple(sorted(buckets))
+        self.series = {}   # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.bounds) + 2)
+        index = bisect.bisect_left(self.bounds, value)
+        if index < len(self.bounds):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextlib.contextmanager
+    def time(self, *label_values):
+        """Observes the duration of the with-block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def _samples(self) -> list:
+        lines = []
+        for key, series in list(self.series.items()):
+            labels = _labels(self.label_names, key)
+            cumulative = 0
+            for bound, count in zip(self.bounds, series):
+                cumulative += count
+                bucket_labels = _labels(self.label_names, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Ordered set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, function=None) -> Gauge:
+        return self.register(Gauge(name, help_text, function))
+
+    def rate(self, name: str, help_text: str, window: int = 10) -> Rate:
+        return self.register(Rate(name, help_text, window))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ==========================================
+# TRACING
+# ==========================================
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Tracer:
+    """
+    Optional per-move trace spans (decode -> validate -> execute -> fan-out).
+
+    trace() opens a trace for one request; span() records a timed step into the trace
+    open in the current context and is a no-op otherwise, so instrumented code costs
+    next to nothing while tracing is off. Finished traces are kept in a ring buffer and
+    served as JSON on /traces.
+    """
+
+    def __init__(self, capacity: int = TRACE_BUFFER_SIZE, enabled: bool = False, sample_rate: float = 1.0):
+        """
+        :param sample_rate: Fraction of requests traced while enabled.
+        """
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.traces = deque(maxlen=capacity)
+
+    @contextlib.contextmanager
+    def trace(self, name: str, **attributes):
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield None
+            return
+        started = time.perf_counter()
+        trace = {"name": name, "attributes": attributes, "start": time.time(), "spans": [], "_origin": started}
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            trace["duration_ms"] = round((time.perf_counter() - started) * 1000, 4)
+            del trace["_origin"]
+            _current_trace.reset(token)
+            self.traces.append(trace)
+
+    def span(self, name: str):
+        """Times a step of the current trace (a shared no-op context when nothing is traced)."""
+        trace = _current_trace.get()
+        if trace is None:
+            return contextlib.nullcontext()
+        return self._span(trace, name)
+
+    @contextlib.contextmanager
+    def _span(self, trace: dict, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            trace["spans"].append({"name": name,
+                                   "offset_ms": round((started - trace["_origin"]) * 1000, 4),
+                                   "duration_ms": round((time.perf_counter() - started) * 1000, 4)})
+
+    @staticmethod
+    def annotate(**attributes):
+        """Adds attributes (e.g. the game id, once it is known) to the current trace."""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["attributes"].update(attributes)
+
+    def recent(self, game_id=None, limit: int = 50) -> list:
+        traces = [trace for trace in list(self.traces)
+                  if game_id is None or str(trace["attributes"].get("game_id")) == str(game_id)]
+        return traces[-limit:]
+
+
+# ==========================================
+# PROCESS-WIDE METRICS
+# ==========================================
+
+REGISTRY = Registry()
+TRACER = Tracer()
+
+ACTIVE_GAMES = REGISTRY.gauge("stratego_active_games", "Games currently hosted.")
+CONNECTIONS = REGISTRY.gauge("stratego_connections", "Connected players.")
+MOVES = REGISTRY.counter("stratego_moves_total", "Moves executed.")
+MOVES_PER_SECOND = REGISTRY.rate("stratego_moves_per_second", "Moves executed per second over the last 10 seconds.")
+BATTLES = REGISTRY.counter("stratego_battles_total", "Battles resolved.", ("outcome",))
+GAMES_FINISHED = REGISTRY.counter("stratego_games_finished_total", "Games that ended.", ("reason",))
+MOVE_REJECTIONS = REGISTRY.counter("stratego_move_rejections_total", "Moves refused by validation.", ("reason",))
+MOVE_LATENCY = REGISTRY.histogram("stratego_move_handling_seconds", "Time from decoding a MOVE to its fan-out.")
+AI_THINK_TIME = REGISTRY.histogram("stratego_ai_think_seconds", "Time the AI took to pick a move.", ("level",))
+MATCHMAKING_QUEUE = REGISTRY.gauge("stratego_matchmaking_queue_depth", "Players waiting for an opponent.")
+PERSISTENCE_QUEUE = REGISTRY.gauge("stratego_persistence_queue_depth", "Game events not yet written to disk.")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+    tracer = TRACER
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            body = self.registry.render().encode()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif url.path == "/traces":
+            game_id = parse_qs(url.query).get("game_id", [None])[0]
+            body = json.dumps(self.tracer.recent(game_id)).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+def start_metrics_server(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """
+    Serves /metrics (Prometheus text format) and /traces (JSON) from a daemon thread,
+    so it works the same next to an asyncio loop or a blocking shard loop.
+
+    :return: The HTTP server (server_address holds the bound port; shutdown() stops it).
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
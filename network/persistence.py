@@ -0,0 +1,367 @@
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+
+from engine.board import Board
+from engine.game_logic import GameLogic
+from engine.piece import Piece
+from network.game_room import quiet
+from utils.config import PERSISTENCE_PATH, PERSISTENCE_BATCH_SIZE, PERSISTENCE_FLUSH_INTERVAL
+from utils.constants import GameState, PieceRank, Team
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id     INTEGER PRIMARY KEY,
+    red_player  TEXT NOT NULL,
+    blue_player TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    winner      TEXT,
+    reason      TEXT,
+    plies       INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_by_red ON games (red_player, started_at);
+CREATE INDEX IF NOT EXISTS games_by_blue ON games (blue_player, started_at);
+CREATE INDEX IF NOT EXISTS games_by_date ON games (started_at);
+CREATE INDEX IF NOT EXISTS games_unfinished ON games (game_id) WHERE finished_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS setups (
+    game_id INTEGER NOT NULL,
+    team    TEXT NOT NULL,
+    layout  TEXT NOT NULL,
+    PRIMARY KEY (game_id, team)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS moves (
+    game_id       INTEGER NOT NULL,
+    ply           INTEGER NOT NULL,
+    start_x       INTEGER NOT NULL,
+    start_y       INTEGER NOT NULL,
+    end_x         INTEGER NOT NULL,
+    end_y         INTEGER NOT NULL,
+    attacker_rank TEXT NOT NULL,
+    defender_rank TEXT,
+    outcome       TEXT,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+"""
+
+INSERT_GAME = "INSERT INTO games (game_id, red_player, blue_player, started_at) VALUES (?, ?, ?, ?)"
+INSERT_SETUP = "INSERT OR REPLACE INTO setups (game_id, team, layout) VALUES (?, ?, ?)"
+INSERT_MOVE = "INSERT OR REPLACE INTO moves VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+FINISH_GAME = "UPDATE games SET finished_at = ?, winner = ?, reason = ?, plies = ? WHERE game_id = ?"
+
+_STOP = object()
+
+
+def setup_layout(board: Board, team: Team) -> list:
+    """Positions of a team's pieces as [(x, y, rank name)]."""
+    return [(x, y, piece.rank.name)
+            for y, row in enumerate(board.grid) for x, piece in enumerate(row)
+            if piece and piece.team == team]
+
+
+class GameStore:
+    """
+    Write-behind store of game records (players, setups, moves, results) in SQLite.
+
+    The record_* methods only put an event on an in-memory queue, so the game loop never
+    waits for the disk. A background thread drains the queue and commits events in
+    batches of up to `batch_size`, one transaction per batch. Events are written in the
+    order they were queued by a single writer, so after a crash the database always
+    holds a consistent prefix of the event stream; recover() then closes the games that
+    never got their result.
+
+    Reads (games_for_player, load_game, replay) only see flushed events; call flush()
+    first when that matters.
+    """
+
+    def __init__(self, path: str = PERSISTENCE_PATH, batch_size: int = PERSISTENCE_BATCH_SIZE,
+                 flush_interval: float = PERSISTENCE_FLUSH_INTERVAL):
+        """
+        :param flush_interval: Longest time an event waits for more events before its batch is committed.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.events = queue.Queue()
+        self.written = 0    # Events committed so far
+        self.batches = 0    # Transactions committed so far
+        self.failed = 0     # Events lost to database errors
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Ids are handed out here, without a round trip to the worker
+            self._next_id = conn.execute("SELECT COALESCE(MAX(game_id), 0) + 1 FROM games").fetchone()[0]
+        conn.close()
+        self._id_lock = threading.Lock()
+
+        self._worker = threading.Thread(target=self._run, name="game-store", daemon=True)
+        self._worker.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: a committed batch survives a process crash; only an OS crash can lose the last ones
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def pending(self) -> int:
+        """Events queued but not yet committed."""
+        return self.events.qsize()
+
+    # ==========================================
+    # RECORDING (never blocks)
+    # ==========================================
+
+    def open_game(self, red_player, blue_player) -> int:
+        """
+        Starts a game record.
+
+        :return: Record id, unique across server restarts, for the other record_* calls.
+        """
+        with self._id_lock:
+            game_id = self._next_id
+            self._next_id += 1
+        self.events.put((INSERT_GAME, (game_id, str(red_player), str(blue_player), time.time())))
+        return game_id
+
+    def record_setup(self, game_id: int, team: Team, board: Board):
+        """Stores where `team` deployed its pieces."""
+        self.record_layout(game_id, team, setup_layout(board, team))
+
+    def record_layout(self, game_id: int, team: Team, layout: list):
+        """
+        :param layout: [(x, y, rank name)] as built by setup_layout.
+        """
+        self.events.put((INSERT_SETUP, (game_id, team.name, json.dumps(layout))))
+
+    def record_move(self, game_id: int, ply: int, report: dict):
+        """
+        Stores one executed move.
+
+        :param ply: Number of the move within the game (0 for the first).
+        :param report: Report returned by GameLogic.execute_move.
+        """
+        (sx, sy), (ex, ey) = report["start"], report["end"]
+        self.events.put((INSERT_MOVE, (game_id, ply, sx, sy, ex, ey, report["attacker_rank"],
+                                       report.get("defender_rank"), report.get("outcome"))))
+
+    def finish_game(self, game_id: int, winner, reason: str, plies: int):
+        """
+        :param winner: Winning Team (None for a draw or an aborted game).
+        """
+        self.events.put((FINISH_GAME, (time.time(), winner.name if winner else None, reason, plies, game_id)))
+
+    def flush(self):
+        """Blocks until every queued event has been committed."""
+        self.events.join()
+
+    def close(self):
+        """Flushes the queue and stops the worker."""
+        if not self._worker.is_alive():
+            return
+        self.events.put(_STOP)
+        self._worker.join()
+
+    # ==========================================
+    # WORKER
+    # ==========================================
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            batch = [self.events.get()]
+            # Wait a little for companions: one transaction per batch is what makes this cheap
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.events.get(timeout=remaining) if remaining > 0 else self.events.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            events = batch[:-1] if stop else batch
+            if events:
+                self._write(conn, events)
+            for _ in batch:
+                self.events.task_done()
+            if stop:
+                break
+        conn.close()
+
+    def _write(self, conn, events):
+        try:
+            with conn:
+                for sql, params in events:
+                    conn.execute(sql, params)
+            self.written += len(events)
+            self.batches += 1
+        except sqlite3.Error:
+            # The batch was rolled back; replay it one event per transaction so only the bad events are lost
+            for sql, params in events:
+                try:
+                    with conn:
+                        conn.execute(sql, params)
+                    self.written += 1
+                except sqlite3.Error as error:
+                    self.failed += 1
+                    print(f"❌ Could not save game event {params}: {error}")
+
+    # ==========================================
+    # QUERIES AND RECOVERY
+    # ==========================================
+
+    def recover(self) -> list:
+        """
+        Closes games left unfinished by a crash or an unclean shutdown (reason "ABORTED").
+        Call once at startup, before new games are recorded.
+
+        :return: Ids of the recovered games; their setups and moves can still be replayed.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT g.game_id, (SELECT COUNT(*) FROM moves m WHERE m.game_id = g.game_id) "
+                                "FROM games g WHERE g.finished_at IS NULL").fetchall()
+            conn.executemany(FINISH_GAME, [(time.time(), None, "ABORTED", plies, game_id) for game_id, plies in rows])
+        conn.close()
+        if rows:
+            print(f"🩹 Recovered {len(rows)} unfinished game(s)")
+        return [game_id for game_id, _ in rows]
+
+    def games_for_player(self, player_id, since: float = None, until: float = None, limit: int = 50) -> list:
+        """
+        Most recent games of a player, optionally within [since, until) (Unix timestamps).
+
+        :return: List of dicts with the games table columns.
+        """
+        since = since if since is not None else float("-inf")
+        until = until if until is not None else float("inf")
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        # One indexed range scan per colour
+        rows = conn.execute(
+            "SELECT * FROM games WHERE red_player = ? AND started_at >= ? AND started_at < ? "
+            "UNION ALL "
+            "SELECT * FROM games WHERE blue_player = ? AND started_at >= ? AND started_at < ? "
+            "ORDER BY started_at DESC LIMIT ?",
+            (str(player_id), since, until, str(player_id), since, until, limit)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def finished_game_ids(self) -> list:
+        """Ids of every game that has a result (aborted ones included), oldest first."""
+        conn = self._connect()
+        rows = conn.execute("SELECT game_id FROM games WHERE finished_at IS NOT NULL ORDER BY game_id").fetchall()
+        conn.close()
+        return [game_id for game_id, in rows]
+
+    def load_game(self, game_id: int) -> dict:
+        """
+        Full record of one game: the games row plus "setups" {team: [(x, y, rank)]} and "moves".
+
+        :return: The record, or None if the game is unknown.
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        game = conn.execute("SELECT * FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        if game is None:
+            conn.close()
+            return None
+        record = dict(game)
+        record["setups"] = {row["team"]: [tuple(cell) for cell in json.loads(row["layout"])]
+                            for row in conn.execute("SELECT * FROM setups WHERE game_id = ?", (game_id,))}
+        record["moves"] = [dict(row) for row in
+                           conn.execute("SELECT * FROM moves WHERE game_id = ? ORDER BY ply", (game_id,))]
+        conn.close()
+        return record
+
+    def replay(self, game_id: int, plies: int = None) -> GameLogic:
+        """
+        Rebuilds a recorded game from its setups and moves (for disputes and analysis).
+
+        :param plies: Stop after this many moves (default: all recorded moves).
+        :return: GameLogic holding the reconstructed position, or None if the game is unknown.
+        """
+        logic = None
+        for logic in self.replay_positions(game_id, plies):
+            pass
+        return logic
+
+    def replay_positions(self, game_id: int, plies: int = None):
+        """
+        Steps through a recorded game (e.g. to render it frame by frame).
+
+        :param plies: Stop after this many moves (default: all recorded moves).
+        :return: Generator yielding the game's GameLogic after the setups and again after every
+                 move; it is the same object each time, updated in place. Nothing for an unknown game.
+        """
+        record = self.load_game(game_id)
+        if record is None:
+            return
+
+        board = Board()
+        logic = GameLogic(board)
+        for team_name, layout in record["setups"].items():
+            for x, y, rank_name in layout:
+                board.place_piece(Piece(PieceRank[rank_name], Team[team_name]), x, y)
+        logic.game_state = GameState.IN_PROGRESS
+        yield logic
+
+        for move in record["moves"][:plies]:
+            with quiet():
+                logic.execute_move((move["start_x"], move["start_y"]), (move["end_x"], move["end_y"]))
+            yield logic
+
+
+def benchmark(games: int = 200, moves_per_game: int = 300, batch_size: int = PERSISTENCE_BATCH_SIZE) -> dict:
+    """
+    Measures sustained write throughput on a throwaway database.
+
+    :return: Dict with enqueue cost per event and committed moves per second.
+    """
+    report = {"start": (3, 6), "end": (3, 5), "attacker_rank": "SCOUT",
+              "defender_rank": "MINER", "outcome": "DEFENDER"}
+
+    # The directory also holds SQLite's -wal and -shm files; all of it goes away afterwards
+    with tempfile.TemporaryDirectory() as directory:
+        store = GameStore(os.path.join(directory, "bench.db"), batch_size=batch_size)
+        started = time.perf_counter()
+        ids = [store.open_game(f"red-{n}", f"blue-{n}") for n in range(games)]
+        for ply in range(moves_per_game):
+            for game_id in ids:
+                store.record_move(game_id, ply, report)
+        queued = time.perf_counter()
+        for game_id in ids:
+            store.finish_game(game_id, Team.RED, "FLAG_CAPTURED", moves_per_game)
+        store.close()
+        finished = time.perf_counter()
+
+    moves = games * moves_per_game
+    return {
+        "moves": moves,
+        "batches": store.batches,
+        "enqueue_us_per_move": round((queued - started) / moves * 1e6, 2),
+        "moves_per_sec": round(moves / (finished - started)),
+        "failed": store.failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the write-behind game store.")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--moves", type=int, default=300, help="Moves per game")
+    parser.add_argument("--batch-size", type=int, default=PERSISTENCE_BATCH_SIZE)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.games, args.moves, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
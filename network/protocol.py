@@ -0,0 +1,27 @@
+import json
+from utils.constants import Command
+
+
+"""Messages are single lines of JSON, e.g. {"cmd": "MOVE", "start": [0, 3], "end": [0, 4]}."""
+MESSAGE_DELIMITER = b"\n"
+
+
+def encode_message(command: Command, **payload) -> bytes:
+    """Serializes a command and its payload into one framed message."""
+    payload["cmd"] = command.name
+    return json.dumps(payload, separators=(",", ":")).encode() + MESSAGE_DELIMITER
+
+
+def decode_message(line: bytes) -> tuple:
+    """
+    Parses one framed message.
+
+    :return: (Command, payload dict)
+    :raises ValueError: If the line is not valid JSON or names an unknown command.
+    """
+    try:
+        payload = json.loads(line)
+        command = Command[payload.pop("cmd")]
+    except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed message: {line[:80]!r}") from e
+    return command, payload
@@ -0,0 +1,87 @@
+import base64
+import json
+import zlib
+from collections import deque
+
+from utils.config import RESYNC_HISTORY
+
+
+class GameJournal:
+    """
+    Versioned change log of one game, used to resync reconnecting clients.
+
+    The version is the ply number. For every ply a ring buffer keeps the set of squares
+    whose view changed, per team. A client that reports the last ply it applied gets the
+    current contents of the union of those squares, which is never more than the board
+    itself no matter how many plies it missed. A client older than the ring buffer gets
+    a compressed snapshot instead.
+    """
+
+    def __init__(self, capacity: int = RESYNC_HISTORY):
+        self.deltas = deque(maxlen=capacity)   # (ply, {Team: frozenset of (x, y)})
+        self.last_views = {}                   # Team -> view the latest delta was computed against
+        self.ply = None
+
+    def record(self, ply: int, views: dict):
+        """
+        Stores the views of a new ply and the squares that changed since the previous one.
+
+        :param views: {Team: view} as returned by Board.get_view.
+        """
+        if self.last_views:
+            changes = {}
+            for team, view in views.items():
+                old = self.last_views.get(team)
+                changes[team] = frozenset(
+                    (x, y)
+                    for y, (new_row, old_row) in enumerate(zip(view, old))
+                    for x, (new_cell, old_cell) in enumerate(zip(new_row, old_row))
+                    if new_cell != old_cell
+                )
+            self.deltas.append((ply, changes))
+        self.last_views = dict(views)
+        self.ply = ply
+
+    def changes_since(self, ply: int, team):
+        """
+        Squares that changed for `team` after the given ply.
+
+        :return: A set of (x, y), or None when the ring buffer no longer reaches back that far.
+        """
+        if self.ply is None or ply > self.ply or ply < 0:
+            return None
+        if ply == self.ply:
+            return set()
+        if not self.deltas or self.deltas[0][0] > ply + 1:
+            return None
+
+        changed = set()
+        for delta_ply, changes in self.deltas:
+            if delta_ply > ply:
+                changed |= changes[team]
+        return changed
+
+
+def compress_view(view) -> str:
+    """Packs a full view into a compact text field (zlib + base64 of its JSON)."""
+    raw = json.dumps(view, separators=(",", ":")).encode()
+    return base64.b64encode(zlib.compress(raw, 6)).decode()
+
+
+def decompress_view(data: str) -> list:
+    return json.loads(zlib.decompress(base64.b64decode(data)))
+
+
+def apply_resync(view, payload: dict) -> list:
+    """
+    Client side: applies a RESYNC payload to the last view the client had.
+
+    :param view: Client's last view (ignored for snapshots, may be None).
+    :return: The up-to-date view.
+    """
+    if payload["mode"] == "SNAPSHOT":
+        return decompress_view(payload["data"])
+    view = [list(row) for row in view]
+    for x, y, value in payload.get("cells", ()):
+        view[y][x] = value
+    return view
@@ -0,0 +1,478 @@
+import argparse
+import asyncio
+import itertools
+import math
+import time
+
+from ai.service import AIService
+from network.broadcast import SpectatorChannel
+from network.game_room import GameRoom
+from network.matchmaking import MatchmakingService
+from network.metrics import (TRACER, MOVE_LATENCY, ACTIVE_GAMES, CONNECTIONS, MATCHMAKING_QUEUE, PERSISTENCE_QUEUE,
+                             AI_THINK_TIME, start_metrics_server)
+from network.protocol import encode_message, decode_message
+from network.timers import TimerWheel
+from network.persistence import GameStore
+from utils.config import SERVER_HOST, SERVER_PORT, DEFAULT_RATING, TURN_TIME_LIMIT, RECONNECT_GRACE_PERIOD
+from utils.config import PERSISTENCE_PATH, METRICS_PORT, TURN_TIMEOUT_PENALTY, AI_SERVICE_WORKERS
+from utils.constants import Command, GameState, Team
+
+
+"""How often (seconds) the matchmaker retries waiting players with wider windows."""
+MATCHMAKING_TICK = 0.25
+"""Longest player id a client may log in with."""
+MAX_PLAYER_ID_LENGTH = 64
+
+
+def read_rating(payload: dict):
+    """The rating a client sent with CONNECT (DEFAULT_RATING when absent), or None if it is not a finite number."""
+    try:
+        rating = float(payload.get("rating", DEFAULT_RATING))
+    except (TypeError, ValueError):
+        return None
+    return rating if math.isfinite(rating) else None
+
+
+def read_player_id(payload: dict):
+    """
+    The player id a client sent with CONNECT.
+
+    :return: The id, "" when the client sent none (it plays as a guest), or None if it is malformed.
+    """
+    player_id = payload.get("player_id")
+    if not player_id:
+        return ""
+    if not isinstance(player_id, str) or len(player_id) > MAX_PLAYER_ID_LENGTH:
+        return None
+    return player_id
+
+
+class Connection:
+    """Server-side state of one connected client."""
+
+    def __init__(self, player_id, reader, writer):
+        self.player_id = player_id
+        self.reader = reader
+        self.writer = writer
+        self.room = None
+        self.team = None
+
+    def send(self, message: bytes):
+        if not self.writer.is_closing():
+            self.writer.write(message)
+
+
+class GameServer:
+    """
+    Asyncio game server: accepts clients, queues them for matchmaking and relays
+    moves to the GameRoom they were paired into.
+
+    Protocol (one JSON object per line, see network.protocol):
+        client -> CONNECT {player_id?, rating?}   joins the matchmaking queue (again after GAME_OVER)
+        server -> CONNECT {player_id, state}      acknowledgement (state WAITING_FOR_PLAYERS)
+                                                  or {.., game_id, team} when rejoining a running game
+        server -> START_GAME {game_id, team, opponent}
+        client -> SETUP_DONE {layout?}            ready to play, optionally with an own [[x, y, rank]] deployment
+        server -> UPDATE_BOARD {ply, turn, view}
+        client -> MOVE {start, end}
+        server -> BATTLE_RESULT / TURN_TIMEOUT / GAME_OVER / ERROR {reason}
+        client -> RESYNC {ply}                    after rejoining: last ply the client applied
+        server -> RESYNC {mode, ply, turn, ..}    missing squares (DELTA) or a compressed SNAPSHOT
+
+    A player who drops out of a running game keeps their seat for RECONNECT_GRACE_PERIOD
+    seconds; logging in again with the same player_id rejoins it instead of forfeiting.
+
+    Spectators open a connection with SPECTATE {game_id, team?} instead of CONNECT
+    and then only receive frames (neutral view unless a team is given).
+    """
+
+    # Rooms run in this process, so a MOVE has been handled and fanned out once _dispatch returns
+    rooms_in_process = True
+
+    def __init__(self, host: str = SERVER_HOST, port: int = SERVER_PORT, matchmaker: MatchmakingService = None,
+                 timers: TimerWheel = None, turn_time_limit: float = TURN_TIME_LIMIT,
+                 reconnect_grace: float = RECONNECT_GRACE_PERIOD, store: GameStore = None,
+                 ai_service: AIService = None):
+        """
+        :param timers: Wheel holding every game's turn deadline (pass one with a FakeClock in tests).
+        :param reconnect_grace: Seconds a disconnected player may take to rejoin their game.
+        :param store: Optional GameStore every game is recorded to.
+        :param ai_service: Optional shared AIService that picks auto-moves off the event loop.
+        """
+        self.host = host
+        self.port = port
+        self.matchmaker = matchmaker or MatchmakingService()
+        self.timers = timers or TimerWheel()
+        self.turn_time_limit = turn_time_limit
+        self.reconnect_grace = reconnect_grace
+        self.store = store
+        self.ai_service = ai_service
+        self.connections = {}   # player_id -> Connection
+        self.rooms = {}         # game_id -> GameRoom
+        self.turn_timers = {}   # game_id -> (Timer, ply it was armed for)
+        self.channels = {}      # game_id -> SpectatorChannel
+        self.player_rooms = {}  # player_id -> GameRoom they are seated in, connected or not
+        self.grace_timers = {}  # player_id -> Timer forfeiting their game unless they reconnect
+        self._guest_ids = itertools.count(1)
+        # Scraped from whichever server this process runs
+        ACTIVE_GAMES.set_function(lambda: len(self.rooms))
+        CONNECTIONS.set_function(lambda: len(self.connections))
+        MATCHMAKING_QUEUE.set_function(lambda: len(self.matchmaker))
+        PERSISTENCE_QUEUE.set_function(lambda: self.store.pending if self.store else 0)
+        self._server = None
+        self._tasks = []
+
+    async def start(self):
+        """Starts listening; returns once the socket is bound."""
+        if self.store:
+            # Games that were running when the server last died can no longer be resumed
+            self.store.recover()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # Port 0 asks the OS for a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._tasks.append(asyncio.create_task(self._matchmaking_loop()))
+        self._tasks.append(asyncio.create_task(self._timer_loop()))
+        print(f"🌐 Server listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for connection in list(self.connections.values()):
+            connection.writer.close()
+        if self.store:
+            self.store.close()
+
+    # ==========================================
+    # CONNECTIONS
+    # ==========================================
+
+    async def _handle_client(self, reader, writer):
+        connection = None
+        spectator = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                started = time.perf_counter()
+                with TRACER.trace("request"):
+                    try:
+                        with TRACER.span("decode"):
+                            command, payload = decode_message(line)
+                    except ValueError:
+                        writer.write(encode_message(Command.ERROR, reason="MALFORMED"))
+                        continue
+
+                    if spectator:
+                        continue  # Spectators only listen
+                    if connection is None and command == Command.SPECTATE:
+                        spectator = self._spectate(payload, writer)
+                    elif connection is None:
+                        if command != Command.CONNECT:
+                            writer.write(encode_message(Command.ERROR, reason="NOT_CONNECTED"))
+                            continue
+                        connection = self._connect(payload, reader, writer)
+                    else:
+                        self._dispatch(connection, command, payload)
+                if command == Command.MOVE and self.rooms_in_process:
+                    MOVE_LATENCY.observe(time.perf_counter() - started)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if connection:
+                self._disconnect(connection)
+            if spectator:
+                channel = self.channels.get(spectator[0])
+                if channel:
+                    channel.unsubscribe(spectator[1])
+            writer.close()
+
+    def _connect(self, payload, reader, writer):
+        """Registers a logged-in client. Returns its Connection, or None if the CONNECT was malformed."""
+        player_id = read_player_id(payload)
+        rating = read_rating(payload)
+        if player_id is None or rating is None:
+            writer.write(encode_message(Command.ERROR, reason="MALFORMED"))
+            return None
+        player_id = player_id or f"guest-{next(self._guest_ids)}"
+
+        # A second login with the same id replaces the old connection
+        old = self.connections.get(player_id)
+        if old:
+            self._disconnect(old)
+            old.writer.close()
+
+        connection = Connection(player_id, reader, writer)
+        self.connections[player_id] = connection
+
+        room = self.player_rooms.get(player_id)
+        if room:
+            self._rejoin(connection, room)
+            return connection
+
+        connection.send(encode_message(Command.CONNECT, player_id=player_id,
+                                       state=GameState.WAITING_FOR_PLAYERS.name))
+
+        match = self.matchmaker.enqueue(player_id, rating)
+        if match:
+            self._open_room(match)
+        return connection
+
+    def _rejoin(self, connection: Connection, room: GameRoom):
+        """Seats a reconnecting player back in their game; the client follows up with RESYNC."""
+        timer = self.grace_timers.pop(connection.player_id, None)
+        if timer:
+            timer.cancel()
+        connection.room = room
+        connection.team = room.team_of(connection.player_id)
+        connection.send(encode_message(Command.CONNECT, player_id=connection.player_id,
+                                       state=room.state.name, game_id=room.game_id,
+                                       team=connection.team.name))
+        print(f"🔌 {connection.player_id} rejoined game {room.game_id}")
+
+    def _spectate(self, payload, writer):
+        """Subscribes a spectator to a running game. Returns (game_id, Spectator) or None."""
+        game_id = payload.get("game_id")
+        team_name = payload.get("team")
+        if not isinstance(game_id, int) or team_name not in (None, Team.RED.name, Team.BLUE.name):
+            writer.write(encode_message(Command.ERROR, reason="MALFORMED"))
+            return None
+        room = self.rooms.get(game_id)
+        if room is None:
+            writer.write(encode_message(Command.ERROR, reason="NO_SUCH_GAME"))
+            return None
+
+        visibility = Team[team_name] if team_name else Team.NONE
+        channel = self.channels.get(room.game_id)
+        if channel is None:
+            channel = self.channels[room.game_id] = SpectatorChannel(room.game_id)
+        # Make sure the newcomer's class has an up-to-date keyframe before subscribing
+        if room.state != GameState.WAITING_FOR_PLAYERS:
+            channel.keyframes[visibility] = room.board_frame(visibility)
+        return room.game_id, channel.subscribe(writer, visibility)
+
+    def _disconnect(self, connection: Connection):
+        if self.connections.get(connection.player_id) is not connection:
+            return  # Already replaced by a newer login and cleaned up then
+        del self.connections[connection.player_id]
+        self.matchmaker.cancel(connection.player_id)
+        if connection.room:
+            # Keep the seat for a while: mobile clients drop and come back all the time
+            self.grace_timers[connection.player_id] = self.timers.arm(
+                self.reconnect_grace, self._on_grace_expired, connection.player_id, connection.room)
+            connection.room = None
+
+    def _on_grace_expired(self, player_id, room: GameRoom):
+        del self.grace_timers[player_id]
+        if self.rooms.get(room.game_id) is not room:
+            return  # The game ended while the player was away
+        self._deliver(room, room.handle_disconnect(room.team_of(player_id)))
+        self._after_room_update(room)
+
+    # ==========================================
+    # GAMES
+    # ==========================================
+
+    async def _matchmaking_loop(self):
+        while True:
+            await asyncio.sleep(MATCHMAKING_TICK)
+            for match in self.matchmaker.tick():
+                self._open_room(match)
+
+    async def _timer_loop(self):
+        # One task drives every game's turn deadline
+        while True:
+            await asyncio.sleep(self.timers.resolution)
+            self.timers.poll()
+
+    def _sync_turn_timer(self, room: GameRoom):
+        """(Re)arms the room's turn deadline whenever a new ply starts; disarms it once the game is over."""
+        ply = room.ply
+        armed = self.turn_timers.get(room.game_id)
+        if armed and armed[1] == ply and room.state == GameState.IN_PROGRESS:
+            return
+        if armed:
+            armed[0].cancel()
+            del self.turn_timers[room.game_id]
+        if room.state == GameState.IN_PROGRESS:
+            timer = self.timers.arm(self.turn_time_limit, self._on_turn_timeout, room, ply)
+            self.turn_timers[room.game_id] = (timer, ply)
+
+    def _on_turn_timeout(self, room: GameRoom, ply: int):
+        del self.turn_timers[room.game_id]
+        if room.ply != ply:
+            return  # A move arrived in the same tick
+
+        # Sharded rooms have no local engine; their shard picks the move itself
+        logic = getattr(room, "logic", None)
+        if self.ai_service and logic and TURN_TIMEOUT_PENALTY == "AUTO_MOVE":
+            team = room.turn
+            future = self.ai_service.submit(logic, team, level=1)
+            loop = asyncio.get_running_loop()
+            future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._on_auto_move, room, ply, team, done))
+            return
+        self._deliver(room, room.handle_timeout(room.turn))
+        self._after_room_update(room)
+
+    def _on_auto_move(self, room: GameRoom, ply: int, team: Team, future):
+        """Plays the AI service's answer, unless the player moved (or the game ended) meanwhile."""
+        if self.rooms.get(room.game_id) is not room or room.ply != ply:
+            return
+        # A missed deadline falls back to thinking inline
+        move = future.result() if not future.exception() else None
+        self._deliver(room, room.handle_timeout(team, move=move))
+        self._after_room_update(room)
+
+    def _after_room_update(self, room: GameRoom):
+        self._sync_turn_timer(room)
+        self._publish_keyframes(room)
+        self._close_room_if_finished(room)
+
+    def _publish_keyframes(self, room: GameRoom):
+        """Pushes the new position to every spectator class once per ply."""
+        channel = self.channels.get(room.game_id)
+        if channel is None or room.state == GameState.WAITING_FOR_PLAYERS:
+            return
+        key = (room.ply, room.state)
+        if channel.keyframe_key == key:
+            return
+        channel.keyframe_key = key
+        final = room.state == GameState.FINISHED
+        for visibility in channel.classes():
+            frame = room.board_frame(visibility)
+            if frame:
+                channel.publish_keyframe(visibility, frame, final=final)
+
+    def _create_room(self, match) -> GameRoom:
+        return GameRoom(match.game_id, match.red.player_id, match.blue.player_id, store=self.store)
+
+    def _open_room(self, match):
+        room = self._create_room(match)
+        self.rooms[match.game_id] = room
+        for team, player_id in room.players.items():
+            self.player_rooms[player_id] = room
+            connection = self.connections.get(player_id)
+            if connection:
+                connection.room = room
+                connection.team = team
+        self._deliver(room, room.start())
+
+    def _dispatch(self, connection: Connection, command: Command, payload: dict):
+        room = connection.room
+        if TRACER.enabled:
+            TRACER.annotate(command=command.name, player_id=connection.player_id,
+                            game_id=room.game_id if room else None, ply=room.ply if room else None)
+        if room is None:
+            # After a game ends, CONNECT puts the player back in the queue
+            if command == Command.CONNECT:
+                rating = read_rating(payload)
+                if rating is None:
+                    connection.send(encode_message(Command.ERROR, reason="MALFORMED"))
+                    return
+                match = self.matchmaker.enqueue(connection.player_id, rating)
+                if match:
+                    self._open_room(match)
+            else:
+                connection.send(encode_message(Command.ERROR, reason="NOT_IN_GAME"))
+            return
+
+        if command == Command.SETUP_DONE:
+            self._deliver(room, room.handle_setup_done(connection.team, payload.get("layout")))
+            self._after_room_update(room)
+        elif command == Command.RESYNC:
+            last_ply = payload.get("ply")
+            if last_ply is not None and not isinstance(last_ply, int):
+                connection.send(encode_message(Command.ERROR, reason="MALFORMED"))
+                return
+            self._deliver(room, room.handle_resync(connection.team, last_ply))
+        elif command == Command.MOVE:
+            try:
+                start_pos = tuple(int(v) for v in payload["start"])
+                end_pos = tuple(int(v) for v in payload["end"])
+                if len(start_pos) != 2 or len(end_pos) != 2:
+                    raise ValueError
+            except (KeyError, TypeError, ValueError):
+                connection.send(encode_message(Command.ERROR, reason="MALFORMED"))
+                return
+            self._deliver(room, room.handle_move(connection.team, start_pos, end_pos))
+            self._after_room_update(room)
+        else:
+            connection.send(encode_message(Command.ERROR, reason="UNSUPPORTED"))
+
+    def _deliver(self, room: GameRoom, messages):
+        with TRACER.span("fan-out"):
+            self._fan_out(room, messages)
+
+    def _fan_out(self, room: GameRoom, messages):
+        channel = self.channels.get(room.game_id)
+        final = room.state == GameState.FINISHED
+        if channel and final:
+            # Spectators get the last position before GAME_OVER, which closes their channel
+            self._publish_keyframes(room)
+        for team, message in messages:
+            # Team.NONE marks events shared by both players and every spectator
+            recipients = room.players if team == Team.NONE else (team,)
+            for each in recipients:
+                connection = self.connections.get(room.players[each])
+                if connection and connection.room is room:
+                    connection.send(message)
+            if channel and team == Team.NONE:
+                channel.publish_delta(message, final=final)
+
+    def _close_room_if_finished(self, room: GameRoom):
+        if room.state == GameState.FINISHED:
+            self.rooms.pop(room.game_id, None)
+            channel = self.channels.pop(room.game_id, None)
+            if channel:
+                channel.close()
+            for player_id in room.players.values():
+                if self.player_rooms.get(player_id) is room:
+                    del self.player_rooms[player_id]
+                timer = self.grace_timers.pop(player_id, None)
+                if timer:
+                    timer.cancel()
+                connection = self.connections.get(player_id)
+                if connection and connection.room is room:
+                    connection.room = None
+                    connection.team = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Super Stratego Elite game server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--db", default=PERSISTENCE_PATH, help="SQLite file for game records ('' disables)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="Port of /metrics and /traces (0 disables)")
+    parser.add_argument("--trace", action="store_true", help="Record per-move trace spans")
+    parser.add_argument("--ai-workers", type=int, default=AI_SERVICE_WORKERS,
+                        help="Processes of the shared AI service (0 = think inline)")
+    args = parser.parse_args()
+    store = GameStore(args.db) if args.db else None
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    TRACER.enabled = args.trace
+    ai_service = None
+    if args.ai_workers:
+        ai_service = AIService(args.ai_workers, observer=lambda level, seconds: AI_THINK_TIME.observe(seconds, str(level)))
+    try:
+        asyncio.run(GameServer(args.host, args.port, store=store, ai_service=ai_service).serve_forever())
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    finally:
+        if store:
+            store.close()
+        if ai_service:
+            ai_service.close()
+
+
+if __name__ == "__main__":
+    main()
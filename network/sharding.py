@@ -0,0 +1,369 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+
+from network.game_room import GameRoom, quiet
+from network.metrics import TRACER, ACTIVE_GAMES, MOVE_LATENCY, start_metrics_server
+from network.persistence import GameStore, setup_layout
+from network.server import GameServer
+from utils.config import SERVER_HOST, SERVER_PORT, PERSISTENCE_PATH, METRICS_PORT
+from utils.constants import GameState, Team
+
+
+# ==========================================
+# SHARD PROCESS
+# ==========================================
+
+class ForwardingStore:
+    """Stands in for the GameStore inside a shard: record events are sent to the front, which owns the database."""
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+
+    def record_setup(self, game_id: int, team: Team, board):
+        self.outbox.put(("STORE", "record_layout", (game_id, team, setup_layout(board, team))))
+
+    def record_move(self, game_id: int, ply: int, report: dict):
+        self.outbox.put(("STORE", "record_move", (game_id, ply, report)))
+
+    def finish_game(self, game_id: int, winner, reason: str, plies: int):
+        self.outbox.put(("STORE", "finish_game", (game_id, winner, reason, plies)))
+
+
+def run_shard(shard_id: int, inbox, outbox, metrics_port: int = None, trace: bool = False):
+    """
+    Main loop of a shard process: hosts GameRooms and runs every request for them.
+
+    Requests are tuples (operation, game_id, *arguments). After each one the shard
+    replies ("UPDATE", game_id, messages, ply, state, turn, frames), where frames holds
+    the current UPDATE_BOARD frame of every visibility class the front watches for
+    spectators.
+
+    :param metrics_port: Serve this shard's own /metrics and /traces on this port.
+    """
+    rooms = {}
+    watched = {}   # game_id -> set of visibility classes with spectators
+    store = ForwardingStore(outbox)
+    ACTIVE_GAMES.set_function(lambda: len(rooms))
+    TRACER.enabled = trace
+    if metrics_port:
+        start_metrics_server(metrics_port)
+
+    while True:
+        request = inbox.get()
+        started = time.perf_counter()
+        operation, game_id = request[0], request[1] if len(request) > 1 else None
+        if operation == "STOP":
+            break
+
+        if operation == "OPEN":
+            red, blue, record_id = request[2:]
+            room = rooms[game_id] = GameRoom(game_id, red, blue, store=store if record_id else None,
+                                             record_id=record_id)
+            watched[game_id] = set()
+            messages = room.start()
+        elif operation == "MIGRATE_IN":
+            room, watched[game_id] = request[2:]
+            room.store = store if room.record_id else None
+            rooms[game_id] = room
+            messages = []
+        elif operation == "MIGRATE_OUT":
+            # A game that already finished here still gets an answer, so the front can stop waiting
+            room = rooms.pop(game_id, None)
+            if room:
+                room.store = None
+            outbox.put(("MIGRATED", game_id, room, watched.pop(game_id, set())))
+            continue
+        else:
+            room = rooms.get(game_id)
+            if room is None:
+                continue  # Finished or migrated away; the front already knows
+            with TRACER.trace(operation, game_id=game_id, shard=shard_id):
+                messages = _run_request(room, watched[game_id], operation, request[2:])
+
+        frames = {visibility: room.board_frame(visibility) for visibility in watched[game_id]
+                  if room.state != GameState.WAITING_FOR_PLAYERS}
+        if operation == "MOVE":
+            # The front only forwards moves, so their handling time (validate -> execute -> encode) is measured here
+            MOVE_LATENCY.observe(time.perf_counter() - started)
+        outbox.put(("UPDATE", game_id, messages, room.ply, room.state, room.turn, frames))
+        if room.state == GameState.FINISHED:
+            del rooms[game_id]
+            del watched[game_id]
+
+
+def _run_request(room: GameRoom, watched: set, operation: str, arguments: tuple) -> list:
+    with quiet():
+        if operation == "SETUP_DONE":
+            return room.handle_setup_done(*arguments)
+        if operation == "MOVE":
+            return room.handle_move(*arguments)
+        if operation == "TIMEOUT":
+            team, ply = arguments
+            # The move may have reached the shard before the front's deadline did
+            return room.handle_timeout(team) if room.ply == ply else []
+        if operation == "RESYNC":
+            return room.handle_resync(*arguments)
+        if operation == "DISCONNECT":
+            return room.handle_disconnect(*arguments)
+        if operation == "WATCH":
+            watched.add(arguments[0])
+        return []
+
+
+# ==========================================
+# FRONT PROCESS
+# ==========================================
+
+class RoomProxy:
+    """
+    Front-side stand-in for a GameRoom that lives in a shard.
+
+    Handlers forward the request and return no messages; the shard's reply is delivered
+    when it arrives. ply, state and turn mirror the shard's last reply.
+    """
+
+    def __init__(self, game_id, red_player, blue_player, shard):
+        self.game_id = game_id
+        self.players = {Team.RED: red_player, Team.BLUE: blue_player}
+        self.shard = shard
+        self.ply = 0
+        self.state = GameState.WAITING_FOR_PLAYERS
+        self.turn = Team.RED
+        self.frames = {}        # visibility -> latest UPDATE_BOARD frame from the shard
+        self.migrating = False
+        self.backlog = []       # Requests held back while the game moves between shards
+
+    def team_of(self, player_id):
+        for team, player in self.players.items():
+            if player == player_id:
+                return team
+        return None
+
+    def send(self, operation: str, *arguments):
+        request = (operation, self.game_id) + arguments
+        if self.migrating:
+            self.backlog.append(request)
+        else:
+            self.shard.inbox.put(request)
+
+    def start(self) -> list:
+        return []  # The shard announces the game when it opens it
+
+    def handle_setup_done(self, team: Team, layout=None) -> list:
+        self.send("SETUP_DONE", team, layout)
+        return []
+
+    def handle_move(self, team: Team, start_pos: tuple, end_pos: tuple) -> list:
+        self.send("MOVE", team, start_pos, end_pos)
+        return []
+
+    def handle_timeout(self, team: Team) -> list:
+        self.send("TIMEOUT", team, self.ply)
+        return []
+
+    def handle_resync(self, team: Team, last_ply) -> list:
+        self.send("RESYNC", team, last_ply)
+        return []
+
+    def handle_disconnect(self, team: Team) -> list:
+        self.send("DISCONNECT", team)
+        return []
+
+    def board_frame(self, visibility: Team) -> bytes:
+        """Latest frame for a spectator class; the first call asks the shard to start sending it."""
+        if visibility not in self.frames:
+            self.frames[visibility] = None
+            self.send("WATCH", visibility)
+        return self.frames[visibility]
+
+
+class Shard:
+    """Front-side handle of one shard process."""
+
+    def __init__(self, shard_id: int, context, outbox, metrics_port: int = None, trace: bool = False):
+        self.shard_id = shard_id
+        self.inbox = context.Queue()
+        self.process = context.Process(target=run_shard, args=(shard_id, self.inbox, outbox, metrics_port, trace),
+                                       name=f"shard-{shard_id}", daemon=True)
+        self.live = True
+
+    def __repr__(self):
+        return f"Shard({self.shard_id}, {'live' if self.live else 'retired'})"
+
+
+class ShardedGameServer(GameServer):
+    """
+    GameServer whose games run in worker processes.
+
+    This process keeps the sockets, matchmaking, timers and spectator fan-out; each match
+    is placed on a shard by game id and from then on only framed requests and replies
+    cross the process boundary (multiprocessing queues). Every shard runs its own
+    GameRooms, including the AI that plays timed-out turns, so game work scales with the
+    number of cores. retire_shard() moves a shard's games to the others before stopping it.
+    """
+
+    # Here _dispatch only forwards a MOVE; the shards observe MOVE_LATENCY themselves
+    rooms_in_process = False
+
+    def __init__(self, host: str = SERVER_HOST, port: int = SERVER_PORT, shards: int = None,
+                 metrics_port: int = None, **kwargs):
+        """
+        :param shards: Number of shard processes (default: one per core).
+        :param metrics_port: Port of the front's metrics endpoint; shard i serves its own on metrics_port + 1 + i.
+        :param kwargs: Passed on to GameServer.
+        """
+        super().__init__(host, port, **kwargs)
+        self._context = multiprocessing.get_context("spawn")
+        self.outbox = self._context.Queue()
+        self.shards = [Shard(index, self._context, self.outbox, metrics_port and metrics_port + 1 + index,
+                             TRACER.enabled)
+                       for index in range(shards or os.cpu_count() or 1)]
+        self._migrations = {}   # game_id -> Future resolved once the game runs on its new shard
+        self._loop = None
+        self._reader = None
+
+    async def start(self):
+        for shard in self.shards:
+            shard.process.start()
+        self._loop = asyncio.get_running_loop()
+        self._reader = threading.Thread(target=self._read_replies, name="shard-replies", daemon=True)
+        self._reader.start()
+        await super().start()
+        print(f"🧩 Running games on {len(self.shards)} shards")
+
+    async def stop(self):
+        for shard in self.shards:
+            if shard.live:
+                shard.inbox.put(("STOP",))
+        await self._loop.run_in_executor(None, self._join_shards)
+        # Let the last replies (and their store events) through before the store is closed
+        self.outbox.put(None)
+        await self._loop.run_in_executor(None, self._reader.join)
+        await asyncio.sleep(0)
+        await super().stop()
+
+    def _join_shards(self):
+        for shard in self.shards:
+            shard.process.join()
+
+    def live_shards(self) -> list:
+        return [shard for shard in self.shards if shard.live]
+
+    def _shard_for(self, game_id) -> Shard:
+        live = self.live_shards()
+        return live[hash(game_id) % len(live)]
+
+    # ==========================================
+    # ROOMS
+    # ==========================================
+
+    def _create_room(self, match) -> RoomProxy:
+        red, blue = match.red.player_id, match.blue.player_id
+        room = RoomProxy(match.game_id, red, blue, self._shard_for(match.game_id))
+        record_id = self.store.open_game(red, blue) if self.store else None
+        room.send("OPEN", red, blue, record_id)
+        return room
+
+    def _read_replies(self):
+        # Runs in a thread: multiprocessing queues only offer blocking reads
+        while True:
+            reply = self.outbox.get()
+            if reply is None:
+                break
+            self._loop.call_soon_threadsafe(self._on_reply, reply)
+
+    def _on_reply(self, reply):
+        kind = reply[0]
+        if kind == "STORE":
+            _, method, arguments = reply
+            if self.store:
+                getattr(self.store, method)(*arguments)
+        elif kind == "MIGRATED":
+            self._on_migrated(*reply[1:])
+        elif kind == "UPDATE":
+            self._on_update(*reply[1:])
+
+    def _on_update(self, game_id, messages, ply, state, turn, frames):
+        room = self.rooms.get(game_id)
+        if room is None:
+            return
+        room.ply, room.state, room.turn = ply, state, turn
+
+        channel = self.channels.get(game_id)
+        for visibility, frame in frames.items():
+            first = room.frames.get(visibility) is None
+            room.frames[visibility] = frame
+            if first and channel:
+                # Spectators who subscribed before the shard had sent this class a frame
+                channel.publish_keyframe(visibility, frame)
+
+        self._deliver(room, messages)
+        self._after_room_update(room)
+
+    # ==========================================
+    # MIGRATION
+    # ==========================================
+
+    async def retire_shard(self, shard_id: int):
+        """Moves every game of a shard to the remaining shards, then stops its process."""
+        shard = self.shards[shard_id]
+        if not shard.live or len(self.live_shards()) == 1:
+            raise ValueError(f"Cannot retire {shard}: it is the last live shard or already retired.")
+        shard.live = False
+
+        pending = []
+        for room in self.rooms.values():
+            if room.shard is shard:
+                room.send("MIGRATE_OUT")
+                room.migrating = True  # Hold new requests until the game has landed
+                future = self._migrations[room.game_id] = self._loop.create_future()
+                pending.append(future)
+        await asyncio.gather(*pending)
+
+        shard.inbox.put(("STOP",))
+        await self._loop.run_in_executor(None, shard.process.join)
+        print(f"🧩 Retired shard {shard_id}, moved {len(pending)} game(s)")
+
+    def _on_migrated(self, game_id, game_room: GameRoom, watched: set):
+        future = self._migrations.pop(game_id)
+        room = self.rooms.get(game_id)
+        if room and game_room:
+            room.shard = self._shard_for(game_id)
+            room.shard.inbox.put(("MIGRATE_IN", game_id, game_room, watched))
+            room.migrating = False
+            for request in room.backlog:
+                room.shard.inbox.put(request)
+            room.backlog = []
+        future.set_result(game_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Super Stratego Elite sharded game server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="Number of shard processes")
+    parser.add_argument("--db", default=PERSISTENCE_PATH, help="SQLite file for game records ('' disables)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="Port of the front's /metrics; shards use the following ports (0 disables)")
+    parser.add_argument("--trace", action="store_true", help="Record per-move trace spans")
+    args = parser.parse_args()
+    store = GameStore(args.db) if args.db else None
+    TRACER.enabled = args.trace
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    try:
+        asyncio.run(ShardedGameServer(args.host, args.port, shards=args.shards, metrics_port=args.metrics_port,
+                                      store=store).serve_forever())
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    finally:
+        if store:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
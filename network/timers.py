@@ -0,0 +1,159 @@
+import math
+import time
+
+
+class FakeClock:
+    """Manually advanced clock for deterministic timer tests."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class Timer:
+    """Handle of one armed deadline."""
+
+    __slots__ = ("wheel", "deadline", "callback", "args", "bucket")
+
+    def __init__(self, wheel, deadline: int, callback, args):
+        self.wheel = wheel
+        self.deadline = deadline   # In ticks
+        self.callback = callback
+        self.args = args
+        self.bucket = None         # Dict the timer currently lives in (None once fired/cancelled)
+
+    @property
+    def active(self) -> bool:
+        return self.bucket is not None
+
+    def cancel(self) -> bool:
+        return self.wheel.cancel(self)
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel: arm and cancel are O(1), and poll() only touches the
+    buckets of the ticks that actually passed.
+
+    Level 0 has one bucket per tick; every higher level covers `slots` times the span
+    of the level below. Far deadlines sit in a coarse bucket and cascade down a level
+    each time their bucket comes up, so every timer is moved at most `levels` times.
+    A single wheel can hold the turn deadlines of thousands of games driven by one task.
+    """
+
+    def __init__(self, resolution: float = 0.1, slot_bits: int = 8, levels: int = 4, clock=time.monotonic):
+        """
+        :param resolution: Length of one tick in seconds.
+        :param slot_bits: log2 of the number of buckets per level.
+        :param levels: Number of levels (at least 2); the wheel spans resolution * 2**(slot_bits * levels) seconds.
+        :param clock: Function returning the current time in seconds (e.g. a FakeClock).
+        """
+        if levels < 2:
+            # Deadlines past the span wait in the top level and cascade down; level 0 has nothing to cascade from
+            raise ValueError("A TimerWheel needs at least 2 levels.")
+        self.resolution = resolution
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        self.levels = levels
+        self.clock = clock
+
+        self.wheels = [[{} for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self.current_tick = self._to_tick(clock())
+        self.pending = 0
+
+    def __len__(self):
+        return self.pending
+
+    def _to_tick(self, seconds: float) -> int:
+        return int(seconds / self.resolution)
+
+    # ==========================================
+    # ARMING
+    # ==========================================
+
+    def arm(self, delay: float, callback, *args) -> Timer:
+        """
+        Schedules callback(*args) to run `delay` seconds from now.
+
+        :return: Timer handle for cancel().
+        """
+        # Round the deadline up from the clock, not from current_tick, which only moves on
+        # poll() and may be stale: a timer must never fire early
+        deadline = max(self.current_tick + 1, math.ceil((self.clock() + delay) / self.resolution))
+        timer = Timer(self, deadline, callback, args)
+        self._insert(timer)
+        self.pending += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        """Disarms a timer. Returns False if it already fired or was cancelled."""
+        if not timer.active:
+            return False
+        del timer.bucket[id(timer)]
+        timer.bucket = None
+        self.pending -= 1
+        return True
+
+    def _insert(self, timer: Timer):
+        delta = timer.deadline - self.current_tick
+        level = 0
+        while level < self.levels - 1 and delta >> (self.slot_bits * (level + 1)):
+            level += 1
+        # Timers beyond the top level's span wait in its furthest bucket and cascade again
+        if delta >> (self.slot_bits * self.levels):
+            slot_tick = self.current_tick + (self.slot_mask << (self.slot_bits * level))
+        else:
+            slot_tick = timer.deadline
+        bucket = self.wheels[level][(slot_tick >> (self.slot_bits * level)) & self.slot_mask]
+        bucket[id(timer)] = timer
+        timer.bucket = bucket
+
+    # ==========================================
+    # FIRING
+    # ==========================================
+
+    def poll(self) -> int:
+        """
+        Advances the wheel to the clock's current time and runs every due callback.
+
+        :return: Number of timers fired.
+        """
+        target = self._to_tick(self.clock())
+        fired = 0
+        while self.current_tick < target:
+            # Nothing armed: jump straight to the target tick
+            if not self.pending:
+                self.current_tick = target
+                break
+            self.current_tick += 1
+            tick = self.current_tick
+
+            # Cascade coarser buckets whose span starts at this tick, top level first so
+            # nothing is re-filed into a bucket that was already emptied this tick
+            top = 0
+            while top < self.levels - 1 and not tick & ((1 << (self.slot_bits * (top + 1))) - 1):
+                top += 1
+            for level in range(top, 0, -1):
+                bucket = self.wheels[level][(tick >> (self.slot_bits * level)) & self.slot_mask]
+                if bucket:
+                    timers = list(bucket.values())
+                    bucket.clear()
+                    for timer in timers:
+                        self._insert(timer)
+
+            bucket = self.wheels[0][tick & self.slot_mask]
+            if bucket:
+                due = [timer for timer in bucket.values() if timer.deadline <= tick]
+                for timer in due:
+                    del bucket[id(timer)]
+                    timer.bucket = None
+                    self.pending -= 1
+                for timer in due:
+                    timer.callback(*timer.args)
+                    fired += 1
+        return fired
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from network.timers import FakeClock, TimerWheel
+
+
+def make_wheel(**kwargs):
+    clock = FakeClock()
+    return clock, TimerWheel(clock=clock, **kwargs)
+
+
+def test_fires_once_the_delay_has_passed():
+    clock, wheel = make_wheel(resolution=0.1)
+    fired = []
+    wheel.arm(1.0, fired.append, "turn")
+
+    clock.advance(0.95)
+    assert wheel.poll() == 0
+    clock.advance(0.1)
+    assert wheel.poll() == 1
+    assert fired == ["turn"]
+    assert len(wheel) == 0
+
+
+def test_cancel():
+    clock, wheel = make_wheel(resolution=0.1)
+    fired = []
+    timer = wheel.arm(0.5, fired.append, "cancelled")
+    wheel.arm(0.5, fired.append, "kept")
+
+    assert timer.cancel()
+    assert not timer.cancel()
+    assert not timer.active
+    clock.advance(1.0)
+    wheel.poll()
+    assert fired == ["kept"]
+
+
+def test_arm_between_polls_never_fires_early():
+    # current_tick lags the clock until the next poll
+    clock, wheel = make_wheel(resolution=1.0)
+    fired = []
+    clock.advance(0.9)
+    wheel.arm(1.0, lambda: fired.append(clock()))
+
+    clock.advance(1.05)   # 1.95: 0.1 s before the deadline
+    wheel.poll()
+    assert fired == []
+    clock.advance(0.1)
+    wheel.poll()
+    assert fired == [pytest.approx(2.05)]
+
+
+@pytest.mark.parametrize("ticks", [3, 4, 17, 63, 64, 65, 300])
+def test_cascades_across_levels(ticks):
+    # 4 slots per level and 3 levels: 4, 16 and 64 ticks per level span, 300 is past the wheel
+    clock, wheel = make_wheel(resolution=1.0, slot_bits=2, levels=3)
+    fired = []
+    wheel.arm(ticks, lambda: fired.append(clock()))
+
+    for _ in range(ticks + 5):
+        clock.advance(1.0)
+        wheel.poll()
+    assert fired == [ticks]
+
+
+def test_random_timers_fire_neither_early_nor_late():
+    rng = random.Random(7)
+    resolution, max_step = 0.1, 0.35
+    clock, wheel = make_wheel(resolution=resolution, slot_bits=2, levels=3)
+    due = {}
+    fired = {}
+
+    for index in range(500):
+        # Armed after the clock moved but before the poll, so current_tick is stale
+        clock.advance(rng.uniform(0, max_step))
+        delay = rng.choice((rng.uniform(0, 1), rng.uniform(0, 10), rng.uniform(0, 40)))
+        due[index] = clock() + delay
+        wheel.arm(delay, lambda key: fired.setdefault(key, clock()), index)
+        wheel.poll()
+
+    while len(wheel):
+        clock.advance(rng.uniform(0, max_step))
+        wheel.poll()
+
+    assert fired.keys() == due.keys()
+    for index, deadline in due.items():
+        assert deadline <= fired[index] < deadline + resolution + max_step + 1e-9
+
+
+def test_needs_two_levels():
+    with pytest.raises(ValueError):
+        TimerWheel(levels=1)
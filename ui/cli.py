@@ -0,0 +1,159 @@
+import os
+import shutil
+import sys
+
+from utils.constants import Team, GameState
+
+
+# ANSI escape sequences
+CSI = "\x1b["
+RESET = CSI + "0m"
+CLEAR_SCREEN = CSI + "2J"
+CLEAR_LINE = CSI + "K"
+CLEAR_BELOW = CSI + "J"
+
+"""Foreground colour of each kind of cell in ANSI mode."""
+CELL_COLORS = {
+    "R": CSI + "1;31m",   # Red pieces
+    "B": CSI + "1;34m",   # Blue pieces
+    "~": CSI + "36m",     # Lakes
+    "#": CSI + "90m",     # Fog
+    ".": CSI + "2m",      # Empty squares
+}
+
+"""Characters per board cell ("R10" plus padding)."""
+CELL_WIDTH = 4
+"""Characters left of the first cell: the row number and the border ("10 |")."""
+ROW_PREFIX = 4
+"""Screen lines above the first board row: the column numbers and the top border."""
+HEADER_LINES = 2
+"""Screen lines kept free under a frame for the input prompt and the line it ends with."""
+PROMPT_LINES = 2
+
+
+def supports_ansi(stream) -> bool:
+    """True when stream is an interactive terminal that understands cursor movement."""
+    return hasattr(stream, "isatty") and stream.isatty() and os.environ.get("TERM", "") != "dumb"
+
+
+class TerminalRenderer:
+    """
+    Draws the fog-filtered board (Board.get_view) in the terminal, one buffered write per frame.
+
+    ANSI mode paints the whole frame once, then only moves the cursor to the cells (and
+    the status and message lines) that changed since the previous frame. Plain mode, used
+    automatically when the output is not a terminal, writes every changed frame in full
+    without escape codes, so piped logs stay readable.
+
+    The cursor moves assume the frame has not scrolled: game messages belong in the
+    frame's message lines, the only other output should be an input prompt under the
+    frame, and anything else written to the stream must be followed by invalidate().
+    """
+
+    def __init__(self, stream=None, ansi: bool = None):
+        """
+        :param stream: Where frames are written (default: sys.stdout).
+        :param ansi: Force ANSI (True) or plain (False) mode; None detects it from the stream.
+        """
+        self.stream = stream or sys.stdout
+        self.ansi = supports_ansi(self.stream) if ansi is None else ansi
+        # What is currently on screen (None forces a full redraw)
+        self.shown_view = None
+        self.shown_status = None
+        self.shown_messages = None
+
+    def invalidate(self):
+        """Forgets what is on screen, so the next frame is drawn in full (e.g. after other output scrolled it)."""
+        self.shown_view = None
+        self.shown_status = None
+        self.shown_messages = None
+
+    def render(self, view: list, status: str = "", messages=()) -> int:
+        """
+        Draws one frame.
+
+        :param view: Cell strings as returned by Board.get_view.
+        :param status: One line shown under the board (whose turn it is, or the result).
+        :param messages: Lines shown under the status, e.g. what the engine reported for the last moves.
+        :return: Number of characters written (0 for an unchanged frame in plain mode).
+        """
+        messages = list(messages)
+        if not self.ansi:
+            if view == self.shown_view and status == self.shown_status and messages == self.shown_messages:
+                return 0
+            frame = self._full_frame(view, status, messages, colored=False)
+        elif self.shown_view is None or len(view) != len(self.shown_view) or not self._fits(view, messages):
+            frame = CLEAR_SCREEN + CSI + "H" + self._full_frame(view, status, messages, colored=True)
+        else:
+            # Even an unchanged frame moves the cursor back under it and wipes the last prompt
+            frame = self._diff_frame(view, status, messages)
+
+        self.shown_view = [list(row) for row in view]
+        self.shown_status = status
+        self.shown_messages = messages
+        self.stream.write(frame)
+        self.stream.flush()
+        return len(frame)
+
+    # ==========================================
+    # FRAME BUILDING
+    # ==========================================
+
+    def _fits(self, view: list, messages: list) -> bool:
+        """Whether the frame and the prompt under it fit the terminal, so nothing scrolls between frames."""
+        height = shutil.get_terminal_size().lines
+        return HEADER_LINES + len(view) + 1 + len(messages) + PROMPT_LINES <= height
+
+    def _full_frame(self, view: list, status: str, messages: list, colored: bool) -> str:
+        size = len(view)
+        lines = [" " * ROW_PREFIX + "".join(f"{x:^{CELL_WIDTH}}" for x in range(size)),
+                 " " * (ROW_PREFIX - 1) + "+" + "-" * (size * CELL_WIDTH)]
+        for y, row in enumerate(view):
+            cells = "".join(self._cell(text, colored) for text in row)
+            lines.append(f"{y:>2} |{cells}")
+        lines.append(status)
+        lines += messages
+        return "\n".join(lines) + "\n"
+
+    def _diff_frame(self, view: list, status: str, messages: list) -> str:
+        """Cursor moves and text for the cells that changed, then the status and message lines."""
+        parts = []
+        for y, (row, shown_row) in enumerate(zip(view, self.shown_view)):
+            for x, (text, shown) in enumerate(zip(row, shown_row)):
+                if text != shown:
+                    parts.append(self._goto(HEADER_LINES + y, ROW_PREFIX + x * CELL_WIDTH))
+                    parts.append(self._cell(text, colored=True))
+
+        status_line = HEADER_LINES + len(view)
+        if status != self.shown_status:
+            parts.append(self._goto(status_line, 0) + status + CLEAR_LINE)
+        if messages != self.shown_messages:
+            for index, message in enumerate(messages):
+                parts.append(self._goto(status_line + 1 + index, 0) + message + CLEAR_LINE)
+        # Leave the cursor under the messages and wipe the last prompt (and any longer old messages)
+        parts.append(self._goto(status_line + 1 + len(messages), 0) + CLEAR_BELOW)
+        return "".join(parts)
+
+    @staticmethod
+    def _goto(line: int, column: int) -> str:
+        """Cursor move to a 0-based screen position."""
+        return f"{CSI}{line + 1};{column + 1}H"
+
+    @staticmethod
+    def _cell(text: str, colored: bool) -> str:
+        """One padded cell: the piece code, "~" lake, "#" fog or "." empty."""
+        text = text or "."
+        padded = f"{text:^{CELL_WIDTH}}"
+        if not colored:
+            return padded
+        return CELL_COLORS.get(text[0], "") + padded + RESET
+
+
+def status_line(logic, viewer_team: Team) -> str:
+    """Turn (or result) summary shown under the board."""
+    if logic.winner:
+        return f"🏆 {logic.winner.name} wins!"
+    if logic.game_state == GameState.FINISHED:
+        return "🤝 Draw"
+    marker = " (you)" if logic.current_turn == viewer_team else ""
+    return f"Turn {logic.turn_counter + 1}: {logic.current_turn.name}{marker}"
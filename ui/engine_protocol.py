@@ -0,0 +1,370 @@
+import contextlib
+import io
+import random
+import sys
+
+from engine.board import Board
+from engine.game_logic import GameLogic
+from engine.piece import Piece
+from ai.ai_bot import AIBot
+from ai.auto_setup import AutoSetup
+from ai.search import PIECE_VALUES
+from utils.config import SEARCH_THINK_TIME
+from utils.constants import CellType, GameState, MoveResult, PieceRank, Team
+
+
+"""Name and version reported by the `hello` command."""
+ENGINE_NAME = "Super Stratego Elite"
+PROTOCOL_VERSION = 1
+"""Moves listed by `analyze`, most visited first."""
+ANALYSIS_LINES = 5
+
+HELP = """\
+hello                                  -> id lines, then `hellook`
+isready                                -> readyok
+newgame [seed N]                       -> AutoSetup for both armies; `ok`
+position startpos [seed N] [moves x1 y1 x2 y2 ...]
+position cells <rows> [turn RED|BLUE] [moves ...]
+                                       -> `ok`; rows are `/`-separated, cells `,`-separated ("R7", "BS", "" empty)
+export                                 -> `position cells <rows> turn <team>`
+view [RED|BLUE|NONE]                   -> fog-filtered rows, `turn`, `ply`, `state`, then `end`
+validate x1 y1 x2 y2                   -> `valid` or `invalid <reason>`
+move x1 y1 x2 y2                       -> `moved <outcome> state <state> [winner <team>]`
+legal                                  -> `legal <count> x1,y1,x2,y2 ...`
+go [level N] [movetime MS]             -> `bestmove x1 y1 x2 y2` or `bestmove none`
+analyze [movetime MS]                  -> `info move ... visits N value P` lines, then `bestmove`
+eval [RED|BLUE]                        -> `eval <material balance>`
+belief x y [RED|BLUE]                  -> `belief <RANK> <probability> ...` as seen by the team
+help                                   -> this text, then `end`
+quit"""
+
+
+class ProtocolError(Exception):
+    """A command the engine cannot carry out; reported as an `error` line."""
+
+
+def format_move(move) -> str:
+    (sx, sy), (ex, ey) = move
+    return f"{sx} {sy} {ex} {ey}"
+
+
+def parse_piece(code: str, x: int, y: int):
+    """Piece for a cell code ("R7", "B10", "RS"...), or None for anything else (empty, lake, fog)."""
+    if len(code) < 2 or code[0] not in "RB":
+        return None
+    team = Team.RED if code[0] == "R" else Team.BLUE
+    rank = code[1:]
+    try:
+        rank = PieceRank(int(rank)) if rank.isdigit() else PieceRank(rank)
+    except ValueError:
+        raise ProtocolError(f"unknown rank in cell {code}")
+    return Piece(rank, team, (x, y))
+
+
+class EngineProtocol:
+    """
+    Line-based engine protocol, in the spirit of UCI, for driving the engine from other
+    programs through one long-lived process.
+
+    The engine is stateful: `position`/`newgame` set up a game, `move` plays on it and
+    `go`/`analyze` ask a bot about it. Every command answers with lines on the output
+    stream; the last line of an answer is always the same keyword for a given command
+    (e.g. `readyok`, `bestmove`, `end`) or `error <message>`, so a client can read up to
+    it without timeouts. The engine's own console chatter is swallowed.
+    """
+
+    def __init__(self, output=None):
+        """
+        :param output: Stream answers are written to (default: sys.stdout).
+        """
+        self.output = output or sys.stdout
+        self.board = None
+        self.logic = None
+        # Bots are kept per (team, level) so a search level keeps its tree between requests
+        self.bots = {}
+        self.commands = {
+            "hello": self._hello,
+            "isready": self._isready,
+            "newgame": self._newgame,
+            "position": self._position,
+            "export": self._export,
+            "view": self._view,
+            "validate": self._validate,
+            "move": self._move,
+            "legal": self._legal,
+            "go": self._go,
+            "analyze": self._analyze,
+            "eval": self._eval,
+            "belief": self._belief,
+            "help": self._help,
+        }
+
+    # ==========================================
+    # MAIN LOOP
+    # ==========================================
+
+    def run(self, stream=None):
+        """Answers commands from stream (default: sys.stdin), one per line, until `quit` or EOF."""
+        for line in stream or sys.stdin:
+            if not self.handle(line):
+                break
+        self.close()
+
+    def handle(self, line: str) -> bool:
+        """
+        Runs one command line.
+
+        :return: False once the client asked to quit.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        name, args = tokens[0].lower(), tokens[1:]
+        if name == "quit":
+            return False
+
+        command = self.commands.get(name)
+        try:
+            if command is None:
+                raise ProtocolError(f"unknown command {name}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                lines = command(args)
+        except ProtocolError as error:
+            lines = [f"error {error}"]
+        except (ValueError, IndexError, KeyError) as error:
+            lines = [f"error bad arguments for {name}: {error}"]
+
+        self.output.write("\n".join(lines) + "\n")
+        self.output.flush()
+        return True
+
+    def close(self):
+        for bot in self.bots.values():
+            bot.stop_pondering()
+
+    # ==========================================
+    # SETUP
+    # ==========================================
+
+    def _hello(self, args) -> list:
+        return [f"id name {ENGINE_NAME}", f"id protocol {PROTOCOL_VERSION}", "hellook"]
+
+    def _isready(self, args) -> list:
+        return ["readyok"]
+
+    def _help(self, args) -> list:
+        return HELP.splitlines() + ["end"]
+
+    def _newgame(self, args) -> list:
+        options = self._options(args, ("seed",))
+        self._install(self._start_position(options.get("seed")))
+        return ["ok"]
+
+    def _position(self, args) -> list:
+        if not args:
+            raise ProtocolError("position needs `startpos` or `cells`")
+        moves = []
+        if "moves" in args:
+            index = args.index("moves")
+            moves = [int(value) for value in args[index + 1:]]
+            args = args[:index]
+            if len(moves) % 4:
+                raise ProtocolError("moves must come in groups of four coordinates")
+
+        # The position and its moves are built on a fresh game, so a bad one keeps the current game
+        kind, rest = args[0], args[1:]
+        if kind == "startpos":
+            logic = self._start_position(self._options(rest, ("seed",)).get("seed"))
+        elif kind == "cells" and rest:
+            logic = self._cells_position(rest[0], self._options(rest[1:], ("turn",)).get("turn", "RED"))
+        else:
+            raise ProtocolError(f"unknown position type {kind}")
+
+        for i in range(0, len(moves), 4):
+            start, end = (moves[i], moves[i + 1]), (moves[i + 2], moves[i + 3])
+            result = logic.check_move(start, end)
+            if result != MoveResult.OK:
+                raise ProtocolError(f"move {format_move((start, end))} is illegal ({result.name})")
+            logic.execute_move(start, end)
+
+        self._install(logic)
+        return ["ok"]
+
+    @staticmethod
+    def _start_position(seed) -> GameLogic:
+        """New game with both armies deployed by AutoSetup; not installed yet."""
+        if seed is not None:
+            random.seed(int(seed))
+        logic = GameLogic(Board())
+        AutoSetup(logic).deploy_all()
+        return logic
+
+    @staticmethod
+    def _cells_position(rows: str, turn: str) -> GameLogic:
+        """New game with the pieces of a `position cells` description; not installed yet."""
+        board = Board()
+        turn = Team[turn]
+        rows = rows.split("/")
+        if len(rows) != board.size:
+            raise ProtocolError(f"expected {board.size} rows, got {len(rows)}")
+        for y, row in enumerate(rows):
+            cells = row.split(",")
+            if len(cells) != board.size:
+                raise ProtocolError(f"row {y} has {len(cells)} cells, expected {board.size}")
+            for x, code in enumerate(cells):
+                piece = parse_piece(code, x, y)
+                if piece and board.cell_metadata[y][x] == CellType.LAKE:
+                    raise ProtocolError(f"piece {code} placed in a lake at {x} {y}")
+                if piece:
+                    board.place_piece(piece, x, y)
+
+        logic = GameLogic(board)
+        logic.current_turn = turn
+        logic.game_state = GameState.IN_PROGRESS
+        return logic
+
+    def _install(self, logic: GameLogic):
+        """Makes `logic` the current game; bots of the previous one are stopped and dropped."""
+        self.close()
+        self.bots = {}
+        self.board = logic.board
+        self.logic = logic
+
+    # ==========================================
+    # QUERIES AND MOVES
+    # ==========================================
+
+    def _export(self, args) -> list:
+        self._require_game()
+        rows = []
+        for y, row in enumerate(self.board.grid):
+            rows.append(",".join(repr(piece) if piece else "" for piece in row))
+        return [f"position cells {'/'.join(rows)} turn {self.logic.current_turn.name}"]
+
+    def _view(self, args) -> list:
+        self._require_game()
+        viewer = Team[args[0]] if args else self.logic.current_turn
+        lines = ["row " + ",".join(row) for row in self.board.get_view(viewer)]
+        lines.append(f"turn {self.logic.current_turn.name}")
+        lines.append(f"ply {len(self.logic.move_history)}")
+        lines.append(f"state {self.logic.game_state.name}")
+        lines.append("end")
+        return lines
+
+    def _validate(self, args) -> list:
+        self._require_game()
+        start, end = self._coordinates(args)
+        result = self.logic.check_move(start, end)
+        return ["valid" if result == MoveResult.OK else f"invalid {result.name}"]
+
+    def _move(self, args) -> list:
+        self._require_game()
+        if self.logic.game_state != GameState.IN_PROGRESS:
+            raise ProtocolError("the game is over")
+        start, end = self._coordinates(args)
+        result = self.logic.check_move(start, end)
+        if result != MoveResult.OK:
+            raise ProtocolError(f"illegal move ({result.name})")
+
+        report = self.logic.execute_move(start, end)
+        line = f"moved {report.get('outcome', 'NONE')} state {self.logic.game_state.name}"
+        if self.logic.winner:
+            line += f" winner {self.logic.winner.name}"
+        return [line]
+
+    def _legal(self, args) -> list:
+        self._require_game()
+        moves = AIBot(self.logic.current_turn, self.logic)._get_all_legal_moves()
+        tokens = [",".join(str(value) for value in start + end) for start, end in moves]
+        return [" ".join([f"legal {len(moves)}"] + tokens)]
+
+    def _go(self, args) -> list:
+        self._require_game()
+        options = self._options(args, ("level", "movetime"))
+        bot = self._bot(self.logic.current_turn, int(options.get("level", 2)))
+        bot.think_time = self._movetime(options)
+        move = bot.get_move()
+        return [f"bestmove {format_move(move)}" if move else "bestmove none"]
+
+    def _analyze(self, args) -> list:
+        """Runs the search level and reports its most visited root moves."""
+        self._require_game()
+        options = self._options(args, ("movetime",))
+        bot = self._bot(self.logic.current_turn, 4)
+        bot.think_time = self._movetime(options)
+        move = bot.get_move()
+        if move is None:
+            return ["bestmove none"]
+
+        children = sorted(bot.search.root.children.values(), key=lambda child: child.visits, reverse=True)
+        lines = [f"info move {format_move(child.move)} visits {child.visits} value {child.reward / child.visits:.3f}"
+                 for child in children[:ANALYSIS_LINES] if child.visits]
+        lines.append(f"bestmove {format_move(move)}")
+        return lines
+
+    def _eval(self, args) -> list:
+        """Material balance (PIECE_VALUES) with every rank known, from the given team's side."""
+        self._require_game()
+        team = Team[args[0]] if args else self.logic.current_turn
+        balance = 0
+        for row in self.board.grid:
+            for piece in row:
+                if piece:
+                    balance += PIECE_VALUES[piece.rank] if piece.team == team else -PIECE_VALUES[piece.rank]
+        return [f"eval {balance}"]
+
+    def _belief(self, args) -> list:
+        self._require_game()
+        square = (int(args[0]), int(args[1]))
+        team = Team[args[2]] if len(args) > 2 else self.logic.current_turn
+        probabilities = self._bot(team, 4).get_belief().probabilities(square)
+        if not probabilities:
+            raise ProtocolError(f"no hidden enemy piece on {square[0]} {square[1]}")
+        pairs = sorted(probabilities.items(), key=lambda item: item[1], reverse=True)
+        return [" ".join(["belief"] + [f"{rank.name} {p:.4f}" for rank, p in pairs])]
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    def _require_game(self):
+        if self.logic is None:
+            raise ProtocolError("no position set (use `newgame` or `position`)")
+
+    def _bot(self, team: Team, level: int) -> AIBot:
+        if not 1 <= level <= 4:
+            raise ProtocolError(f"unknown level {level}")
+        bot = self.bots.get((team, level))
+        if bot is None:
+            bot = self.bots[(team, level)] = AIBot(team, self.logic, level=level)
+        return bot
+
+    @staticmethod
+    def _movetime(options: dict) -> float:
+        return int(options["movetime"]) / 1000 if "movetime" in options else SEARCH_THINK_TIME
+
+    @staticmethod
+    def _coordinates(args) -> tuple:
+        if len(args) != 4:
+            raise ProtocolError("expected x1 y1 x2 y2")
+        sx, sy, ex, ey = (int(value) for value in args)
+        return (sx, sy), (ex, ey)
+
+    @staticmethod
+    def _options(args, names: tuple) -> dict:
+        """Parses `name value` pairs (e.g. `level 4 movetime 500`)."""
+        if len(args) % 2:
+            raise ProtocolError("options must be `name value` pairs")
+        options = dict(zip(args[::2], args[1::2]))
+        unknown = set(options) - set(names)
+        if unknown:
+            raise ProtocolError(f"unknown option {sorted(unknown)[0]}")
+        return options
+
+
+def main():
+    EngineProtocol().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from engine.piece import Piece
 from utils.config import ARMY_COMPOSITION
 from engine.game_logic import GameLogic
 from ai.auto_setup import AutoSetup
+from ui.text_cache import TEXT_CACHE, GlyphAtlas
 
 # --- تعریف تم رنگی (قهوه‌ای و آجری) ---
 LIGHT_BROWN = (235, 213, 179)  # قهوه‌ای خیلی روشن (کرمی/چوبی) برای خانه‌های روشن
@@ -16,6 +17,7 @@ LAKE_BLUE = (70, 130, 180)  # Added a nice Steel Blue color for lakes
 RED_TEAM_COLOR = (200, 50, 50)
 BLUE_TEAM_COLOR = (50, 100, 200)
 HIGHLIGHT_COLOR = (218, 165, 32)
+FOG_GREY = (120, 110, 100)  # Squares out of RED's line of sight
 
 
 class GameScreen:
@@ -45,6 +47,13 @@ class GameScreen:
         self.font_title = pygame.font.SysFont("Arial", 24, bold=True)
         self.font_text = pygame.font.SysFont("Arial", 18)
         self.font_piece = pygame.font.SysFont("Arial", 20, bold=True)
+        # Battle report fonts, created once instead of on every popup
+        self.font_alert_header = pygame.font.SysFont("Arial", 28, bold=True)
+        self.font_alert_rank = pygame.font.SysFont("Arial", 36, bold=True)
+        self.font_alert_details = pygame.font.SysFont("Arial", 20)
+        self.font_alert_result = pygame.font.SysFont("Arial", 22, bold=True, italic=True)
+        # Rank digits are blitted from a prebuilt atlas, other text from the shared cache
+        self.rank_atlas = GlyphAtlas(self.font_piece, (WHITE,))
 
         # --- Setup Phase Variables ---
         # Create a fresh copy of the army list so we can subtract from it
@@ -77,7 +86,7 @@ class GameScreen:
                 # 1. Clear the bottom 4 rows in case the player manually placed a few pieces before clicking Auto
                 for r in range(self.rows - 4, self.rows):
                     for c in range(self.cols):
-                        self.board.grid[r][c] = None
+                        self.board.remove_piece(c, r)
 
                 # 2. Summon the AutoSetup AI
                 ai_setup = AutoSetup(self.logic)
@@ -205,8 +214,12 @@ class GameScreen:
         for row in range(self.rows):
             for col in range(self.cols):
                 # 1. Check if the cell is a LAKE in the backend logic
+                # Enemies RED has no line of sight to stay hidden
+                in_sight = self.board.visibility.can_see(Team.RED, col, row)
                 if self.board.cell_metadata[row][col] == CellType.LAKE:
                     color = LAKE_BLUE
+                elif not in_sight and self.setup_complete:
+                    color = FOG_GREY
                 else:
                     # 2. Otherwise, use the standard checkerboard pattern
                     color = LIGHT_BROWN if (row + col) % 2 == 0 else BRICK_RED
@@ -224,6 +237,8 @@ class GameScreen:
                 # --- Draw the Pieces ---
                 # Ask the backend board if there is a piece at this (col, row)
                 piece = self.board.get_piece_at(col, row)
+                if piece and piece.team != Team.RED and not in_sight:
+                    piece = None
 
                 if piece:
                     piece_color = RED_TEAM_COLOR if piece.team == Team.RED else BLUE_TEAM_COLOR
@@ -239,17 +254,16 @@ class GameScreen:
                         text_val = "?"
 
                     # Draw the rank value (number/letter) in the center of the piece
-                    text_surf = self.font_piece.render(text_val, True, WHITE)
-                    surface.blit(text_surf, text_surf.get_rect(center=center))
+                    self.rank_atlas.blit_centered(surface, text_val, WHITE, center)
 
         # رسم حروف A تا J بالای تخته
         for col in range(self.cols):
-            text = self.font_coord.render(chr(65 + col), True, DARK_BROWN)
+            text = TEXT_CACHE.render(self.font_coord, chr(65 + col), DARK_BROWN)
             surface.blit(text, (self.board_x + col * self.cell_size + 18, self.board_y - 25))
 
         # رسم اعداد 1 تا 10 کنار تخته
         for row in range(self.rows):
-            text = self.font_coord.render(str(row + 1), True, DARK_BROWN)
+            text = TEXT_CACHE.render(self.font_coord, str(row + 1), DARK_BROWN)
             surface.blit(text, (self.board_x - 25, self.board_y + row * self.cell_size + 15))
 
     def draw_side_panel(self, surface):
@@ -265,7 +279,7 @@ class GameScreen:
         pygame.draw.rect(surface, DARK_BROWN, panel_rect, width=2, border_radius=10)
 
         # تایتل پنل
-        title_surf = self.font_title.render("GAME INFO", True, DARK_BROWN)
+        title_surf = TEXT_CACHE.render(self.font_title, "GAME INFO", DARK_BROWN)
         surface.blit(title_surf, (panel_x + panel_width // 2 - title_surf.get_width() // 2, panel_y + 20))
 
         # خط جداکننده
@@ -279,10 +293,10 @@ class GameScreen:
             turn_str = "Turn: BLUE TEAM (AI)"
             turn_color = BLUE_TEAM_COLOR
 
-        turn_text = self.font_text.render(turn_str, True, turn_color)
+        turn_text = TEXT_CACHE.render(self.font_text, turn_str, turn_color)
         surface.blit(turn_text, (panel_x + 20, panel_y + 80))
 
-        phase_text = self.font_text.render("Phase: SETUP", True, DARK_BROWN)
+        phase_text = TEXT_CACHE.render(self.font_text, "Phase: SETUP", DARK_BROWN)
         surface.blit(phase_text, (panel_x + 20, panel_y + 110))
 
 
@@ -297,7 +311,7 @@ class GameScreen:
                     is_selected = (self.selected_piece_name == piece_name)
                     text_color = HIGHLIGHT_COLOR if is_selected else DARK_BROWN
 
-                    inv_text = self.font_text.render(f"{piece_name}: {count}", True, text_color)
+                    inv_text = TEXT_CACHE.render(self.font_text, f"{piece_name}: {count}", text_color)
                     surface.blit(inv_text, (panel_x + 20, start_y + y_offset))
 
                     # Draw a small dot next to the selected piece
@@ -308,7 +322,7 @@ class GameScreen:
 
             # --- Draw the Auto-Deploy Button ---
             pygame.draw.rect(surface, BLUE_TEAM_COLOR, self.btn_auto_deploy, border_radius=10)
-            btn_text = self.font_piece.render("Auto Deploy", True, WHITE)
+            btn_text = TEXT_CACHE.render(self.font_piece, "Auto Deploy", WHITE)
             surface.blit(btn_text, btn_text.get_rect(center=self.btn_auto_deploy.center))
 
     def show_battle_alert(self, surface, report):
@@ -344,10 +358,10 @@ class GameScreen:
         TEXT_GRAY = (180, 180, 180)
 
         # Custom fonts for the panel
-        font_header = pygame.font.SysFont("Arial", 28, bold=True)
-        font_rank_big = pygame.font.SysFont("Arial", 36, bold=True)
-        font_details = pygame.font.SysFont("Arial", 20)
-        font_result = pygame.font.SysFont("Arial", 22, bold=True, italic=True)
+        font_header = self.font_alert_header
+        font_rank_big = self.font_alert_rank
+        font_details = self.font_alert_details
+        font_result = self.font_alert_result
 
         # Modern OK Button dimensions and rect
         btn_width, btn_height = 160, 45
@@ -379,7 +393,7 @@ class GameScreen:
             surface.blit(panel_surface, (box_x, box_y))
 
             # 2. Main Title
-            title_surf = font_header.render("TACTICAL ENGAGEMENT REPORT", True, BORDER_COLOR)
+            title_surf = TEXT_CACHE.render(font_header, "TACTICAL ENGAGEMENT REPORT", BORDER_COLOR)
             title_rect = title_surf.get_rect(center=(box_x + box_width // 2, box_y + 35))
             surface.blit(title_surf, title_rect)
 
@@ -390,32 +404,32 @@ class GameScreen:
             content_y_start = box_y + 90
 
             # --- Left Column (Attacker) ---
-            att_label = font_details.render(f"ATTACKER ({att_team})", True, TEXT_GRAY)
+            att_label = TEXT_CACHE.render(font_details, f"ATTACKER ({att_team})", TEXT_GRAY)
             surface.blit(att_label, att_label.get_rect(center=(left_center, content_y_start)))
 
-            att_rank_surf = font_rank_big.render(att_rank_name, True, att_color)
+            att_rank_surf = TEXT_CACHE.render(font_rank_big, att_rank_name, att_color)
             surface.blit(att_rank_surf, att_rank_surf.get_rect(center=(left_center, content_y_start + 40)))
 
             # --- Center (VS) ---
-            vs_surf = font_header.render("VS", True, TEXT_WHITE)
+            vs_surf = TEXT_CACHE.render(font_header, "VS", TEXT_WHITE)
             surface.blit(vs_surf, vs_surf.get_rect(center=(center_x, content_y_start + 40)))
 
             # --- Right Column (Defender) ---
-            def_label = font_details.render(f"DEFENDER ({def_team})", True, TEXT_GRAY)
+            def_label = TEXT_CACHE.render(font_details, f"DEFENDER ({def_team})", TEXT_GRAY)
             surface.blit(def_label, def_label.get_rect(center=(right_center, content_y_start)))
 
-            def_rank_surf = font_rank_big.render(def_rank_name, True, def_color)
+            def_rank_surf = TEXT_CACHE.render(font_rank_big, def_rank_name, def_color)
             surface.blit(def_rank_surf, def_rank_surf.get_rect(center=(right_center, content_y_start + 40)))
 
             # --- Movement Coordinates ---
-            move_surf = font_details.render(f"Sector: {start_str}  >>>  {end_str}", True, TEXT_GRAY)
+            move_surf = TEXT_CACHE.render(font_details, f"Sector: {start_str}  >>>  {end_str}", TEXT_GRAY)
             surface.blit(move_surf, move_surf.get_rect(center=(center_x, content_y_start + 85)))
 
             # --- Divider Line and Result ---
             pygame.draw.line(surface, (100, 100, 100), (box_x + 30, box_y + 200), (box_x + box_width - 30, box_y + 200),
                              2)
 
-            result_surf = font_result.render(f"OUTCOME: {msg}", True, BORDER_COLOR)
+            result_surf = TEXT_CACHE.render(font_result, f"OUTCOME: {msg}", BORDER_COLOR)
             surface.blit(result_surf, result_surf.get_rect(center=(center_x, box_y + 225)))
 
             # 4. Draw the Modern OK Button
@@ -424,7 +438,7 @@ class GameScreen:
             pygame.draw.rect(surface, btn_color, btn_rect, border_radius=15)
             pygame.draw.rect(surface, BORDER_COLOR, btn_rect, width=2, border_radius=15)
 
-            btn_text_surf = font_details.render("ROGER THAT", True, TEXT_WHITE)
+            btn_text_surf = TEXT_CACHE.render(font_details, "ROGER THAT", TEXT_WHITE)
             surface.blit(btn_text_surf, btn_text_surf.get_rect(center=btn_rect.center))
 
             pygame.display.flip()
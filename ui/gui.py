@@ -2,6 +2,7 @@ import pygame
 import sys
 import os
 from game_screen import GameScreen
+from ui.text_cache import TEXT_CACHE
 from engine.board import Board
 from engine.game_logic import GameLogic
 from ai.ai_bot import AIBot
@@ -84,11 +85,12 @@ class Button:
 
         pygame.draw.rect(glass_surface, self.border_color, glass_surface.get_rect(), width=2, border_radius=15)
 
-        shadow_surf = self.font.render(self.text, True, (0, 0, 0, 150))
+        # Text comes from the shared cache: button labels never change between frames
+        shadow_surf = TEXT_CACHE.render(self.font, self.text, (0, 0, 0, 150))
         shadow_rect = shadow_surf.get_rect(center=(self.rect.width // 2 + 2, self.rect.height // 2 + 2))
         glass_surface.blit(shadow_surf, shadow_rect)
 
-        text_surf = self.font.render(self.text, True, text_color)
+        text_surf = TEXT_CACHE.render(self.font, self.text, text_color)
         text_rect = text_surf.get_rect(center=(self.rect.width // 2, self.rect.height // 2))
         glass_surface.blit(text_surf, text_rect)
 
@@ -162,7 +164,7 @@ class TextBox:
         pygame.draw.rect(surface, WHITE, self.rect)
         pygame.draw.rect(surface, color, self.rect, 3)
 
-        text_surf = FONT_MEDIUM.render(self.text, True, BLACK)
+        text_surf = TEXT_CACHE.render(FONT_MEDIUM, self.text, BLACK)
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
 
@@ -177,7 +179,7 @@ def  run_gui():
     game_board = Board()
     game_logic = GameLogic(game_board)
     game_screen = GameScreen(WIDTH, HEIGHT, game_board, game_logic)
-    ai_player = AIBot(Team.BLUE, game_logic, level=2)
+    ai_player = AIBot(Team.BLUE, game_logic, level=4)
 
     # Main Menu Buttons
     btn_vs_human = Button(250, 200, 300, 60, "Play vs Human")
@@ -256,6 +258,9 @@ def  run_gui():
 
             elif state == "PLAYING_AI":
                 game_screen.handle_event(event)
+        if state == "PLAYING_AI":
+            # Search on the player's time too (stops by itself once the game is over)
+            ai_player.ponder()
         if state == "PLAYING_AI" and game_logic.game_state == GameState.IN_PROGRESS:
             if game_logic.current_turn == Team.BLUE:
                 # 1. Start the timer if AI just started thinking
@@ -297,7 +302,7 @@ def  run_gui():
 
         if state == "MAIN_MENU":
             if not background_img:
-                title_surf = FONT_LARGE.render("SUPER STRATEGO ELITE", True, WHITE)
+                title_surf = TEXT_CACHE.render(FONT_LARGE, "SUPER STRATEGO ELITE", WHITE)
                 SCREEN.blit(title_surf, (WIDTH // 2 - title_surf.get_width() // 2, 80))
 
             btn_vs_human.draw(SCREEN)
@@ -312,10 +317,10 @@ def  run_gui():
             overlay.fill((0, 0, 0, 170))
             SCREEN.blit(overlay, (0, 0))
 
-            title_surf = FONT_LARGE.render("SETTINGS", True, WHITE)
+            title_surf = TEXT_CACHE.render(FONT_LARGE, "SETTINGS", WHITE)
             SCREEN.blit(title_surf, (WIDTH // 2 - title_surf.get_width() // 2, 80))
 
-            vol_label = FONT_MEDIUM.render("Music Volume:", True, WHITE)
+            vol_label = TEXT_CACHE.render(FONT_MEDIUM, "Music Volume:", WHITE)
             SCREEN.blit(vol_label, (200, 190))
 
             btn_mute.draw(SCREEN)
@@ -328,6 +333,7 @@ def  run_gui():
         pygame.display.flip()
         clock.tick(60)  # 60 FPS
 
+    ai_player.stop_pondering()
     pygame.quit()
     sys.exit()
 
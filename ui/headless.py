@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# The dummy drivers let pygame draw and save images without a display or sound card
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from engine.compact import unpack_game
+from network.persistence import GameStore
+from ui.game_screen import (LIGHT_BROWN, BRICK_RED, PANEL_BG, DARK_BROWN, WHITE, LAKE_BLUE, RED_TEAM_COLOR,
+                            BLUE_TEAM_COLOR, FOG_GREY)
+from ui.text_cache import TEXT_CACHE, GlyphAtlas
+from utils.config import PERSISTENCE_PATH
+from utils.constants import CellType, Team
+
+
+"""Side (pixels) of one board square in rendered frames."""
+CELL_SIZE = 50
+"""Space (pixels) around the board for the coordinates."""
+MARGIN = 30
+"""Viewers a frame can be drawn for: every rank shown, a team's fog-filtered view, or the neutral view."""
+VIEWERS = ("ALL", "RED", "BLUE", "NONE")
+
+
+def full_view(board) -> list:
+    """
+    Review view of a board: every piece with its rank, "~" for lakes, "" for empty squares.
+    Clouds and line of sight are ignored, like a referee looking at the real board.
+    """
+    view = []
+    for y, row in enumerate(board.grid):
+        cells = []
+        for x, piece in enumerate(row):
+            if piece:
+                cells.append(f"{piece.team.name[0]}{piece.rank.value}")
+            elif board.cell_metadata[y][x] == CellType.LAKE:
+                cells.append("~")
+            else:
+                cells.append("")
+        view.append(cells)
+    return view
+
+
+def board_view(board, viewer: str) -> list:
+    """The view a frame is drawn from, for one of VIEWERS."""
+    if viewer == "ALL":
+        return full_view(board)
+    return board.get_view(Team[viewer])
+
+
+class FrameRenderer:
+    """
+    Draws board views into an off-screen surface, with the look of GameScreen.
+
+    The frame border and coordinates are drawn once into a background. Square tiles and
+    piece sprites (disc, border and rank glyph) are built the first time each kind shows up.
+    A frame is then one background blit plus one blit per square, with no shape drawing
+    and no font rasterization.
+    """
+
+    def __init__(self, size: int, cell_size: int = CELL_SIZE, margin: int = MARGIN):
+        """
+        :param size: Squares per board side.
+        :param cell_size: Side of one square in pixels.
+        :param margin: Space around the board for the coordinates.
+        """
+        self.size = size
+        self.cell_size = cell_size
+        self.margin = margin
+        side = size * cell_size + 2 * margin
+        self.frame = pygame.Surface((side, side))
+
+        self.font_coord = pygame.font.SysFont("Arial", 16, bold=True)
+        self.font_piece = pygame.font.SysFont("Arial", 20, bold=True)
+        self.atlas = GlyphAtlas(self.font_piece, (WHITE,))
+
+        self.tiles = {}     # "light" / "dark" / "lake" / "fog" -> Surface
+        self.sprites = {}   # view cell ("R7", "B?") -> Surface
+        self.background = self._build_background()
+        # Top-left pixel of every square, reused by every frame
+        self.origins = [[(margin + x * cell_size, margin + y * cell_size) for x in range(size)] for y in range(size)]
+
+    def _build_background(self) -> pygame.Surface:
+        background = pygame.Surface(self.frame.get_size())
+        background.fill(PANEL_BG)
+        board_side = self.size * self.cell_size
+        border = pygame.Rect(self.margin - 4, self.margin - 4, board_side + 8, board_side + 8)
+        pygame.draw.rect(background, DARK_BROWN, border, border_radius=5)
+        for i in range(self.size):
+            offset = self.margin + i * self.cell_size + self.cell_size // 2
+            TEXT_CACHE.blit_centered(background, self.font_coord, chr(65 + i), DARK_BROWN, (offset, self.margin // 2))
+            TEXT_CACHE.blit_centered(background, self.font_coord, str(i + 1), DARK_BROWN, (self.margin // 2, offset))
+        return background
+
+    def _tile(self, kind: str) -> pygame.Surface:
+        tile = self.tiles.get(kind)
+        if tile is None:
+            color = {"light": LIGHT_BROWN, "dark": BRICK_RED, "lake": LAKE_BLUE, "fog": FOG_GREY}[kind]
+            tile = self.tiles[kind] = pygame.Surface((self.cell_size, self.cell_size))
+            tile.fill(color)
+        return tile
+
+    def _sprite(self, cell: str) -> pygame.Surface:
+        sprite = self.sprites.get(cell)
+        if sprite is None:
+            sprite = self.sprites[cell] = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
+            center = (self.cell_size // 2, self.cell_size // 2)
+            radius = self.cell_size // 2 - 4
+            pygame.draw.circle(sprite, RED_TEAM_COLOR if cell[0] == "R" else BLUE_TEAM_COLOR, center, radius)
+            pygame.draw.circle(sprite, DARK_BROWN, center, radius, 2)
+            self.atlas.blit_centered(sprite, cell[1:], WHITE, center)
+        return sprite
+
+    def render(self, view) -> pygame.Surface:
+        """
+        Draws one view (as returned by board_view / Board.get_view).
+
+        :return: The renderer's frame surface; it is redrawn by the next call.
+        """
+        blits = [(self.background, (0, 0))]
+        for y, row in enumerate(view):
+            origins = self.origins[y]
+            for x, cell in enumerate(row):
+                if cell == "~":
+                    blits.append((self._tile("lake"), origins[x]))
+                    continue
+                if cell == "#":
+                    blits.append((self._tile("fog"), origins[x]))
+                    continue
+                blits.append((self._tile("light" if (x + y) % 2 == 0 else "dark"), origins[x]))
+                if cell:
+                    blits.append((self._sprite(cell), origins[x]))
+        self.frame.blits(blits, doreturn=False)
+        return self.frame
+
+
+# ==========================================
+# WORKER SIDE
+# ==========================================
+
+_renderers = {}   # (size, cell size) -> FrameRenderer of this process
+_stores = {}      # database path -> GameStore of this process
+
+
+def _renderer(size: int, cell_size: int) -> FrameRenderer:
+    renderer = _renderers.get((size, cell_size))
+    if renderer is None:
+        if not pygame.get_init():
+            pygame.init()
+        renderer = _renderers[(size, cell_size)] = FrameRenderer(size, cell_size)
+    return renderer
+
+
+def render_replay(db_path: str, game_id: int, out_dir: str, viewer: str = "ALL", cell_size: int = CELL_SIZE) -> int:
+    """
+    Renders a recorded game as a frame sequence: out_dir/game_<id>/frame_<ply>.png,
+    frame 0 being the deployment.
+
+    :return: Number of frames written.
+    """
+    store = _stores.get(db_path)
+    if store is None:
+        store = _stores[db_path] = GameStore(db_path)
+    game_dir = os.path.join(out_dir, f"game_{game_id}")
+    os.makedirs(game_dir, exist_ok=True)
+
+    frames = 0
+    for logic in store.replay_positions(game_id):
+        frame = _renderer(logic.board.size, cell_size).render(board_view(logic.board, viewer))
+        pygame.image.save(frame, os.path.join(game_dir, f"frame_{frames:04d}.png"))
+        frames += 1
+    return frames
+
+
+def render_positions(positions: list, out_dir: str, viewer: str = "ALL", cell_size: int = CELL_SIZE) -> int:
+    """
+    Renders packed games (see engine.compact) as one image each: out_dir/<name>.png.
+
+    :param positions: [(name, packed game bytes)]
+    :return: Number of frames written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for name, data in positions:
+        board = unpack_game(data).board
+        frame = _renderer(board.size, cell_size).render(board_view(board, viewer))
+        pygame.image.save(frame, os.path.join(out_dir, f"{name}.png"))
+    return len(positions)
+
+
+# ==========================================
+# DRIVER
+# ==========================================
+
+def read_packed(path: str) -> list:
+    """Reads a positions file: one packed game per line as hex, optionally preceded by a name and a space."""
+    positions = []
+    with open(path) as lines:
+        for number, line in enumerate(lines):
+            parts = line.split()
+            if not parts:
+                continue
+            name, data = (parts[0], parts[1]) if len(parts) > 1 else (f"position_{number:05d}", parts[0])
+            positions.append((name, bytes.fromhex(data)))
+    return positions
+
+
+def run(tasks: list, workers: int = None) -> dict:
+    """
+    Runs render tasks on a process pool and measures the throughput.
+
+    :param tasks: [(function, args)] with render_replay / render_positions calls.
+    :return: Dict with the frames written, the wall time and frames per second.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    frames = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(function, *args) for function, args in tasks]
+        for future in as_completed(futures):
+            try:
+                frames += future.result()
+            except Exception as error:
+                failed += 1
+                print(f"❌ Render task failed: {error}")
+    elapsed = time.perf_counter() - started
+    return {
+        "tasks": len(tasks),
+        "failed": failed,
+        "workers": workers,
+        "frames": frames,
+        "duration_s": round(elapsed, 3),
+        "frames_per_sec": round(frames / elapsed, 1) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render positions and recorded games to PNG files without a display.")
+    parser.add_argument("--db", default=PERSISTENCE_PATH, help="Game database replays are read from.")
+    parser.add_argument("--games", default=None,
+                        help="Comma separated game ids to render as frame sequences, or 'all' for every finished game.")
+    parser.add_argument("--positions", default=None, help="File of packed games (hex, one per line) to render as single images.")
+    parser.add_argument("--out", default="renders")
+    parser.add_argument("--viewer", choices=VIEWERS, default="ALL")
+    parser.add_argument("--cell-size", type=int, default=CELL_SIZE)
+    parser.add_argument("--chunk", type=int, default=64, help="Positions per task.")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    tasks = []
+    if args.games:
+        if args.games == "all":
+            store = GameStore(args.db)
+            game_ids = store.finished_game_ids()
+            store.close()
+        else:
+            game_ids = [int(game_id) for game_id in args.games.split(",")]
+        tasks += [(render_replay, (args.db, game_id, args.out, args.viewer, args.cell_size)) for game_id in game_ids]
+    if args.positions:
+        positions = read_packed(args.positions)
+        tasks += [(render_positions, (positions[i:i + args.chunk], args.out, args.viewer, args.cell_size))
+                  for i in range(0, len(positions), args.chunk)]
+    if not tasks:
+        parser.error("nothing to render: pass --games and/or --positions")
+
+    print(json.dumps(run(tasks, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+
+import pygame
+
+from utils.constants import PieceRank
+
+
+"""Most rendered texts kept by a TextCache; the menus and game screen use far fewer."""
+TEXT_CACHE_SIZE = 512
+"""Texts drawn on pieces: every rank value plus "?" for hidden enemies."""
+RANK_GLYPHS = tuple(dict.fromkeys(str(rank.value) for rank in PieceRank))
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces keyed by (font, text, color).
+
+    Labels, coordinates and counters almost never change between frames, so after the
+    first frame drawing them is a dictionary lookup and a blit instead of a rasterization.
+    Surfaces handed out are shared and must not be drawn on.
+    """
+
+    def __init__(self, capacity: int = TEXT_CACHE_SIZE):
+        """
+        :param capacity: Surfaces kept before the least recently used ones are dropped.
+        """
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text: str, color, antialias: bool = True) -> pygame.Surface:
+        """Same as font.render(text, antialias, color), rasterized only on a cache miss."""
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, antialias, color)
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def blit_centered(self, surface, font, text: str, color, center: tuple):
+        """Draws cached text centred on a point."""
+        text_surf = self.render(font, text, color)
+        surface.blit(text_surf, text_surf.get_rect(center=center))
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class GlyphAtlas:
+    """
+    All rank glyphs of one font, prebuilt side by side on a single surface per color.
+
+    Pieces are drawn by blitting an area of the atlas, so the board never renders text
+    once the atlas exists, and every glyph of a frame comes from the same surface.
+    """
+
+    def __init__(self, font, colors, glyphs=RANK_GLYPHS):
+        """
+        :param font: The pygame font the glyphs are rendered with.
+        :param colors: Colors to prebuild; others are added on first use.
+        :param glyphs: Texts to put on the atlas.
+        """
+        self.font = font
+        self.glyphs = tuple(glyphs)
+        self.atlases = {}   # color -> (surface, {text: area rect})
+        for color in colors:
+            self._build(color)
+
+    def _build(self, color) -> tuple:
+        rendered = [self.font.render(text, True, color) for text in self.glyphs]
+        width = sum(glyph.get_width() for glyph in rendered)
+        height = max(glyph.get_height() for glyph in rendered)
+        atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+        areas = {}
+        x = 0
+        for text, glyph in zip(self.glyphs, rendered):
+            atlas.blit(glyph, (x, 0))
+            areas[text] = pygame.Rect(x, 0, glyph.get_width(), glyph.get_height())
+            x += glyph.get_width()
+        entry = self.atlases[color] = (atlas, areas)
+        return entry
+
+    def blit_centered(self, surface, text: str, color, center: tuple):
+        """Draws one glyph centred on a point; texts missing from the atlas fall back to the text cache."""
+        entry = self.atlases.get(color) or self._build(color)
+        atlas, areas = entry
+        area = areas.get(text)
+        if area is None:
+            TEXT_CACHE.blit_centered(surface, self.font, text, color, center)
+            return
+        surface.blit(atlas, (center[0] - area.width // 2, center[1] - area.height // 2), area)
+
+
+"""Text cache shared by the menus and the game screen."""
+TEXT_CACHE = TextCache()
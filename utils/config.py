@@ -3,6 +3,15 @@ BOARD_SIZE = 10
 
 """ Maximum time (in seconds) a player has to make a move."""
 TURN_TIME_LIMIT = 30
+"""What happens when the turn timer runs out: "AUTO_MOVE" (a random legal move is played) or "FORFEIT"."""
+TURN_TIMEOUT_PENALTY = "AUTO_MOVE"
+
+"""Times in a row a piece may move back and forth between the same two squares (two-square rule)."""
+TWO_SQUARE_LIMIT = 3
+"""Times the same position (same side to move) may come about before moves repeating it are refused."""
+POSITION_REPEAT_LIMIT = 3
+"""Plies after which the game ends in a draw (0 = no limit)."""
+DRAW_MOVE_LIMIT = 1000
 
 """How many turns must pass before the 3x3 cloud event is triggered."""
 CLOUD_TRIGGER_INTERVAL = 5
@@ -25,4 +34,61 @@ ARMY_COMPOSITION = {
     'SPY' : 1,
     'BOMB' : 6,
     'FLAG' : 1
-}
\ No newline at end of file
+}
+
+# --- Network Settings ---
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 5050
+
+"""Rating given to players who do not report one."""
+DEFAULT_RATING = 1200
+"""Width of a matchmaking rating bucket."""
+MATCHMAKING_BUCKET_WIDTH = 50
+"""Rating difference accepted right after joining the queue."""
+MATCHMAKING_INITIAL_WINDOW = 50
+"""How fast (rating points per second) the accepted difference grows while waiting."""
+MATCHMAKING_WIDEN_RATE = 25
+"""Largest rating difference the matchmaker will ever accept."""
+MATCHMAKING_MAX_WINDOW = 600
+"""Seconds a disconnected player has to reconnect before forfeiting their game."""
+RECONNECT_GRACE_PERIOD = 60
+"""Plies of board deltas kept per game for resyncing reconnecting clients."""
+RESYNC_HISTORY = 64
+
+# --- Persistence Settings ---
+"""SQLite file game records are written to."""
+PERSISTENCE_PATH = "games.db"
+"""Most events written in one transaction."""
+PERSISTENCE_BATCH_SIZE = 512
+"""Longest time (seconds) an event waits for companions before its batch is committed."""
+PERSISTENCE_FLUSH_INTERVAL = 0.05
+
+# --- Metrics Settings ---
+"""Interface the /metrics and /traces endpoint listens on."""
+METRICS_HOST = "127.0.0.1"
+"""Port of the metrics endpoint (shard processes use the following ports)."""
+METRICS_PORT = 9100
+"""Finished move traces kept in memory for /traces."""
+TRACE_BUFFER_SIZE = 256
+
+# --- AI Service Settings ---
+"""Worker processes of the shared AI service (0 = bots think inside the game server)."""
+AI_SERVICE_WORKERS = 0
+"""Most move requests handed to a worker at once."""
+AI_BATCH_SIZE = 32
+"""Longest time (seconds) a request waits for companions before its batch is sent."""
+AI_BATCH_WINDOW = 0.005
+"""Default time (seconds) the AI service has to answer a move request."""
+AI_MOVE_DEADLINE = 2.0
+
+# --- Search Bot Settings ---
+"""Whether the search bot (level 4) keeps thinking during the opponent's turn."""
+AI_PONDER = True
+"""Seconds of search the bot puts into each of its moves, pondering included."""
+SEARCH_THINK_TIME = 0.5
+"""Random plies played below a new tree leaf before the position is scored."""
+SEARCH_ROLLOUT_DEPTH = 10
+"""UCB exploration constant of the tree search."""
+SEARCH_EXPLORATION = 0.7
+"""Enemy layouts sampled per position; search iterations cycle through them."""
+SEARCH_DETERMINIZATIONS = 32
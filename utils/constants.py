@@ -37,6 +37,34 @@ class Command(Enum) :
     CLOUD_EVENT = auto()
     TURN_TIMEOUT = auto()
     GAME_OVER = auto()
+    ERROR = auto()
+    SPECTATE = auto()
+    RESYNC = auto()
+
+class MoveResult(Enum) :
+    """Result codes of move validation. Values fit in one byte for compact batch results."""
+    OK = 0
+    OUT_OF_BOUNDS = 1
+    NO_PIECE = 2
+    WRONG_TURN = 3
+    IMMOVABLE = 4
+    INTO_LAKE = 5
+    OWN_PIECE = 6
+    NOT_STRAIGHT = 7
+    PATH_BLOCKED = 8
+    NOT_ADJACENT = 9
+    TWO_SQUARES = 10
+    REPEATED_POSITION = 11
+
+class GameEvent(Enum) :
+    """Changes announced by GameLogic to its subscribers (see engine.events)."""
+    PIECE_MOVED = auto()
+    PIECE_REMOVED = auto()
+    BATTLE_RESOLVED = auto()
+    CLOUD_SPAWNED = auto()
+    CLOUD_CLEARED = auto()
+    TURN_SWITCHED = auto()
+    GAME_OVER = auto()
 
 class PowerType(Enum) :
     """Specific types of special abilities (Power Tokens)."""